@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,7 +28,14 @@ INSTALLED_APPS = [
     "api.apps.ApiConfig",
 ]
 
+# Команда manage.py benchmark, без моделей и маршрутов, подключается
+# только при BENCHMARKS=1.
+if os.environ.get("BENCHMARKS") == "1":
+    INSTALLED_APPS.append("benchmarks.apps.BenchmarksConfig")
+
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
+    "api.middleware.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -56,11 +65,97 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "alpha_store.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Профиль БД задаётся переменными окружения. По умолчанию используется
+# SQLite в режиме WAL для развёртывания на одном узле, соединения с БД
+# переиспользуются между запросами DB_CONN_MAX_AGE секунд.
+# DB_ENGINE=postgresql включает PostgreSQL, а DB_POOL=1 — встроенный пул
+# соединений Django (требует psycopg[pool]). Пул несовместим с
+# постоянными соединениями, поэтому при нём CONN_MAX_AGE всегда равен 0.
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", "60"))
+DB_CONN_HEALTH_CHECKS = os.environ.get("DB_CONN_HEALTH_CHECKS") == "1"
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME", "alpha_store"),
+            "USER": os.environ.get("DB_USER", "postgres"),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+            "OPTIONS": {},
+        }
     }
+    if os.environ.get("DB_POOL") == "1":
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+            "OPTIONS": {
+                # Транзакции только для чтения не блокируют запись.
+                # Изменяющие транзакции открываются через
+                # core.db.write_atomic и сразу берут блокировку на запись,
+                # иначе при её повышении busy_timeout не помогает.
+                "transaction_mode": os.environ.get(
+                    "DB_SQLITE_TRANSACTION_MODE", "DEFERRED"
+                ),
+            },
+            # Тестовая БД в файле, а не в памяти: в разделяемой БД в памяти
+            # одновременные транзакции из разных потоков получают ошибку
+            # блокировки таблицы вместо ожидания busy_timeout.
+            "TEST": {
+                "NAME": os.environ.get(
+                    "DB_TEST_NAME", BASE_DIR / "test_db.sqlite3"
+                )
+            },
+        }
+    }
+
+# Реплики только для чтения каталога: пути к файлам SQLite либо хосты
+# PostgreSQL вида host[:port] через запятую. Реплики получают алиасы
+# replica_1, replica_2 и т.д., в тестовой БД они зеркалируют default.
+REPLICA_DATABASES = []
+for number, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    if DB_ENGINE == "postgresql":
+        host, _, port = replica.strip().partition(":")
+        DATABASES[alias]["HOST"] = host
+        DATABASES[alias]["PORT"] = port or DATABASES["default"]["PORT"]
+    else:
+        DATABASES[alias]["NAME"] = replica.strip()
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ["core.db.ReplicaRouter"]
+
+# Время, в течение которого клиент после успешного изменяющего запроса
+# читает каталог с основной БД.
+REPLICA_PIN_SECONDS = int(os.environ.get("DB_REPLICA_PIN_SECONDS", "5"))
+
+# PRAGMA, выполняемые при открытии каждого соединения SQLite
+# (core.db.configure_sqlite_connection).
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("DB_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("DB_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("DB_SQLITE_BUSY_TIMEOUT", "5000")),
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -88,14 +183,51 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Файловый кэш общий для всех процессов сервера, поэтому смена версии
+    # каталога в одном процессе видна остальным. Каталог кэша находится
+    # вне дерева исходников: по умолчанию во временной папке системы.
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "CATALOG_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "alpha_store", "catalog"),
+        ),
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+CATALOG_CACHE_ALIAS = "catalog"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    # Рендерер и парсер на orjson (pip install "alpha-store[fast-json]"),
+    # без него используются стандартные JSONRenderer и JSONParser.
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+TOKEN_AUTH_CACHE = {
+    "MAX_SIZE": 1024,
+    "TIMEOUT": 30,
+    "CACHE_ALIAS": None,
 }
 
 SWAGGER_SETTINGS = {
@@ -107,3 +239,24 @@ SWAGGER_SETTINGS = {
         }
     }
 }
+
+SEARCH_BACKEND = None
+
+IMAGE_SOURCE_MAX_PIXELS = 50_000_000
+
+METRICS_QUERY_BUDGET = 20
+
+# Асинхронные представления для чтения каталога и корзины. Включаются
+# по умолчанию в alpha_store/asgi.py.
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS") == "1"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.middleware": {"handlers": ["console"], "level": "WARNING"},
+    },
+}
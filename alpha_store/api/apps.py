@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from api import signals  # noqa: F401
+        from core.metrics import (
+            instrument_serializers,
+            track_connection_queries,
+        )
+
+        instrument_serializers()
+        connection_created.connect(track_connection_queries)
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from copy import copy
+from hashlib import sha256
+from threading import Lock
+from time import monotonic, time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULT_TOKEN_AUTH_CACHE = {
+    "MAX_SIZE": 1024,
+    "TIMEOUT": 30,
+    "CACHE_ALIAS": None,
+}
+
+
+class TokenCache:
+    """
+    Кэш соответствия токена пользователю.
+
+    Записи хранятся в ограниченном LRU-кэше процесса с коротким временем
+    жизни и, при указании CACHE_ALIAS, дополнительно в кэше Django, общем
+    для всех процессов. Время жизни ограничивает период, в течение которого
+    другие процессы могут использовать уже удалённый токен. Ключи общего
+    кэша содержат версию, поэтому clear сбрасывает записи всех процессов
+    сменой версии.
+    """
+
+    key_prefix = "auth_token"
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def options(self) -> dict:
+        return {
+            **DEFAULT_TOKEN_AUTH_CACHE,
+            **getattr(settings, "TOKEN_AUTH_CACHE", {}),
+        }
+
+    @property
+    def shared_cache(self):
+        alias = self.options["CACHE_ALIAS"]
+        return caches[alias] if alias else None
+
+    def _shared_version(self) -> int:
+        """
+        Версия записей общего кэша. Если версия вытеснена, она создаётся
+        заново из текущего времени, и прежние записи не используются.
+        """
+        key = f"{self.key_prefix}:version"
+        version = self.shared_cache.get(key)
+        if version is None:
+            self.shared_cache.add(key, time_ns(), timeout=None)
+            version = self.shared_cache.get(key)
+        return version
+
+    def _shared_key(self, key: str) -> str:
+        return (
+            f"{self.key_prefix}:{self._shared_version()}:"
+            f"{sha256(key.encode()).hexdigest()}"
+        )
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > monotonic():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+        if self.shared_cache is None:
+            return None
+        value = self.shared_cache.get(self._shared_key(key))
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    def set(self, key: str, value) -> None:
+        self._set_local(key, value)
+        if self.shared_cache is not None:
+            self.shared_cache.set(
+                self._shared_key(key), value, self.options["TIMEOUT"]
+            )
+
+    def _set_local(self, key: str, value) -> None:
+        max_size = self.options["MAX_SIZE"]
+        if not max_size:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + self.options["TIMEOUT"], value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._shared_key(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.shared_cache is not None:
+            self.shared_cache.set(
+                f"{self.key_prefix}:version", time_ns(), timeout=None
+            )
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшированием пользователя.
+
+    Заменяет TokenAuthentication в настройке DEFAULT_AUTHENTICATION_CLASSES
+    и избавляет от запроса Token JOIN User на каждый запрос: попадание в
+    кэш не обращается к БД. Параметры кэша задаются настройкой
+    TOKEN_AUTH_CACHE. Каждый запрос получает собственную копию объекта
+    пользователя.
+
+    Записи удаляются сигналами при удалении токена и при смене is_active
+    либо пароля пользователя. QuerySet.update сигналов не отправляет,
+    поэтому код, изменяющий так is_active или пароль, должен вызвать
+    token_cache.clear(); локальные записи других процессов истекают через
+    TIMEOUT.
+    """
+
+    def authenticate_credentials(self, key):
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+        user, token = credentials
+        return copy(user), token
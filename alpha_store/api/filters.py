@@ -0,0 +1,97 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from core.constants import ErrorMessages as Em
+from store.search import get_search_backend
+from store.search.backends import RANK_FIELD
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Фильтрация продуктов по категории, подкатегории и диапазону цен.
+
+    Параметры запроса `category`, `subcategory`, `price_min` и `price_max`
+    принимают целые неотрицательные числа из цифр ASCII: str.isdigit
+    пропускает и такие символы, как «²», которые не разбирает int. Фильтры
+    опираются на составные индексы модели Product.
+    """
+
+    lookups = {
+        "category": "category",
+        "subcategory": "subcategory",
+        "price_min": "price__gte",
+        "price_max": "price__lte",
+    }
+
+    def get_filters(self, query_params) -> dict[str, int]:
+        filters = dict()
+        for param, lookup in self.lookups.items():
+            value = query_params.get(param)
+            if value in (None, ""):
+                continue
+            if not (value.isascii() and value.isdigit()):
+                raise ValidationError({param: Em.INVALID_NON_NEGATIVE_INTEGER})
+            filters[lookup] = int(value)
+        return filters
+
+    def filter_queryset(self, request, queryset, view):
+        return queryset.filter(**self.get_filters(request.query_params))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "integer", "minimum": 0},
+            }
+            for param in self.lookups
+        ]
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск продуктов по параметру `search`.
+
+    Поиск выполняется по названию продукта, его категории и подкатегории
+    через поисковый бэкенд проекта.
+    """
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        return get_search_backend().search(queryset, query)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+class CatalogOrderingFilter(OrderingFilter):
+    """
+    Сортировка каталога с детерминированным порядком.
+
+    К запрошенной сортировке добавляется pk, чтобы объекты с одинаковыми
+    значениями полей не меняли порядок между страницами. Результаты
+    поиска без явной сортировки упорядочиваются по релевантности.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if (
+            RANK_FIELD in queryset.query.annotations
+            and not request.query_params.get(self.ordering_param)
+        ):
+            return (f"-{RANK_FIELD}", "pk")
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if "pk" not in ordering and "-pk" not in ordering:
+            ordering += ("pk",)
+        return ordering
@@ -0,0 +1,127 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+
+class AsyncGenericAPIView(GenericAPIView):
+    """
+    Базовое асинхронное представление DRF для работы под ASGI.
+
+    Обработчики HTTP-методов объявляются корутинами и обращаются к БД через
+    асинхронный ORM Django. В поток через sync_to_async выносится только
+    аутентификация, которая может обращаться к БД. Проверки прав,
+    сериализация и рендеринг ответа выполняются в цикле событий, а
+    обработчику Django возвращается уже отрендеренный HttpResponse.
+
+    Состояние, необходимое get_etag, get_cache_key и т.п., загружается
+    асинхронно в ainitial до вызова обработчика.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.perform_authentication)(request)
+            self.initial(request, *args, **kwargs)
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        self.response = self.render_response(response)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs) -> None:
+        """
+        Асинхронная подготовка после проверок доступа DRF.
+        """
+
+    @staticmethod
+    def render_response(response):
+        """
+        Отрендерить ответ DRF в цикле событий.
+
+        Иначе обработчик Django отрендерил бы его отдельно в потоке через
+        sync_to_async.
+        """
+        if not isinstance(response, Response):
+            return response
+        response.render()
+        return HttpResponse(
+            response.content,
+            status=response.status_code,
+            headers=response.headers,
+        )
+
+    async def aget_object(self):
+        """
+        Асинхронный вариант get_object.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = await aget_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        """
+        Асинхронный вариант paginate_queryset. Класс пагинации должен
+        реализовывать apaginate_queryset.
+        """
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+
+class AsyncListModelMixin:
+    """
+    Асинхронный вариант ListModelMixin.
+    """
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(
+            [obj async for obj in queryset.aiterator()], many=True
+        )
+        return Response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    """
+    Асинхронный вариант RetrieveModelMixin.
+    """
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
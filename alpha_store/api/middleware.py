@@ -0,0 +1,170 @@
+import logging
+from hashlib import sha256
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from core.cache import get_cache
+from core.db import use_primary
+from core.metrics import collect_request_metrics, registry
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware для учёта стоимости запросов.
+
+    Для каждого запроса считаются количество и время запросов к БД, время
+    работы сериализаторов и общее время обработки. Показатели добавляются
+    в заголовок Server-Timing ответа и в гистограммы процесса с меткой
+    вида ProductViewSet.cart. Если количество запросов к БД превышает
+    METRICS_QUERY_BUDGET, в лог пишется предупреждение.
+
+    Middleware поддерживает и синхронный, и асинхронный режим, чтобы под
+    ASGI не переводить обработку запроса в поток.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = perf_counter()
+        with collect_request_metrics() as metrics:
+            response = self.get_response(request)
+        return self.observe(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        with collect_request_metrics() as metrics:
+            response = await self.get_response(request)
+        return self.observe(request, response, metrics, start)
+
+    def observe(self, request, response, metrics, start):
+        """
+        Учесть показатели завершённого запроса и добавить Server-Timing.
+        """
+        total = perf_counter() - start
+        view = getattr(request, "metrics_view", "unresolved")
+        registry.observe(view, request.method, metrics, total)
+        response.headers["Server-Timing"] = ", ".join(
+            (
+                f'db;dur={metrics.db_time * 1000:.1f};desc="'
+                f'{metrics.queries} queries"',
+                f"serializer;dur={metrics.serializer_time * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            )
+        )
+        budget = getattr(settings, "METRICS_QUERY_BUDGET", None)
+        if budget is not None and metrics.queries > budget:
+            logger.warning(
+                "%s %s (%s) выполнил %d запросов к БД при бюджете %d.",
+                request.method,
+                request.path,
+                view,
+                metrics.queries,
+                budget,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Запомнить представление и действие DRF, обрабатывающие запрос.
+        """
+        view_class = getattr(view_func, "cls", None)
+        if view_class is None:
+            request.metrics_view = (
+                f"{view_func.__module__}.{view_func.__qualname__}"
+            )
+            return None
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        request.metrics_view = f"{view_class.__name__}.{action}"
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Middleware, обеспечивающий чтение своих записей при работе с репликами.
+
+    Запросы с изменяющими методами целиком выполняются на основной БД.
+    После успешного изменяющего запроса (например, изменения корзины)
+    клиент, определяемый по заголовку Authorization либо cookie сессии,
+    закрепляется за основной БД на REPLICA_PIN_SECONDS секунд, чтобы его
+    следующие запросы не читали отстающую реплику. Отметки хранятся в
+    общем для процессов кэше get_cache(). Если реплики не настроены,
+    middleware отключается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REPLICA_DATABASES", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.get_pin_key(request)
+        if request.method not in SAFE_METHODS or (
+            key is not None and get_cache().get(key) is not None
+        ):
+            with use_primary():
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        if self.should_pin(request, response, key):
+            get_cache().set(key, 1, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        key = self.get_pin_key(request)
+        if request.method not in SAFE_METHODS or (
+            key is not None and await get_cache().aget(key) is not None
+        ):
+            with use_primary():
+                response = await self.get_response(request)
+        else:
+            response = await self.get_response(request)
+        if self.should_pin(request, response, key):
+            await get_cache().aset(
+                key, 1, timeout=settings.REPLICA_PIN_SECONDS
+            )
+        return response
+
+    @staticmethod
+    def get_pin_key(request) -> str | None:
+        """
+        Получить ключ отметки клиента или None для анонимного клиента.
+        """
+        identity = request.headers.get("Authorization") or request.COOKIES.get(
+            settings.SESSION_COOKIE_NAME
+        )
+        if not identity:
+            return None
+        return f"replica_pin:{sha256(identity.encode()).hexdigest()}"
+
+    @staticmethod
+    def should_pin(request, response, key: str | None) -> bool:
+        """
+        Нужно ли закрепить клиента за основной БД после ответа.
+        """
+        return (
+            key is not None
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        )
@@ -0,0 +1,245 @@
+from calendar import timegm
+from datetime import datetime, timezone
+from functools import cached_property
+from hashlib import md5
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.cache import aget_version, cache_stats, get_cache, get_version
+from core.db import use_primary
+
+
+class NamespaceVersionMixin:
+    """
+    Миксин для получения версии пространства имён кэша.
+
+    Версия запрашивается один раз за запрос и до обращения к БД.
+    """
+
+    cache_namespace: str = None
+
+    @cached_property
+    def namespace_version(self) -> int:
+        return get_version(self.cache_namespace)
+
+    async def aload_namespace_version(self) -> None:
+        """
+        Заранее получить версию пространства имён в асинхронном
+        представлении, чтобы namespace_version не обращался к кэшу
+        синхронно.
+        """
+        self.namespace_version = await aget_version(self.cache_namespace)
+
+
+class VersionedCacheMixin(NamespaceVersionMixin):
+    """
+    Миксин для кэширования ответов вьюсета по версии пространства имён.
+
+    Ключ кэша содержит версию пространства имён, которая меняется при
+    любом изменении данных, поэтому записи не устаревают и не требуют
+    подбора времени жизни. Кэшируются только успешные ответы на действия
+    из cached_actions.
+
+    При промахе ответ строится по основной БД: реплика может отставать
+    от уже сменённой версии, и её данные остались бы в кэше под новой
+    версией до следующего изменения.
+    """
+
+    cached_actions: tuple[str, ...] = ("list", "retrieve")
+
+    def get_cache_key(self, request) -> str:
+        digest = md5(request.build_absolute_uri().encode()).hexdigest()
+        return f"{self.cache_namespace}:{self.namespace_version}:{digest}"
+
+    def dispatch_cached(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            cache_stats.hit(self.cache_namespace)
+            return Response(data, status=status.HTTP_200_OK)
+        cache_stats.miss(self.cache_namespace)
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
+
+    async def adispatch_cached(self, handler, request, *args, **kwargs):
+        """
+        Асинхронный вариант dispatch_cached для корутины handler.
+        """
+        key = self.get_cache_key(request)
+        cache = get_cache()
+        data = await cache.aget(key)
+        if data is not None:
+            cache_stats.hit(self.cache_namespace)
+            return Response(data, status=status.HTTP_200_OK)
+        cache_stats.miss(self.cache_namespace)
+        with use_primary():
+            response = await handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            await cache.aset(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if "list" not in self.cached_actions:
+            return super().list(request, *args, **kwargs)
+        return self.dispatch_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.cached_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.dispatch_cached(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Миксин для поддержки условных GET-запросов (ETag / Last-Modified).
+
+    Если заголовки If-None-Match либо If-Modified-Since запроса совпадают
+    с текущим состоянием ресурса, возвращается ответ 304 без обращения
+    к сериализаторам. Состояние ресурса определяется дешёвыми методами
+    get_etag и get_last_modified.
+    """
+
+    conditional_actions: tuple[str, ...] = ("list", "retrieve")
+
+    def get_etag(self, request) -> str | None:
+        return None
+
+    def get_last_modified(self, request) -> datetime | None:
+        return None
+
+    def get_conditional_validators(
+        self, request
+    ) -> tuple[str | None, int | None]:
+        """
+        Получить ETag и Last-Modified ресурса в виде временной метки.
+        """
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+        timestamp = (
+            timegm(last_modified.utctimetuple())
+            if last_modified is not None
+            else None
+        )
+        return etag, timestamp
+
+    @staticmethod
+    def set_conditional_headers(response, etag, timestamp):
+        if response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            if etag is not None:
+                response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def dispatch_conditional(self, handler, request, *args, **kwargs):
+        etag, timestamp = self.get_conditional_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, timestamp)
+
+    async def adispatch_conditional(self, handler, request, *args, **kwargs):
+        """
+        Асинхронный вариант dispatch_conditional для корутины handler.
+
+        Состояние ресурса должно быть загружено заранее, чтобы get_etag и
+        get_last_modified не обращались к БД и кэшу синхронно.
+        """
+        etag, timestamp = self.get_conditional_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self.set_conditional_headers(response, etag, timestamp)
+
+    def list(self, request, *args, **kwargs):
+        if "list" not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self.dispatch_conditional(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self.dispatch_conditional(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class VersionedConditionalGetMixin(ConditionalGetMixin, NamespaceVersionMixin):
+    """
+    Миксин для условных GET-запросов по версии пространства имён кэша.
+
+    Версия меняется при любом изменении данных и является временем этого
+    изменения, поэтому служит ETag списков и объектов, а также
+    Last-Modified списков. Last-Modified объекта — наибольшая из дат
+    изменения modified_fields объекта и связанных с ним объектов. Если
+    объекта нет, условия запроса не проверяются и обработчик возвращает 404.
+    """
+
+    modified_fields: tuple[str, ...] = ("updated_at",)
+
+    @property
+    def is_object_request(self) -> bool:
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_modified_queryset(self):
+        """
+        QuerySet дат изменения запрашиваемого объекта и связанных объектов.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.model.objects.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self.modified_fields)
+
+    @staticmethod
+    def latest_modified(rows) -> datetime | None:
+        return max(
+            (value for row in rows for value in row if value is not None),
+            default=None,
+        )
+
+    @cached_property
+    def object_modified_at(self) -> datetime | None:
+        try:
+            return self.latest_modified(self.get_modified_queryset())
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    async def aload_object_modified_at(self) -> None:
+        """
+        Заранее получить дату изменения объекта в асинхронном
+        представлении.
+        """
+        try:
+            rows = [row async for row in self.get_modified_queryset()]
+        except (TypeError, ValueError, ValidationError):
+            rows = ()
+        self.object_modified_at = self.latest_modified(rows)
+
+    def get_etag(self, request):
+        if self.is_object_request and self.object_modified_at is None:
+            return None
+        return quote_etag(f"{self.cache_namespace}-{self.namespace_version}")
+
+    def get_last_modified(self, request):
+        if self.is_object_request:
+            return self.object_modified_at
+        return datetime.fromtimestamp(
+            self.namespace_version / 10**9, tz=timezone.utc
+        )
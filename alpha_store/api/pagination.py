@@ -0,0 +1,122 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from core.constants import NumericalValues as Nv
+
+
+class AsyncPageNumberPaginationMixin:
+    """
+    Миксин асинхронной постраничной пагинации для AsyncGenericAPIView.
+
+    Повторяет PageNumberPagination.paginate_queryset, но количество
+    объектов считается через acount, а страница читается через aiterator.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        self.page.object_list = [
+            obj
+            async for obj in self.page.object_list.aiterator(
+                chunk_size=page_size
+            )
+        ]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page.object_list
+
+
+class AsyncPageNumberPagination(
+    AsyncPageNumberPaginationMixin, PageNumberPagination
+):
+    """
+    Постраничная пагинация по умолчанию с поддержкой асинхронных
+    представлений.
+    """
+
+
+class CatalogCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация для каталога.
+
+    Страница выбирается условием по индексируемым полям (name, pk) вместо
+    OFFSET, а общее количество объектов не подсчитывается, поэтому время
+    ответа не зависит от глубины страницы.
+    """
+
+    ordering = ("name", "pk")
+    page_size_query_param = "page_size"
+    max_page_size = Nv.PAGE_MAX_SIZE
+
+
+class CatalogPagination(AsyncPageNumberPaginationMixin, PageNumberPagination):
+    """
+    Пагинация для каталога с выбором режима на уровне запроса.
+
+    По умолчанию используется постраничная пагинация. Курсорная пагинация
+    включается параметром `?pagination=cursor` либо передачей курсора,
+    полученного в ссылках next/previous. Размер страницы задаётся
+    параметром `page_size`, но не больше PAGE_MAX_SIZE.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = Nv.PAGE_MAX_SIZE
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    cursor_pagination_class = CatalogCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request) -> bool:
+        cursor_paginator = self.cursor_pagination_class()
+        if (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or cursor_paginator.cursor_query_param in request.query_params
+        ):
+            self.cursor_paginator = cursor_paginator
+            return True
+        return False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Асинхронная пагинация каталога.
+
+        Курсорная пагинация DRF не имеет асинхронного варианта, поэтому
+        в этом режиме страница читается в потоке через sync_to_async.
+        """
+        if self.use_cursor(request):
+            return await sync_to_async(
+                self.cursor_paginator.paginate_queryset
+            )(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,127 @@
+import csv
+import json
+from typing import Iterable, Iterator
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с откатом на стандартный JSONRenderer.
+
+    При настройках DRF по умолчанию (UNICODE_JSON и COMPACT_JSON) вывод
+    совпадает с JSONRenderer байт в байт: словари и списки сериализаторов
+    orjson обходит без промежуточных преобразований, а даты, Decimal,
+    ленивые строки и прочие типы передаются кодировщику DRF, чтобы их
+    формат не изменился. Если orjson не установлен, запрошен вывод с
+    отступами (например, Browsable API) либо настройки DRF требуют
+    экранирования, используется JSONRenderer.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        try:
+            content = orjson.dumps(
+                data, default=self.encoder_class().default, option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # Например, словари с нестроковыми ключами.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк U+2028 и U+2029
+        # для JSONP. Общий префикс их UTF-8 кодов ищется одним проходом.
+        if b"\xe2\x80" in content:
+            content = content.replace("\u2028".encode(), b"\\u2028").replace(
+                "\u2029".encode(), b"\\u2029"
+            )
+        return content
+
+
+class RowsRenderer(BaseRenderer):
+    """
+    Базовый рендерер для построчных форматов выгрузки.
+
+    Помимо render, который используется DRF для обычных ответов (например,
+    ошибок), рендерер умеет построчно преобразовывать поток строк для
+    StreamingHttpResponse, не собирая весь документ в памяти.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fields = tuple(rows[0]) if rows else ()
+        return b"".join(self.render_rows(rows, fields))
+
+    def render_rows(
+        self, rows: Iterable[dict], fields: tuple[str, ...]
+    ) -> Iterator[bytes]:
+        """
+        Построчно преобразовать строки выгрузки.
+        :param rows: Строки выгрузки в виде словарей.
+        :param fields: Поля строк в порядке вывода.
+        :return: Части документа в кодировке charset.
+        """
+        raise NotImplementedError
+
+
+class JSONLinesRenderer(RowsRenderer):
+    """
+    Рендерер JSON Lines: по одному JSON-объекту на строку.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "jsonl"
+
+    def render_rows(self, rows, fields):
+        if orjson is not None:
+            for row in rows:
+                yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+            return
+        for row in rows:
+            yield (
+                json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+                + "\n"
+            ).encode(self.charset)
+
+
+class _LineBuffer:
+    """
+    Файлоподобный объект, возвращающий записанную строку CSV.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class CSVRenderer(RowsRenderer):
+    """
+    Рендерер CSV с заголовком из названий полей.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render_rows(self, rows, fields):
+        writer = csv.DictWriter(
+            _LineBuffer(), fieldnames=fields, extrasaction="ignore"
+        )
+        yield writer.writeheader().encode(self.charset)
+        for row in rows:
+            yield writer.writerow(row).encode(self.charset)
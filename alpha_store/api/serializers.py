@@ -1,7 +1,13 @@
+from django.core.files.storage import FileSystemStorage
+from django.db.models import QuerySet
+from django.utils.encoding import filepath_to_uri
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 from rest_framework.serializers import Serializer
 
+from core.constants import CartOperations, NumericalValues as Nv
+from core.services import get_request_shopping_cart
+
 from store.models import (
     Product,
     ShoppingCart,
@@ -19,6 +25,27 @@ class QuantitySerializer(Serializer):
     quantity: int = serializers.IntegerField(min_value=1)
 
 
+class ShoppingCartBatchItemSerializer(Serializer):
+    """
+    Сериализатор для одной операции пакетного изменения корзины.
+
+    Операция add добавляет к количеству продукта в корзине, update
+    устанавливает количество (создавая элемент корзины при необходимости),
+    delete удаляет продукт из корзины.
+    """
+
+    product: int = serializers.IntegerField(min_value=1)
+    quantity: int = serializers.IntegerField(
+        min_value=Nv.ITEM_MIN_QUANTITY_IN_CART,
+        max_value=Nv.ITEM_MAX_QUANTITY_IN_CART,
+        default=Nv.ITEM_MIN_QUANTITY_IN_CART,
+    )
+    op: str = serializers.ChoiceField(
+        choices=tuple(CartOperations),
+        default=CartOperations.ADD,
+    )
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели Product.
@@ -34,7 +61,8 @@ class ProductListSerializer(serializers.ModelSerializer):
     Сериализатор для модели Product.
 
     Дополнительно реализовано поле images, содержащее ссылки на изображения
-    продуктов в трёх форматах.
+    продуктов в трёх форматах. Ссылки берутся из сохранённого в продукте
+    поля image_urls без обращения к хранилищу файлов.
     """
 
     images = serializers.SerializerMethodField("get_images")
@@ -53,13 +81,91 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     @swagger_serializer_method(serializer_or_field=serializers.DictField)
     def get_images(self, obj) -> dict[str, str | None]:
-        images = dict()
-        for field in ("thumbnail", "medium_image", "large_image"):
-            try:
-                images[field] = getattr(obj, field).url
-            except ValueError:
-                images[field] = None
-        return images
+        return obj.image_urls or obj.build_image_urls()
+
+
+class ProductListValuesSerializer(serializers.BaseSerializer):
+    """
+    Лёгкий сериализатор только для чтения с тем же представлением, что и
+    ProductListSerializer.
+
+    Принимает словари, полученные из QuerySet через select_values, и
+    строит представление продукта напрямую, без создания моделей и
+    обхода полей DRF. Если ссылки на изображения не сохранены в
+    image_urls, они строятся из имён файлов: для файловых хранилищ — по
+    заранее вычисленному префиксу ссылок, для остальных — через
+    storage.url.
+    """
+
+    VALUES_FIELDS = (
+        "pk",
+        "name",
+        "slug",
+        "price",
+        "category",
+        "subcategory",
+        "image_urls",
+        *Product.IMAGE_FIELDS,
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_storages = {
+            field: Product._meta.get_field(field).storage
+            for field in Product.IMAGE_FIELDS
+        }
+        self.image_url_prefixes = {
+            field: self.get_url_prefix(storage)
+            for field, storage in self.image_storages.items()
+        }
+
+    @classmethod
+    def select_values(cls, queryset: QuerySet) -> QuerySet:
+        """
+        Получить из QuerySet продуктов словари с нужными столбцами.
+
+        Аннотации QuerySet (например, релевантность поиска) сохраняются,
+        чтобы по ним могла строиться курсорная пагинация.
+        """
+        return queryset.values(*cls.VALUES_FIELDS, *queryset.query.annotations)
+
+    @staticmethod
+    def get_url_prefix(storage) -> str | None:
+        """
+        Получить префикс ссылок на файлы хранилища либо None, если ссылки
+        нельзя строить простым добавлением имени файла.
+        """
+        if not isinstance(storage, FileSystemStorage):
+            return None
+        base_url = storage.base_url
+        return base_url if not base_url or base_url.endswith("/") else None
+
+    def build_image_urls(self, values: dict) -> dict[str, str | None]:
+        """
+        Получить ссылки на изображения продукта по именам файлов.
+        """
+        urls = dict()
+        for field, prefix in self.image_url_prefixes.items():
+            name = values[field]
+            if not name:
+                urls[field] = None
+            elif prefix is not None:
+                urls[field] = prefix + filepath_to_uri(name).lstrip("/")
+            else:
+                urls[field] = self.image_storages[field].url(name)
+        return urls
+
+    def to_representation(self, instance: dict) -> dict:
+        return {
+            "id": instance["pk"],
+            "name": instance["name"],
+            "slug": instance["slug"],
+            "price": instance["price"],
+            "category": instance["category"],
+            "subcategory": instance["subcategory"],
+            "images": instance["image_urls"]
+            or self.build_image_urls(instance),
+        }
 
 
 class SubCategorySerializer(serializers.ModelSerializer):
@@ -94,6 +200,35 @@ class CategorySerializer(serializers.ModelSerializer):
         )
 
 
+class SubCategoryTreeSerializer(SubCategorySerializer):
+    """
+    Сериализатор подкатегории для дерева категорий.
+
+    Дополнительно реализовано поле products_count — количество продуктов
+    в подкатегории.
+    """
+
+    products_count = serializers.IntegerField(read_only=True)
+
+    class Meta(SubCategorySerializer.Meta):
+        fields = SubCategorySerializer.Meta.fields + ("products_count",)
+
+
+class CategoryTreeSerializer(CategorySerializer):
+    """
+    Сериализатор категории для дерева категорий.
+
+    Дополнительно реализовано поле products_count — количество продуктов
+    в категории, а подкатегории содержат количество своих продуктов.
+    """
+
+    subcategories = SubCategoryTreeSerializer(many=True, read_only=True)
+    products_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ("products_count",)
+
+
 class ShoppingCartItemSerializer(serializers.ModelSerializer):
     """
     Сериализатор для продукта, находящегося в продуктовой корзине.
@@ -120,17 +255,10 @@ class ShoppingCartItemSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         product = validated_data.pop("product")
         quantity = validated_data.pop("quantity")
-        cart = ShoppingCart.objects.get(user=self.context["request"].user)
-        validated_data["cart"] = cart
-        try:
-            item = cart.cart_items.get(product=product.pk)
-            item.quantity += quantity
-            item.save()
-        except ShoppingCartItem.DoesNotExist:
-            item = ShoppingCartItem.objects.create(
-                cart=cart, product=product, quantity=quantity
-            )
-        return item
+        cart = get_request_shopping_cart(self.context["request"])
+        return ShoppingCartItem.objects.add_product(
+            cart=cart, product=product, quantity=quantity
+        )
 
 
 class ShoppingCartGetSerializer(serializers.ModelSerializer):
@@ -141,31 +269,25 @@ class ShoppingCartGetSerializer(serializers.ModelSerializer):
     списка продуктов в корзине), amount_of_products (отображает общее
     количество продуктов в корзине пользователя), и total_price (это поле
     рассчитывает стоимость всех продуктов в корзине, учитывая их количество).
+
+    Итоги amount_of_products и total_price хранятся в самой корзине и
+    обновляются при каждом изменении её состава, а products строится по
+    заранее загруженным (prefetch) элементам корзины, поэтому сериализатор
+    не делает дополнительных запросов к БД.
     """
 
     products = serializers.SerializerMethodField("get_products")
-    amount_of_products = serializers.SerializerMethodField(
-        "get_amount_of_products"
+    amount_of_products = serializers.IntegerField(
+        source="items_count", read_only=True
     )
-    total_price = serializers.SerializerMethodField("get_total_price")
+    total_price = serializers.IntegerField(read_only=True)
 
     @swagger_serializer_method(serializer_or_field=ShoppingCartItemSerializer)
     def get_products(self, obj):
-        instance = ShoppingCart.objects.get(user=self.context["request"].user)
         return ShoppingCartItemSerializer(
-            instance.cart_items.all(), context=self.context, many=True
+            obj.cart_items.all(), context=self.context, many=True
         ).data
 
-    @swagger_serializer_method(serializer_or_field=serializers.IntegerField)
-    def get_amount_of_products(self, obj) -> int:
-        return obj.cart_items.count()
-
-    @swagger_serializer_method(serializer_or_field=serializers.IntegerField)
-    def get_total_price(self, obj) -> int:
-        return sum(
-            item.product.price * item.quantity for item in obj.cart_items.all()
-        )
-
     class Meta:
         model = ShoppingCart
         fields = ("products", "amount_of_products", "total_price")
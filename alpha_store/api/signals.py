@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Удалить токен из кэша аутентификации, в том числе при выходе
+    пользователя через djoser.
+    """
+    token_cache.invalidate(instance.key)
+
+
+@receiver(pre_save, sender=User)
+def remember_user_credentials(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """
+    Запомнить is_active и пароль пользователя до сохранения.
+
+    Если сохраняются только другие поля (например, last_login при входе),
+    запрос к БД не выполняется.
+    """
+    if (
+        raw
+        or not instance.pk
+        or (
+            update_fields is not None
+            and not {"is_active", "password"} & set(update_fields)
+        )
+    ):
+        instance._saved_credentials = None
+        return
+    instance._saved_credentials = (
+        User.objects.filter(pk=instance.pk)
+        .values_list("is_active", "password")
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, raw=False, **kwargs):
+    """
+    Удалить токены пользователя из кэша аутентификации при смене is_active
+    либо пароля, например при деактивации.
+    """
+    saved = getattr(instance, "_saved_credentials", None)
+    if created or raw or saved is None:
+        return
+    if saved == (instance.is_active, instance.password):
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        "key", flat=True
+    ):
+        token_cache.invalidate(key)
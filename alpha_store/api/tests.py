@@ -0,0 +1,1125 @@
+import contextlib
+import csv
+import gzip
+import json
+import os
+import runpy
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, date, datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+from threading import Barrier, Event
+from unittest import mock
+from uuid import UUID
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, resolve
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from api.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    token_cache,
+)
+from api import urls as api_urls
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import (
+    ProductListSerializer,
+    ProductListValuesSerializer,
+)
+from api.urls import async_read_urlpatterns
+from api.views import AsyncProductListView
+from core.cache import (
+    CATALOG_NAMESPACE,
+    CATEGORY_TREE_NAMESPACE,
+    cache_stats,
+    get_version,
+)
+from core.constants import ErrorMessages as Em, NumericalValues as Nv
+from core.db import write_atomic
+from core.services import EXPORT_FIELDS, _buffered
+from store.models import (
+    Category,
+    Product,
+    ShoppingCart,
+    ShoppingCartItem,
+    SubCategory,
+    User,
+)
+from store.search import get_search_backend
+from store.search.backends import RANK_FIELD
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-tests",
+    },
+}
+
+
+def create_catalog(size: int) -> list[int]:
+    """
+    Создать size категорий с подкатегориями и вдвое больше продуктов.
+
+    :param size: Количество категорий.
+    :return: Идентификаторы продуктов по возрастанию.
+    """
+    categories = Category.objects.bulk_create(
+        Category(name=f"Категория {index}", slug=f"test-c{index}")
+        for index in range(size)
+    )
+    subcategories = SubCategory.objects.bulk_create(
+        SubCategory(
+            name=f"Подкатегория {index}",
+            slug=f"test-s{index}",
+            category=category,
+        )
+        for index, category in enumerate(categories)
+    )
+    Product.objects.bulk_create(
+        Product(
+            name=f"Продукт {index}",
+            slug=f"test-p{index}",
+            price=index + 1,
+            category_id=subcategory.category_id,
+            subcategory=subcategory,
+        )
+        for index, subcategory in enumerate(subcategories * 2)
+    )
+    return list(Product.objects.order_by("pk").values_list("pk", flat=True))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CatalogTestCase(APITestCase):
+    """
+    Базовый класс тестов API с каталогом и авторизованным пользователем.
+
+    Кэши заменяются на кэши в памяти процесса и очищаются перед каждым
+    тестом, поэтому запросы выполняются с холодными кэшами.
+    """
+
+    catalog_size = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product_ids = create_catalog(cls.catalog_size)
+        cls.user = User.objects.create(username="api-tests")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.clear_caches()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    @staticmethod
+    def clear_caches() -> None:
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        token_cache.clear()
+
+    def fill_cart(self, size: int) -> ShoppingCart:
+        """
+        Заменить состав корзины пользователя на size первых продуктов.
+        """
+        cart, _ = ShoppingCart.objects.get_or_create(user=self.user)
+        ShoppingCartItem.objects.filter(cart=cart).delete()
+        ShoppingCartItem.objects.bulk_create(
+            ShoppingCartItem(cart=cart, product_id=product_id, quantity=1)
+            for product_id in self.product_ids[:size]
+        )
+        ShoppingCart.objects.filter(pk=cart.pk).refresh_totals()
+        return cart
+
+
+class QueryCountTests(CatalogTestCase):
+    """
+    Количество запросов к БД эндпоинтов каталога и корзины.
+
+    Каждый запрос выполняется с холодными кэшами для каждого из sizes —
+    размера страницы либо корзины, — и количество запросов не должно от
+    него зависеть: запрос к БД на каждый объект (N+1) проваливает тест.
+    Изменения корзины учитывают SAVEPOINT и RELEASE SAVEPOINT своей
+    транзакции.
+    """
+
+    catalog_size = 60
+    sizes = (1, 10, 100)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_cart = cls.product_ids[0]
+        cls.not_in_cart = cls.product_ids[-1]
+
+    def assert_num_queries(
+        self,
+        num: int,
+        method: str,
+        path: str,
+        data: dict | None = None,
+        status_code: int = 200,
+    ) -> None:
+        """
+        Проверить количество запросов для каждого из sizes.
+
+        Перед запросом корзина пользователя заполняется size продуктами.
+        :param path: Путь запроса, может содержать {size}.
+        """
+        send = getattr(self.client, method)
+        for size in self.sizes:
+            with self.subTest(size=size):
+                self.fill_cart(size)
+                self.clear_caches()
+                with self.assertNumQueries(num):
+                    response = send(
+                        path.format(size=size), data, format="json"
+                    )
+                self.assertEqual(response.status_code, status_code)
+
+    def test_product_list(self):
+        self.client.credentials()
+        self.assert_num_queries(2, "get", "/api/products/?page_size={size}")
+
+    def test_product_retrieve(self):
+        self.client.credentials()
+        self.assert_num_queries(2, "get", f"/api/products/{self.in_cart}/")
+
+    def test_category_list(self):
+        self.client.credentials()
+        self.assert_num_queries(3, "get", "/api/categories/?page_size={size}")
+
+    def test_category_tree(self):
+        self.client.credentials()
+        self.assert_num_queries(2, "get", "/api/categories/tree/")
+
+    def test_shopping_cart_list(self):
+        self.assert_num_queries(5, "get", "/api/shopping_cart/")
+        (cart,) = self.client.get("/api/shopping_cart/").data["results"]
+        self.assertEqual(len(cart["products"]), max(self.sizes))
+
+    def test_clear_shopping_cart(self):
+        self.assert_num_queries(
+            6, "post", "/api/shopping_cart/clear/", status_code=204
+        )
+
+    def test_add_to_shopping_cart(self):
+        self.assert_num_queries(
+            10,
+            "post",
+            f"/api/products/{self.not_in_cart}/cart/",
+            {"quantity": 1},
+            status_code=201,
+        )
+
+    def test_remove_from_shopping_cart(self):
+        self.assert_num_queries(
+            6, "delete", f"/api/products/{self.in_cart}/cart/", status_code=204
+        )
+
+    def test_change_quantity(self):
+        self.assert_num_queries(
+            8, "patch", f"/api/products/{self.in_cart}/cart/", {"quantity": 2}
+        )
+
+
+class ProductFilterTests(CatalogTestCase):
+    """
+    Фильтрация продуктов и использование индексов фильтрами.
+    """
+
+    def explain(self, queryset) -> str:
+        """
+        План выполнения запроса. В PostgreSQL последовательное сканирование
+        отключается, так как на маленькой таблице оно дешевле индекса.
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_filter(self):
+        product = Product.objects.get(pk=self.product_ids[3])
+        response = self.client.get(
+            "/api/products/",
+            {
+                "category": product.category_id,
+                "subcategory": product.subcategory_id,
+                "price_min": product.price,
+                "price_max": product.price,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [product.pk]
+        )
+
+    def test_invalid_values(self):
+        for value in ("-1", "1.5", "abc", "²", "١"):
+            with self.subTest(value=value):
+                response = self.client.get(
+                    "/api/products/", {"price_min": value}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.data["price_min"],
+                    Em.INVALID_NON_NEGATIVE_INTEGER,
+                )
+
+    def test_category_price_uses_index(self):
+        queryset = Product.objects.filter(
+            category=1, subcategory=1, price__gte=1, price__lte=10
+        )
+        self.assertIn("product_cat_subcat_price_idx", self.explain(queryset))
+
+    def test_category_ordered_by_name_uses_index(self):
+        queryset = Product.objects.filter(category=1).order_by("name")
+        self.assertIn("product_category_name_idx", self.explain(queryset))
+
+
+class ProductSerializerParityTests(CatalogTestCase):
+    """
+    Совпадение представлений ProductListSerializer и
+    ProductListValuesSerializer.
+
+    В каталоге есть продукт с сохранёнными image_urls, продукт со
+    ссылками по именам файлов и продукты без изображений; отдельно
+    проверяются результаты поиска с аннотацией релевантности.
+    """
+
+    catalog_size = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        stored, from_files, *_ = cls.product_ids
+        Product.objects.filter(pk=stored).update(
+            image_urls={
+                "thumbnail": "/media/images/thumbnail/stored.webp",
+                "medium_image": None,
+                "large_image": "/media/images/large/stored.webp",
+            }
+        )
+        Product.objects.filter(pk=from_files).update(
+            thumbnail="images/thumbnail/имя с пробелом.webp",
+            large_image="images/large/from files.webp",
+        )
+        get_search_backend().rebuild()
+
+    def assert_same_representation(self, queryset):
+        expected = ProductListSerializer(queryset, many=True).data
+        actual = ProductListValuesSerializer(
+            ProductListValuesSerializer.select_values(queryset), many=True
+        ).data
+        self.assertEqual(len(actual), len(self.product_ids))
+        self.assertEqual(actual, expected)
+
+    def test_same_representation(self):
+        self.assert_same_representation(Product.objects.order_by("pk"))
+
+    def test_same_representation_of_search_results(self):
+        queryset = get_search_backend().search(
+            Product.objects.all(), "продукт"
+        )
+        self.assertIn(RANK_FIELD, queryset.query.annotations)
+        self.assert_same_representation(
+            queryset.order_by(f"-{RANK_FIELD}", "pk")
+        )
+
+
+class CatalogPaginationTests(CatalogTestCase):
+    """
+    Постраничная и курсорная пагинация каталога.
+    """
+
+    catalog_size = 60
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials()
+
+    def test_page_size_is_capped(self):
+        self.assertGreater(len(self.product_ids), Nv.PAGE_MAX_SIZE)
+        for params in ({}, {"pagination": "cursor"}):
+            with self.subTest(**params):
+                response = self.client.get(
+                    "/api/products/", {**params, "page_size": 1000}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    len(response.data["results"]), Nv.PAGE_MAX_SIZE
+                )
+
+    def test_cursor_pages(self):
+        # Одинаковые названия: порядок между ними задаёт только pk.
+        Product.objects.filter(pk__in=self.product_ids[::3]).update(
+            name="Продукт"
+        )
+        response = self.client.get(
+            "/api/products/", {"pagination": "cursor", "page_size": 7}
+        )
+        self.assertIsNone(response.data["previous"])
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            ids.extend(item["id"] for item in response.data["results"])
+            if response.data["next"] is None:
+                break
+            # Курсор в запросе сам включает курсорную пагинацию.
+            response = self.client.get(
+                response.data["next"].replace("&pagination=cursor", "")
+            )
+        self.assertEqual(
+            ids,
+            list(
+                Product.objects.order_by("name", "pk").values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+
+class ConditionalGetTests(CatalogTestCase):
+    """
+    Условные GET-запросы каталога.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials()
+
+    def test_list_not_modified(self):
+        etag = self.client.get("/api/products/").headers["ETag"]
+        response = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_product_with_current_etag(self):
+        etag = self.client.get("/api/products/").headers["ETag"]
+        for pk in (max(self.product_ids) + 1, "abc"):
+            with self.subTest(pk=pk):
+                response = self.client.get(
+                    f"/api/products/{pk}/", HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_product_last_modified(self):
+        product = Product.objects.select_related(
+            "category", "subcategory"
+        ).get(pk=self.product_ids[0])
+        modified_at = max(
+            product.updated_at,
+            product.category.updated_at,
+            product.subcategory.updated_at,
+        )
+        path = f"/api/products/{product.pk}/"
+        response = self.client.get(path)
+        last_modified = response.headers["Last-Modified"]
+        self.assertEqual(last_modified, http_date(modified_at.timestamp()))
+        response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        Category.objects.filter(pk=product.category_id).update(
+            updated_at=modified_at + timedelta(seconds=1)
+        )
+        response = self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_tree_rename(self):
+        category = Category.objects.get(slug="test-c0")
+        subcategory = SubCategory.objects.get(slug="test-s0")
+        for instance in (category, subcategory):
+            with self.subTest(model=type(instance).__name__):
+                version = get_version(CATEGORY_TREE_NAMESPACE)
+                response = self.client.get("/api/categories/tree/")
+                etag = response.headers["ETag"]
+                instance.name = f"{instance.name} (новое)"
+                with self.captureOnCommitCallbacks(execute=True):
+                    instance.save()
+                self.assertGreater(
+                    get_version(CATEGORY_TREE_NAMESPACE), version
+                )
+                renamed = self.client.get(
+                    "/api/categories/tree/", HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(renamed.status_code, 200)
+                self.assertNotEqual(renamed.headers["ETag"], etag)
+                self.assertNotEqual(renamed.content, response.content)
+                self.assertIn(instance.name, renamed.content.decode())
+
+
+class ProductExportTests(CatalogTestCase):
+    """
+    Потоковая выгрузка каталога продуктов.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials()
+
+    def export(self, **extra) -> tuple[object, bytes]:
+        response = self.client.get("/api/products/export/", **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_jsonl(self):
+        Product.objects.filter(pk=self.product_ids[0]).update(
+            thumbnail="images/thumbnail/from file.webp"
+        )
+        response, content = self.export(data={"format": "jsonl"})
+        self.assertEqual(
+            response.headers["Content-Type"],
+            "application/x-ndjson; charset=utf-8",
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], self.product_ids)
+        self.assertEqual(list(rows[0]), list(EXPORT_FIELDS))
+        self.assertEqual(rows[0]["category"], "test-c0")
+        self.assertEqual(
+            rows[0]["thumbnail"],
+            Product.objects.get(pk=self.product_ids[0]).thumbnail.url,
+        )
+        self.assertIsNone(rows[1]["thumbnail"])
+
+    def test_csv(self):
+        for extra in (
+            dict(data={"format": "csv"}),
+            dict(HTTP_ACCEPT="text/csv"),
+        ):
+            with self.subTest(**extra):
+                response, content = self.export(**extra)
+                self.assertEqual(
+                    response.headers["Content-Type"],
+                    "text/csv; charset=utf-8",
+                )
+                rows = list(csv.reader(content.decode().splitlines()))
+                self.assertEqual(rows[0], list(EXPORT_FIELDS))
+                self.assertEqual(len(rows), len(self.product_ids) + 1)
+
+    def test_unsupported_format(self):
+        response = self.client.get(
+            "/api/products/export/", data={"format": "xml"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_gzip(self):
+        response, content = self.export(
+            data={"format": "jsonl"}, HTTP_ACCEPT_ENCODING="gzip, br"
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        lines = gzip.decompress(content).splitlines()
+        self.assertEqual(len(lines), len(self.product_ids))
+
+    def test_streams_rows_in_blocks(self):
+        self.assertEqual(
+            list(_buffered((b"a", b"bc", b"d", b"e"), 3)),
+            [b"abc", b"de"],
+        )
+        with mock.patch(
+            "core.services._buffered", lambda chunks, size: chunks
+        ):
+            response = self.client.get(
+                "/api/products/export/", data={"format": "jsonl"}
+            )
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), len(self.product_ids))
+
+
+class AsyncURLConf:
+    """
+    Маршруты ASGI-развёртывания с асинхронными представлениями чтения.
+    """
+
+    urlpatterns = [
+        path(
+            "api/",
+            include([*async_read_urlpatterns, *api_urls.urlpatterns]),
+        )
+    ]
+
+
+class AsyncViewTests(CatalogTestCase):
+    """
+    Совпадение ответов асинхронных представлений и синхронных вьюсетов.
+    """
+
+    def get_both(self, path: str, **headers) -> tuple[object, object]:
+        """
+        Выполнить GET-запрос синхронным и асинхронным представлением с
+        холодными кэшами.
+        """
+        self.clear_caches()
+        expected = self.client.get(path, headers=headers)
+        self.clear_caches()
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            response = async_to_sync(self.async_client.get)(
+                path, headers=headers
+            )
+        self.assertEqual(response.status_code, expected.status_code)
+        return expected, response
+
+    def assert_same(self, path: str, **headers) -> dict:
+        expected, response = self.get_both(path, **headers)
+        self.assertEqual(response.json(), expected.json())
+        return response.json()
+
+    def test_resolves_async_views(self):
+        with override_settings(ROOT_URLCONF=AsyncURLConf):
+            match = resolve("/api/products/")
+        self.assertIs(match.func.view_class, AsyncProductListView)
+
+    def test_product_list_pages(self):
+        data = self.assert_same("/api/products/?page=2&page_size=3")
+        self.assertEqual(
+            sorted(data), ["count", "next", "previous", "results"]
+        )
+        self.assertEqual(len(data["results"]), 3)
+
+    def test_product_list_cursor(self):
+        data = self.assert_same("/api/products/?pagination=cursor&page_size=3")
+        self.assertEqual(sorted(data), ["next", "previous", "results"])
+        self.assert_same(data["next"].removeprefix("http://testserver"))
+
+    def test_product_detail(self):
+        self.assert_same(f"/api/products/{self.product_ids[0]}/")
+
+    def test_missing_product(self):
+        data = self.assert_same(f"/api/products/{max(self.product_ids) + 1}/")
+        self.assertEqual(
+            data, {"detail": "No Product matches the given query."}
+        )
+
+    def test_not_modified(self):
+        # Кэши не очищаются, чтобы версия каталога не менялась.
+        for path in (
+            "/api/products/",
+            f"/api/products/{self.product_ids[0]}/",
+        ):
+            with self.subTest(path=path):
+                etag = self.client.get(path).headers["ETag"]
+                with override_settings(ROOT_URLCONF=AsyncURLConf):
+                    response = async_to_sync(self.async_client.get)(
+                        path, headers=dict(if_none_match=etag)
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers["ETag"], etag)
+
+    def test_shopping_cart(self):
+        self.fill_cart(2)
+        self.client.credentials()
+        self.assert_same(
+            "/api/shopping_cart/", authorization=f"Token {self.token.key}"
+        )
+
+    def test_anonymous_shopping_cart(self):
+        self.client.credentials()
+        expected, response = self.get_both("/api/shopping_cart/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), expected.json())
+
+
+class FastJSONTests(CatalogTestCase):
+    """
+    Совпадение FastJSONRenderer и FastJSONParser со стандартными JSON
+    рендерером и парсером DRF, в том числе без orjson.
+    """
+
+    data = {
+        "price": Decimal("1234.50"),
+        "created_at": datetime(2024, 5, 17, 12, 30, 5, 123456, tzinfo=UTC),
+        "date": date(2024, 5, 17),
+        "time": time(8, 15),
+        "duration": timedelta(hours=1, seconds=3),
+        "uuid": UUID(int=1),
+        "name": "Продукт «Ёлка» ☃",
+        "separators": "a\u2028b\u2029c",
+        "lazy": gettext_lazy("Not found."),
+        "nested": [{"quantity": 1, "ratio": 0.5, "empty": None}],
+    }
+
+    def test_renderer_parity(self):
+        # Словарь с нестроковым ключом orjson не принимает, и рендерер
+        # переходит на JSONRenderer.
+        for data in (self.data, {1: "нестроковый ключ"}):
+            expected = JSONRenderer().render(data)
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+            with mock.patch("api.renderers.orjson", None):
+                self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_renderer_uses_orjson(self):
+        expected = JSONRenderer().render(self.data)
+        with mock.patch.object(
+            JSONRenderer, "render", side_effect=AssertionError
+        ):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_parser_parity(self):
+        content = JSONRenderer().render(
+            {"name": "Продукт «Ёлка» ☃", "price": 1.5, "items": [1, None]}
+        )
+        expected = JSONParser().parse(BytesIO(content))
+        self.assertEqual(FastJSONParser().parse(BytesIO(content)), expected)
+        with mock.patch("api.parsers.orjson", None):
+            self.assertEqual(
+                FastJSONParser().parse(BytesIO(content)), expected
+            )
+
+    def test_invalid_json(self):
+        path = f"/api/products/{self.product_ids[0]}/cart/"
+        for module in (None, "api.parsers.orjson"):
+            with self.subTest(orjson=module is None):
+                with (
+                    mock.patch(module, None)
+                    if module
+                    else contextlib.nullcontext()
+                ):
+                    for content in (b"{", b"NaN", b'{"quantity": 1,}'):
+                        response = self.client.post(
+                            path, content, content_type="application/json"
+                        )
+                        self.assertEqual(response.status_code, 400)
+                        self.assertIn(
+                            "JSON parse error", response.json()["detail"]
+                        )
+        self.assertFalse(ShoppingCartItem.objects.exists())
+
+
+class RequestMetricsTests(CatalogTestCase):
+    """
+    Учёт стоимости запросов и выдача показателей.
+    """
+
+    def test_server_timing(self):
+        self.client.credentials()
+        response = self.client.get("/api/products/")
+        self.assertRegex(
+            response.headers["Server-Timing"],
+            r'^db;dur=\d+\.\d;desc="2 queries", '
+            r"serializer;dur=\d+\.\d, total;dur=\d+\.\d$",
+        )
+
+    def test_metrics_for_admins_only(self):
+        self.client.get("/api/products/")
+        response = self.client.get("/api/_metrics/")
+        self.assertEqual(response.status_code, 403)
+        self.client.credentials()
+        response = self.client.get("/api/_metrics/")
+        self.assertEqual(response.status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        token_cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        response = self.client.get("/api/_metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["Content-Type"].startswith("text/plain")
+        )
+        self.assertIn('view="ProductViewSet.list"', response.content.decode())
+
+    def test_query_budget_warning(self):
+        self.client.credentials()
+        with override_settings(METRICS_QUERY_BUDGET=1):
+            with self.assertLogs("api.middleware", "WARNING") as logs:
+                self.client.get("/api/products/")
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("ProductViewSet.list", logs.output[0])
+        self.assertIn("2 запросов к БД при бюджете 1", logs.output[0])
+        self.clear_caches()
+        with override_settings(METRICS_QUERY_BUDGET=2):
+            with self.assertNoLogs("api.middleware", "WARNING"):
+                self.client.get("/api/products/")
+
+
+class CatalogCacheTests(CatalogTestCase):
+    """
+    Кэширование ответов каталога по версии пространства имён.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials()
+
+    def get_stats(self) -> dict[str, int]:
+        return cache_stats.snapshot().get(
+            CATALOG_NAMESPACE, dict(hits=0, misses=0)
+        )
+
+    def assert_stats(self, before: dict, hits: int, misses: int) -> None:
+        after = self.get_stats()
+        self.assertEqual(
+            (
+                after["hits"] - before["hits"],
+                after["misses"] - before["misses"],
+            ),
+            (hits, misses),
+        )
+
+    def test_hit_and_miss_counters(self):
+        before = self.get_stats()
+        first = self.client.get("/api/products/")
+        self.assert_stats(before, hits=0, misses=1)
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/products/")
+        self.assert_stats(before, hits=1, misses=1)
+        self.assertEqual(second.json(), first.json())
+
+    def test_product_save_invalidates_responses(self):
+        product = Product.objects.get(pk=self.product_ids[0])
+        paths = ("/api/products/", f"/api/products/{product.pk}/")
+        for path in paths:
+            self.client.get(path)
+        version = get_version(CATALOG_NAMESPACE)
+
+        product.name = "Переименованный продукт"
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertNotEqual(get_version(CATALOG_NAMESPACE), version)
+        before = self.get_stats()
+        list_response, detail_response = map(self.client.get, paths)
+        self.assert_stats(before, hits=0, misses=2)
+        self.assertIn(
+            product.name,
+            [item["name"] for item in list_response.json()["results"]],
+        )
+        self.assertEqual(detail_response.json()["name"], product.name)
+
+    def test_category_save_invalidates_responses(self):
+        category = Category.objects.order_by("name", "pk").first()
+        path = f"/api/categories/{category.pk}/"
+        self.client.get("/api/categories/")
+        self.client.get(path)
+        version = get_version(CATALOG_NAMESPACE)
+
+        category.name = "Переименованная категория"
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        self.assertNotEqual(get_version(CATALOG_NAMESPACE), version)
+        before = self.get_stats()
+        list_response = self.client.get("/api/categories/")
+        detail_response = self.client.get(path)
+        self.assert_stats(before, hits=0, misses=2)
+        self.assertIn(
+            category.name,
+            [item["name"] for item in list_response.json()["results"]],
+        )
+        self.assertEqual(detail_response.json()["name"], category.name)
+
+
+class TokenAuthenticationTests(CatalogTestCase):
+    """
+    Кэширование пользователя при аутентификации по токену.
+    """
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={"TIMEOUT": 30, "CACHE_ALIAS": "default"}
+    )
+    def test_clear_shared_cache(self):
+        cache = TokenCache()
+        cache.set(self.token.key, "credentials")
+        self.assertEqual(TokenCache().get(self.token.key), "credentials")
+        cache.clear()
+        self.assertIsNone(TokenCache().get(self.token.key))
+
+    def test_cached_token_without_queries(self):
+        authentication = CachedTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual((user, token), (self.user, self.token))
+        with self.assertNumQueries(0):
+            cached_user, _ = authentication.authenticate_credentials(
+                self.token.key
+            )
+        self.assertEqual(cached_user, self.user)
+        self.assertIsNot(cached_user, user)
+
+    def test_deactivated_by_save(self):
+        response = self.client.get("/api/shopping_cart/")
+        self.assertEqual(response.status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/shopping_cart/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivated_by_update(self):
+        response = self.client.get("/api/shopping_cart/")
+        self.assertEqual(response.status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        token_cache.clear()
+        response = self.client.get("/api/shopping_cart/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_unrelated_save_keeps_cache(self):
+        CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.user.last_login = timezone.now()
+        # Только UPDATE пользователя, без чтения его токенов.
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=("last_login",))
+        self.user.first_name = "Имя"
+        with self.assertNumQueries(2):
+            self.user.save()
+        self.assertIsNotNone(token_cache.get(self.token.key))
+
+
+class ShoppingCartBatchTests(CatalogTestCase):
+    """
+    Пакетное изменение корзины.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.cart = self.fill_cart(2)
+
+    def items(self) -> dict[int, int]:
+        return dict(self.cart.cart_items.values_list("product_id", "quantity"))
+
+    def test_apply_operations(self):
+        first, second, new = self.product_ids[:3]
+        response = self.client.post(
+            "/api/shopping_cart/batch/",
+            [
+                {"product": first, "quantity": 2},
+                {"product": second, "op": "delete"},
+                {"product": new, "quantity": 3, "op": "update"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.items(), {first: 3, new: 3})
+        self.assertEqual(response.data["amount_of_products"], 2)
+
+    def test_missing_products(self):
+        missing = max(self.product_ids) + 1
+        response = self.client.post(
+            "/api/shopping_cart/batch/",
+            [{"product": self.product_ids[2]}, {"product": missing}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["products"], [missing])
+        self.assertEqual(self.items(), dict.fromkeys(self.product_ids[:2], 1))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReplicaCacheTests(TransactionTestCase):
+    """
+    Заполнение версионированного кэша каталога при наличии реплик.
+
+    Внутри транзакции каталог и так читается из основной БД, поэтому
+    тесты выполняются без обёртки TestCase.
+    """
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        create_catalog(1)
+
+    def test_cache_miss_reads_primary(self):
+        # Несуществующая реплика: любое чтение с неё завершится ошибкой.
+        with override_settings(REPLICA_DATABASES=["missing-replica"]):
+            for path in ("/api/products/", "/api/categories/"):
+                with self.subTest(path=path):
+                    response = self.client.get(path)
+                    self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConcurrentAddToShoppingCartTests(TransactionTestCase):
+    """
+    Одновременное добавление одного продукта в корзину одного пользователя
+    из нескольких потоков, каждый со своим соединением с БД.
+
+    Корзины у пользователя изначально нет, поэтому потоки одновременно
+    создают и корзину, и элемент корзины.
+    """
+
+    threads = 8
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        token_cache.clear()
+        self.product_id = create_catalog(1)[0]
+        self.user = User.objects.create(username="concurrent-cart")
+        self.token = Token.objects.create(user=self.user)
+
+    def add_concurrently(self, quantity: int) -> list[int]:
+        """
+        Добавить продукт в корзину из threads потоков одновременно.
+
+        :param quantity: Количество, добавляемое каждым потоком.
+        :return: Коды ответов.
+        """
+        barrier = Barrier(self.threads)
+
+        def add(_):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+            barrier.wait()
+            try:
+                return client.post(
+                    f"/api/products/{self.product_id}/cart/",
+                    {"quantity": quantity},
+                    format="json",
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            return list(executor.map(add, range(self.threads)))
+
+    def assert_shopping_cart(self, quantity: int) -> None:
+        cart = ShoppingCart.objects.get(user=self.user)
+        item = ShoppingCartItem.objects.get(cart=cart)
+        self.assertEqual(item.product_id, self.product_id)
+        self.assertEqual(item.quantity, quantity)
+        self.assertEqual(cart.items_count, 1)
+        self.assertEqual(cart.total_quantity, quantity)
+
+    def test_quantities_are_summed(self):
+        statuses = self.add_concurrently(5)
+        self.assertEqual(statuses, [201] * self.threads)
+        self.assert_shopping_cart(5 * self.threads)
+
+    def test_quantity_is_capped(self):
+        quantity = Nv.ITEM_MAX_QUANTITY_IN_CART // 2
+        statuses = self.add_concurrently(quantity)
+        self.assertEqual(statuses, [201] * self.threads)
+        self.assertGreater(
+            quantity * self.threads, Nv.ITEM_MAX_QUANTITY_IN_CART
+        )
+        self.assert_shopping_cart(Nv.ITEM_MAX_QUANTITY_IN_CART)
+
+
+class TransactionModeTests(TransactionTestCase):
+    """
+    Режим начала транзакций SQLite.
+    """
+
+    def setUp(self):
+        create_catalog(1)
+
+    def test_begin_statements(self):
+        for context, statement in (
+            (transaction.atomic, "BEGIN DEFERRED"),
+            (write_atomic, "BEGIN IMMEDIATE"),
+        ):
+            with self.subTest(statement=statement):
+                with CaptureQueriesContext(connection) as queries:
+                    with context():
+                        # Вложенный блок не начинает новую транзакцию.
+                        with write_atomic():
+                            Product.objects.exists()
+                self.assertEqual(queries[0]["sql"], statement)
+                self.assertTrue(queries[1]["sql"].startswith("SAVEPOINT"))
+                self.assertEqual(connection.transaction_mode, "DEFERRED")
+
+    def test_reads_do_not_wait_for_writer(self):
+        locked, release = Event(), Event()
+
+        def write():
+            try:
+                with write_atomic():
+                    Product.objects.update(price=F("price") + 1)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(1) as executor:
+            writer = executor.submit(write)
+            self.assertTrue(locked.wait(10))
+            try:
+                with transaction.atomic():
+                    self.assertTrue(Product.objects.exists())
+            finally:
+                release.set()
+            writer.result()
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """
+    Настройки БД из переменных окружения.
+    """
+
+    def load_settings(self, **env) -> dict:
+        environ = {
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith("DB_")
+        }
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            return runpy.run_path(
+                os.path.join(settings.BASE_DIR, "alpha_store", "settings.py")
+            )
+
+    def test_sqlite(self):
+        databases = self.load_settings()["DATABASES"]
+        self.assertEqual(
+            databases["default"]["ENGINE"], "django.db.backends.sqlite3"
+        )
+        self.assertEqual(
+            databases["default"]["OPTIONS"]["transaction_mode"], "DEFERRED"
+        )
+        self.assertEqual(databases["default"]["CONN_MAX_AGE"], 60)
+
+    def test_postgresql(self):
+        namespace = self.load_settings(
+            DB_ENGINE="postgresql",
+            DB_NAME="store",
+            DB_HOST="db",
+            DB_CONN_MAX_AGE="600",
+            DB_CONN_HEALTH_CHECKS="1",
+            DB_REPLICAS="replica-a,replica-b:5433",
+        )
+        databases = namespace["DATABASES"]
+        self.assertEqual(
+            databases["default"]["ENGINE"], "django.db.backends.postgresql"
+        )
+        self.assertEqual(databases["default"]["NAME"], "store")
+        self.assertEqual(databases["default"]["HOST"], "db")
+        self.assertEqual(databases["default"]["PORT"], "5432")
+        self.assertEqual(databases["default"]["CONN_MAX_AGE"], 600)
+        self.assertTrue(databases["default"]["CONN_HEALTH_CHECKS"])
+        self.assertEqual(databases["default"]["OPTIONS"], {})
+        self.assertEqual(
+            namespace["REPLICA_DATABASES"], ["replica_1", "replica_2"]
+        )
+        self.assertEqual(
+            [
+                (databases[alias]["HOST"], databases[alias]["PORT"])
+                for alias in namespace["REPLICA_DATABASES"]
+            ],
+            [("replica-a", "5432"), ("replica-b", "5433")],
+        )
+
+    def test_postgresql_pool(self):
+        databases = self.load_settings(
+            DB_ENGINE="postgresql",
+            DB_POOL="1",
+            DB_CONN_MAX_AGE="600",
+            DB_POOL_MAX_SIZE="20",
+            DB_REPLICAS="replica",
+        )["DATABASES"]
+        for alias in ("default", "replica_1"):
+            with self.subTest(alias=alias):
+                self.assertEqual(databases[alias]["CONN_MAX_AGE"], 0)
+                self.assertEqual(
+                    databases[alias]["OPTIONS"]["pool"],
+                    {"min_size": 2, "max_size": 20, "timeout": 10.0},
+                )
+        self.assertIsNot(
+            databases["replica_1"]["OPTIONS"], databases["default"]["OPTIONS"]
+        )
@@ -1,10 +1,19 @@
+from django.conf import settings
 from django.urls import include, path
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 
-from api.views import ProductViewSet, ShoppingCartViewSet, CategoryViewSet
+from api.views import (
+    AsyncProductDetailView,
+    AsyncProductListView,
+    AsyncShoppingCartListView,
+    CategoryViewSet,
+    MetricsView,
+    ProductViewSet,
+    ShoppingCartViewSet,
+)
 
 v1_router = DefaultRouter()
 
@@ -27,7 +36,25 @@ schema_view = get_schema_view(
     ],
 )
 
+# Асинхронные представления чтения каталога и корзины перекрывают
+# соответствующие маршруты роутера в ASGI-развёртывании.
+async_read_urlpatterns = [
+    path("products/", AsyncProductListView.as_view(), name="products-list"),
+    path(
+        "products/<int:pk>/",
+        AsyncProductDetailView.as_view(),
+        name="products-detail",
+    ),
+    path(
+        "shopping_cart/",
+        AsyncShoppingCartListView.as_view(),
+        name="shopping_cart-list",
+    ),
+]
+
 urlpatterns = [
+    path("_metrics/", MetricsView.as_view(), name="metrics"),
+    *(async_read_urlpatterns if settings.ASYNC_READ_VIEWS else ()),
     path("", include(v1_router.urls)),
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
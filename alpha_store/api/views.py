@@ -1,51 +1,160 @@
+from datetime import datetime, timezone
+from functools import cached_property, partial
+
+from django.db.models import Count, Prefetch
+from django.http import HttpResponse
+from django.utils.http import quote_etag
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.viewsets import ReadOnlyModelViewSet
-from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
+from rest_framework.views import APIView
 
+from api.filters import (
+    CatalogOrderingFilter,
+    ProductFilterBackend,
+    ProductSearchFilter,
+)
+from api.generics import (
+    AsyncGenericAPIView,
+    AsyncListModelMixin,
+    AsyncRetrieveModelMixin,
+)
+from api.mixins import (
+    ConditionalGetMixin,
+    VersionedCacheMixin,
+    VersionedConditionalGetMixin,
+)
+from api.pagination import AsyncPageNumberPagination, CatalogPagination
+from api.renderers import CSVRenderer, JSONLinesRenderer
 from api.serializers import (
     ProductSerializer,
     ProductListSerializer,
+    ProductListValuesSerializer,
+    ShoppingCartBatchItemSerializer,
     ShoppingCartGetSerializer,
     ShoppingCartItemSerializer,
     CategorySerializer,
+    CategoryTreeSerializer,
     QuantitySerializer,
 )
-from store.models import Product, ShoppingCart, ShoppingCartItem, Category
+from core.cache import (
+    CATALOG_NAMESPACE,
+    aget_version,
+    cache_stats,
+    get_version,
+)
+from core.metrics import registry
+from store.models import (
+    Category,
+    Product,
+    ShoppingCart,
+    ShoppingCartItem,
+    SubCategory,
+)
 from core.services import (
     _add_to_shopping_cart,
     _delete_from_shopping_cart,
     _adjust_quantity,
+    _apply_shopping_cart_batch,
+    _clear_shopping_cart,
+    _export_products,
+    _get_category_tree,
 )
 
 
-class ProductViewSet(ReadOnlyModelViewSet):
+class ProductCatalogMixin(VersionedConditionalGetMixin, VersionedCacheMixin):
     """
-    Вьюсет для модели Product. Предусмотрена пагинация по полю name.
+    Общие настройки каталога продуктов для синхронного вьюсета и
+    асинхронных представлений.
+
+    Если выбран ProductListValuesSerializer, отфильтрованный QuerySet
+    возвращает словари только с нужными ему столбцами вместо моделей.
+    """
+
+    model = Product
+    permission_classes = (AllowAny,)
+    pagination_class = CatalogPagination
+    cache_namespace = CATALOG_NAMESPACE
+    filter_backends = (
+        ProductFilterBackend,
+        ProductSearchFilter,
+        CatalogOrderingFilter,
+    )
+    ordering_fields = ("name", "price")
+    ordering = ("name",)
+    modified_fields = (
+        "updated_at",
+        "category__updated_at",
+        "subcategory__updated_at",
+    )
+    queryset = Product.objects.select_related("category", "subcategory")
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, ProductListValuesSerializer):
+            return serializer_class.select_values(queryset)
+        return queryset
+
+
+class ProductViewSet(ProductCatalogMixin, ReadOnlyModelViewSet):
+    """
+    Вьюсет для модели Product. Предусмотрена пагинация по полю name, в том
+    числе курсорная (`?pagination=cursor`), фильтрация по категории,
+    подкатегории и диапазону цен, полнотекстовый поиск (`?search=`), а также
+    сортировка по цене (`?ordering=price`).
 
     Помимо GET-запроса, реализованы дополнительные методы при помощи
     декоратора `action`, такие как:
     1. `cart` - POST-запрос, добавление конкретного товара в корзину.
     2. `cart` - DELETE-запрос, удаление конкретного товара из корзины.
     3. `cart` - PATCH-запрос, изменение количества товара в корзине.
+    4. `export` - GET-запрос, потоковая выгрузка каталога в формате JSON
+    Lines (`?format=jsonl`) либо CSV (`?format=csv`).
 
     Метод GET может быть использован любым пользователем (в том числе
     неавторизованным). Для доступа к методам, связанным с корзиной,
     пользователю необходимо зарегистрироваться и авторизоваться.
+
+    Ответы на GET-запросы кэшируются по версии каталога, которая также
+    используется для ETag и Last-Modified списка. Last-Modified продукта —
+    дата изменения продукта, его категории и подкатегории. Список и
+    получение продукта читают из БД только нужные столбцы и сериализуются
+    ProductListValuesSerializer, схема API описывается
+    ProductListSerializer того же вида.
     """
 
-    model = Product
     serializer_class = ProductSerializer
-    permission_classes = (AllowAny,)
-    queryset = Product.objects.select_related("category", "subcategory")
 
     def get_serializer_class(self):
         if self.action in ("list", "retrieve"):
-            return ProductListSerializer
+            if getattr(self, "swagger_fake_view", False):
+                return ProductListSerializer
+            return ProductListValuesSerializer
         return ProductSerializer
 
+    @action(
+        detail=False,
+        methods=("get",),
+        renderer_classes=(JSONLinesRenderer, CSVRenderer),
+        pagination_class=None,
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Выгрузить каталог продуктов с учётом фильтров.
+        """
+        return _export_products(
+            request=request,
+            queryset=self.filter_queryset(self.get_queryset()),
+            serializer_class=ProductListValuesSerializer,
+        )
+
     @swagger_auto_schema(request_body=QuantitySerializer)
     @action(
         detail=True, methods=("post",), permission_classes=(IsAuthenticated,)
@@ -55,7 +164,7 @@ class ProductViewSet(ReadOnlyModelViewSet):
         Добавить объект продукта в корзину.
         """
         return _add_to_shopping_cart(
-            pk=self.get_object().pk,
+            product=self.get_object(),
             request=request,
             serializer_class=ShoppingCartItemSerializer,
             quantity=self.request.data.get("quantity", 1),
@@ -77,36 +186,140 @@ class ProductViewSet(ReadOnlyModelViewSet):
         Изменить количество товара в корзине.
         """
         return _adjust_quantity(
-            pk=self.get_object().pk,
+            product=self.get_object(),
             request=request,
             serializer_class=ShoppingCartItemSerializer,
             quantity=self.request.data.get("quantity", 1),
         )
 
 
-class CategoryViewSet(ReadOnlyModelViewSet):
+class CategoryViewSet(
+    VersionedConditionalGetMixin, VersionedCacheMixin, ReadOnlyModelViewSet
+):
     """
-    Вьюсет для модели Category. Предусмотрена пагинация по полю name.
+    Вьюсет для модели Category. Предусмотрена пагинация по полю name, в том
+    числе курсорная (`?pagination=cursor`).
+
+    Ответы на GET-запросы кэшируются по версии каталога, которая также
+    используется для ETag и Last-Modified списка. Last-Modified категории —
+    дата изменения категории и её подкатегорий. Подкатегории загружаются
+    одним prefetch-запросом.
+
+    Дополнительно реализован метод `tree`, возвращающий всё дерево
+    категорий с подкатегориями и количеством продуктов.
     """
 
     model = Category
     serializer_class = CategorySerializer
     permission_classes = (AllowAny,)
-    queryset = Category.objects.all()
+    pagination_class = CatalogPagination
+    cache_namespace = CATALOG_NAMESPACE
+    modified_fields = ("updated_at", "subcategories__updated_at")
+    queryset = Category.objects.prefetch_related("subcategories")
+
+    @swagger_auto_schema(
+        responses={status.HTTP_200_OK: CategoryTreeSerializer(many=True)}
+    )
+    @action(detail=False, methods=("get",), pagination_class=None)
+    def tree(self, request):
+        """
+        Получить дерево категорий с подкатегориями и количеством продуктов.
+        """
+        return _get_category_tree(
+            request=request,
+            serializer_class=CategoryTreeSerializer,
+            queryset=Category.objects.annotate(
+                products_count=Count("products")
+            ).prefetch_related(
+                Prefetch(
+                    "subcategories",
+                    queryset=SubCategory.objects.annotate(
+                        products_count=Count("products")
+                    ),
+                )
+            ),
+        )
 
 
-class ShoppingCartViewSet(ReadOnlyModelViewSet):
+class ShoppingCartStateMixin(ConditionalGetMixin):
     """
-    Вьюсет для модели ShoppingCart.
-
-    Помимо GET-запроса, отображающего состав корзины,
-    реализован дополнительный метод `clear` для очистки корзины.
+    Общие настройки корзины для синхронного вьюсета и асинхронного
+    представления: QuerySet корзины пользователя, а также ETag и
+    Last-Modified по дате изменения корзины и версии каталога.
     """
 
     model = ShoppingCart
     serializer_class = ShoppingCartGetSerializer
     permission_classes = (IsAuthenticated,)
-    queryset = ShoppingCart.objects.select_related("user")
+    queryset = ShoppingCart.objects.prefetch_related(
+        Prefetch(
+            "cart_items",
+            queryset=ShoppingCartItem.objects.select_related(
+                "product"
+            ).order_by("pk"),
+        )
+    ).order_by("pk")
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return ShoppingCart.objects.none()
+        return super().get_queryset().filter(user=self.request.user)
+
+    @cached_property
+    def shopping_cart_updated_at(self) -> datetime | None:
+        return (
+            ShoppingCart.objects.filter(user=self.request.user)
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+
+    @cached_property
+    def catalog_version(self) -> int:
+        return get_version(CATALOG_NAMESPACE)
+
+    def get_etag(self, request):
+        updated_at = self.shopping_cart_updated_at
+        return quote_etag(
+            f"cart-{updated_at.timestamp() if updated_at else 0}"
+            f"-{self.catalog_version}"
+        )
+
+    def get_last_modified(self, request):
+        catalog_modified = datetime.fromtimestamp(
+            self.catalog_version / 10**9, tz=timezone.utc
+        )
+        updated_at = self.shopping_cart_updated_at
+        if updated_at is None:
+            return catalog_modified
+        return max(updated_at, catalog_modified)
+
+    async def aload_state(self) -> None:
+        """
+        Заранее получить дату изменения корзины и версию каталога в
+        асинхронном представлении.
+        """
+        self.shopping_cart_updated_at = await (
+            ShoppingCart.objects.filter(user=self.request.user)
+            .values_list("updated_at", flat=True)
+            .afirst()
+        )
+        self.catalog_version = await aget_version(CATALOG_NAMESPACE)
+
+
+class ShoppingCartViewSet(ShoppingCartStateMixin, ReadOnlyModelViewSet):
+    """
+    Вьюсет для модели ShoppingCart.
+
+    Помимо GET-запроса, отображающего состав корзины,
+    реализованы дополнительные методы `clear` для очистки корзины и `batch`
+    для пакетного изменения её состава.
+
+    Элементы корзины вместе с продуктами загружаются одним prefetch-запросом,
+    поэтому количество запросов к БД не зависит от размера корзины.
+
+    ETag и Last-Modified строятся по дате изменения корзины и версии
+    каталога, так как в ответе присутствуют цены продуктов.
+    """
 
     @action(
         detail=False, methods=("post",), permission_classes=(IsAuthenticated,)
@@ -115,8 +328,114 @@ class ShoppingCartViewSet(ReadOnlyModelViewSet):
         """
         Очистить корзину с товарами.
         """
-        for product in ShoppingCartItem.objects.filter(
-            cart=request.user.shopping_cart.first()
-        ):
-            product.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return _clear_shopping_cart(request=request)
+
+    @swagger_auto_schema(
+        request_body=ShoppingCartBatchItemSerializer(many=True),
+        responses={status.HTTP_200_OK: ShoppingCartGetSerializer},
+    )
+    @action(
+        detail=False, methods=("post",), permission_classes=(IsAuthenticated,)
+    )
+    def batch(self, request):
+        """
+        Пакетно изменить состав корзины.
+
+        Принимает список операций вида {product, quantity, op}, где op —
+        одно из add, update или delete, и возвращает обновлённую корзину.
+        """
+        return _apply_shopping_cart_batch(
+            request=request,
+            serializer_class=ShoppingCartBatchItemSerializer,
+            response_serializer_class=ShoppingCartGetSerializer,
+            queryset=self.get_queryset(),
+        )
+
+
+class AsyncProductListView(
+    ProductCatalogMixin, AsyncListModelMixin, AsyncGenericAPIView
+):
+    """
+    Асинхронный список продуктов для ASGI-развёртывания.
+
+    Отдаёт те же данные, что и ProductViewSet.list, с теми же фильтрами,
+    пагинацией, кэшированием и условными GET-запросами.
+    """
+
+    serializer_class = ProductListValuesSerializer
+    swagger_schema = None
+
+    async def ainitial(self, request, *args, **kwargs):
+        await self.aload_namespace_version()
+
+    async def get(self, request, *args, **kwargs):
+        return await self.adispatch_conditional(
+            partial(self.adispatch_cached, self.alist),
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class AsyncProductDetailView(
+    ProductCatalogMixin, AsyncRetrieveModelMixin, AsyncGenericAPIView
+):
+    """
+    Асинхронное получение продукта для ASGI-развёртывания.
+
+    Отдаёт те же данные, что и ProductViewSet.retrieve.
+    """
+
+    serializer_class = ProductListValuesSerializer
+    swagger_schema = None
+
+    async def ainitial(self, request, *args, **kwargs):
+        await self.aload_namespace_version()
+        await self.aload_object_modified_at()
+
+    async def get(self, request, *args, **kwargs):
+        return await self.adispatch_conditional(
+            partial(self.adispatch_cached, self.aretrieve),
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class AsyncShoppingCartListView(
+    ShoppingCartStateMixin, AsyncListModelMixin, AsyncGenericAPIView
+):
+    """
+    Асинхронное получение корзины для ASGI-развёртывания.
+
+    Отдаёт те же данные, что и ShoppingCartViewSet.list.
+    """
+
+    pagination_class = AsyncPageNumberPagination
+    swagger_schema = None
+
+    async def ainitial(self, request, *args, **kwargs):
+        await self.aload_state()
+
+    async def get(self, request, *args, **kwargs):
+        return await self.adispatch_conditional(
+            self.alist, request, *args, **kwargs
+        )
+
+
+class MetricsView(APIView):
+    """
+    Показатели запросов процесса в текстовом формате Prometheus.
+
+    Доступно только администраторам: сборщик метрик авторизуется токеном
+    служебного пользователя с флагом is_staff.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @swagger_auto_schema(auto_schema=None)
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            registry.render(cache_stats.snapshot()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from urllib.parse import urlencode
+
+from django.db import reset_queries
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+
+from api.pagination import CatalogCursorPagination
+from benchmarks.common import latency_summary
+from core.cache import get_cache
+from core.db import capture_queries
+from store.models import Product
+
+PAGES = (1, 100, 10000)
+# Запросы к каталогу store.seeding: частое слово, узкое сочетание слов,
+# название подкатегории и запрос без результатов.
+SEARCH_QUERIES = (
+    "рюкзак",
+    "беспроводной рюкзак чёрный",
+    "смартфоны",
+    "отсутствующий",
+)
+
+
+@dataclass
+class CatalogResult:
+    """
+    Задержки запроса каталога с холодным кэшем. Время указано в
+    миллисекундах.
+    """
+
+    name: str
+    products: int
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    queries: int
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+def cursor_path(page: int, page_size: int) -> str:
+    """
+    Путь курсорной пагинации к странице, с которой начинается страница
+    page постраничной пагинации.
+
+    Курсор указывает на название последнего продукта предыдущей страницы
+    в порядке (name, pk), как в ссылке next.
+    """
+    paginator = CatalogCursorPagination()
+    paginator.base_url = (
+        f"/api/products/?pagination=cursor&page_size={page_size}"
+    )
+    if page == 1:
+        return paginator.base_url
+    position = (
+        Product.objects.order_by("name", "pk").values_list("name", flat=True)
+    )[(page - 1) * page_size - 1]
+    return paginator.encode_cursor(
+        Cursor(offset=0, reverse=False, position=position)
+    )
+
+
+def search_path(query: str, page_size: int) -> str:
+    """
+    Путь поиска продуктов по запросу query.
+    """
+    return (
+        f"/api/products/?{urlencode(dict(search=query, page_size=page_size))}"
+    )
+
+
+def run_catalog_request(
+    client: APIClient, name: str, path: str, iterations: int, products: int
+) -> CatalogResult:
+    """
+    Выполнить GET-запрос к каталогу iterations раз.
+
+    Перед каждым запросом кэш каталога очищается, чтобы замерялась
+    работа с БД, а не чтение ответа из кэша.
+    :param products: Количество продуктов в каталоге для результата.
+    """
+    latencies, statuses, queries = [], [], 0
+    for _ in range(iterations):
+        get_cache().clear()
+        reset_queries()
+        with capture_queries() as captured:
+            start = perf_counter()
+            response = client.get(path)
+            latencies.append(perf_counter() - start)
+        statuses.append(response.status_code)
+        queries = len(captured)
+    return CatalogResult(
+        name=name,
+        products=products,
+        queries=queries,
+        **latency_summary(latencies, statuses),
+    )
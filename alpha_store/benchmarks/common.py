@@ -0,0 +1,124 @@
+import json
+import platform
+import statistics
+import timeit
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def temporary_database(keep_current: bool = False) -> Iterator[None]:
+    """
+    Выполнить блок во временной тестовой БД.
+
+    Тестовое окружение Django (ALLOWED_HOSTS для тестового клиента и т.п.)
+    включается в любом случае. Реплики на время блока становятся
+    зеркалами временной БД, как в тестах Django.
+    :param keep_current: Использовать текущую БД вместо временной.
+    """
+    setup_test_environment()
+    old_name = None
+    replicas = {
+        alias: connections[alias].settings_dict
+        for alias in settings.REPLICA_DATABASES
+    }
+    try:
+        if not keep_current:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            for alias in replicas:
+                connections[alias].close()
+                connections[alias].creation.set_as_test_mirror(
+                    connection.settings_dict
+                )
+        yield
+    finally:
+        for alias, settings_dict in replicas.items():
+            connections[alias].close()
+            connections[alias].settings_dict = settings_dict
+        if old_name is not None:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def best_time(
+    function: Callable[[], object], repeat: int = 5, number: int = 20
+) -> float:
+    """
+    Замерить время вызова функции.
+
+    Берётся лучшее из repeat повторов по number вызовов.
+    :return: Время одного вызова в миллисекундах.
+    """
+    best = min(timeit.repeat(function, repeat=repeat, number=number))
+    return round(best / number * 1000, 4)
+
+
+def latency_summary(latencies: list[float], statuses: list[int]) -> dict:
+    """
+    Посчитать перцентили задержек и количество ответов по кодам.
+    :param latencies: Задержки запросов в секундах.
+    :param statuses: Коды ответов, 0 — ошибка без ответа.
+    :return: Поля p50, p95, p99 и mean в миллисекундах, requests, errors
+        и statuses.
+    """
+    milliseconds = [latency * 1000 for latency in latencies]
+    percentiles = (
+        statistics.quantiles(milliseconds, n=100, method="inclusive")
+        if len(milliseconds) > 1
+        else milliseconds * 99
+    )
+    counts = dict()
+    for code in statuses:
+        counts[code] = counts.get(code, 0) + 1
+    return dict(
+        requests=len(latencies),
+        errors=sum(code == 0 or code >= 400 for code in statuses),
+        p50=round(percentiles[49], 3),
+        p95=round(percentiles[94], 3),
+        p99=round(percentiles[98], 3),
+        mean=round(statistics.fmean(milliseconds), 3),
+        statuses=counts,
+    )
+
+
+def environment() -> dict[str, str]:
+    """
+    Описание окружения, в котором выполнялся бенчмарк.
+    """
+    return dict(
+        python=platform.python_version(),
+        django=django.get_version(),
+        database=connection.vendor,
+        machine=platform.machine(),
+        processor=platform.processor(),
+    )
+
+
+def write_results(path: Path, label: str, parameters: dict, results) -> None:
+    """
+    Сохранить результаты бенчмарка в JSON для сравнения запусков.
+    """
+    path.write_text(
+        json.dumps(
+            dict(
+                label=label,
+                created_at=datetime.now(timezone.utc).isoformat(),
+                environment=environment(),
+                parameters=parameters,
+                results=[asdict(result) for result in results],
+            ),
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
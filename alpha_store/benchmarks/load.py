@@ -0,0 +1,414 @@
+import asyncio
+import os
+import random
+import shlex
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import monotonic, perf_counter, sleep
+from typing import Iterator
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.common import latency_summary
+from store.models import Product, User
+from store.seeding import seed_store
+
+CONCURRENCY_LEVELS = (100, 500, 1000)
+
+
+@dataclass(frozen=True)
+class Server:
+    """
+    Способ запуска приложения для нагрузочного бенчмарка.
+
+    Команда может содержать {host}, {port}, {workers} и {threads}, а env
+    дополняет окружение процесса сервера. Значение None удаляет
+    переменную окружения.
+    """
+
+    name: str
+    command: str
+    env: dict[str, str | None] = field(default_factory=dict)
+
+
+SERVERS = (
+    Server(
+        "wsgi",
+        "gunicorn alpha_store.wsgi:application --bind {host}:{port} "
+        "--workers {workers} --threads {threads} --backlog 2048 "
+        "--log-level warning",
+        env=dict(ASYNC_READ_VIEWS=None),
+    ),
+    Server(
+        "asgi",
+        "uvicorn alpha_store.asgi:application --host {host} --port {port} "
+        "--workers {workers} --backlog 2048 --log-level warning "
+        "--no-access-log",
+        env=dict(ASYNC_READ_VIEWS="1"),
+    ),
+    Server(
+        "asgi-sync",
+        "uvicorn alpha_store.asgi:application --host {host} --port {port} "
+        "--workers {workers} --backlog 2048 --log-level warning "
+        "--no-access-log",
+        env=dict(ASYNC_READ_VIEWS="0"),
+    ),
+)
+
+
+@dataclass
+class LoadResult:
+    """
+    Результат нагрузки на сервер (либо профиль БД) заданным числом
+    одновременных соединений. Время указано в миллисекундах, пропускная
+    способность — в запросах в секунду по общему времени нагрузки.
+    """
+
+    scenario: str
+    server: str
+    connections: int
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    throughput: float
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+@contextmanager
+def running_server(
+    server: Server,
+    host: str,
+    port: int,
+    workers: int = 1,
+    threads: int = 1,
+    timeout: float = 30,
+) -> Iterator[None]:
+    """
+    Запустить сервер приложения в отдельном процессе на время блока.
+
+    Блок выполняется после того, как сервер начал принимать соединения.
+    """
+    command = shlex.split(
+        server.command.format(
+            host=host, port=port, workers=workers, threads=threads
+        )
+    )
+    if shutil.which(command[0]) is None:
+        raise RuntimeError(f"Сервер {command[0]} не установлен.")
+    env = dict(os.environ)
+    for name, value in server.env.items():
+        if value is None:
+            env.pop(name, None)
+        else:
+            env[name] = value
+    with tempfile.TemporaryFile() as log:
+        process = subprocess.Popen(
+            command,
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            deadline = monotonic() + timeout
+            while True:
+                if process.poll() is not None:
+                    log.seek(0)
+                    raise RuntimeError(
+                        f"Сервер {server.name} завершился с кодом "
+                        f"{process.returncode}:\n"
+                        f"{log.read().decode(errors='replace')}"
+                    )
+                try:
+                    socket.create_connection((host, port), timeout=1).close()
+                    break
+                except OSError:
+                    if monotonic() > deadline:
+                        raise RuntimeError(
+                            f"Сервер {server.name} не запустился "
+                            f"за {timeout} с."
+                        )
+                    sleep(0.2)
+            yield
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """
+    Прочитать ответ HTTP/1.1 целиком.
+    :return: Код ответа и признак того, что соединение можно использовать
+    повторно.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Сервер закрыл соединение.")
+    status = int(status_line.split()[1])
+    length, chunked, keep_alive = 0, False, True
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+        elif name == "connection":
+            keep_alive = value != "close"
+    if chunked:
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+    elif length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _load_connection(
+    host: str,
+    port: int,
+    paths: list[str],
+    headers: dict[str, str],
+    timeout: float,
+    latencies: list[float],
+    statuses: list[int],
+) -> None:
+    reader = writer = None
+    extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    for path in paths:
+        start = perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), timeout
+                )
+            writer.write(
+                f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                f"{extra}\r\n".encode()
+            )
+            status, keep_alive = await asyncio.wait_for(
+                _read_response(reader), timeout
+            )
+        except (OSError, EOFError, ValueError, asyncio.TimeoutError):
+            status, keep_alive = 0, False
+        latencies.append(perf_counter() - start)
+        statuses.append(status)
+        if not keep_alive and writer is not None:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(
+    host: str,
+    port: int,
+    paths: list[list[str]],
+    headers: dict[str, str],
+    timeout: float,
+) -> tuple[list[float], list[int], float]:
+    latencies, statuses = [], []
+    start = perf_counter()
+    await asyncio.gather(
+        *(
+            _load_connection(
+                host,
+                port,
+                connection_paths,
+                headers,
+                timeout,
+                latencies,
+                statuses,
+            )
+            for connection_paths in paths
+        )
+    )
+    return latencies, statuses, perf_counter() - start
+
+
+def run_load(
+    scenario: str,
+    server: str,
+    host: str,
+    port: int,
+    paths: list[list[str]],
+    headers: dict[str, str] | None = None,
+    timeout: float = 30,
+) -> LoadResult:
+    """
+    Нагрузить сервер одновременными соединениями HTTP/1.1 с keep-alive.
+
+    Каждое соединение последовательно отправляет GET-запросы по своему
+    списку путей, а все соединения работают одновременно. Если сервер
+    закрывает соединение, оно открывается заново. Ошибки соединения и
+    таймауты учитываются с кодом 0.
+    :param paths: Пути запросов для каждого соединения.
+    :param headers: Дополнительные заголовки запросов.
+    :param timeout: Таймаут одного запроса в секундах.
+    """
+    latencies, statuses, elapsed = asyncio.run(
+        _load(host, port, paths, headers or {}, timeout)
+    )
+    return summarize_load(
+        scenario, server, len(paths), latencies, statuses, elapsed
+    )
+
+
+def summarize_load(
+    scenario: str,
+    server: str,
+    connections: int,
+    latencies: list[float],
+    statuses: list[int],
+    elapsed: float,
+) -> LoadResult:
+    """
+    Посчитать перцентили задержек и пропускную способность нагрузки.
+    :param latencies: Задержки запросов в секундах.
+    :param statuses: Коды ответов, 0 — ошибка без ответа.
+    :param elapsed: Общее время нагрузки в секундах.
+    """
+    return LoadResult(
+        scenario=scenario,
+        server=server,
+        connections=connections,
+        throughput=round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies, statuses),
+    )
+
+
+@dataclass(frozen=True)
+class DatabaseProfile:
+    """
+    Профиль настроек БД в виде переменных окружения для settings.py.
+    """
+
+    name: str
+    env: dict[str, str] = field(default_factory=dict)
+
+
+DATABASE_PROFILES = (
+    DatabaseProfile(
+        "sqlite-default",
+        env=dict(
+            DB_SQLITE_JOURNAL_MODE="DELETE",
+            DB_SQLITE_SYNCHRONOUS="FULL",
+            DB_SQLITE_TRANSACTION_MODE="DEFERRED",
+            DB_CONN_MAX_AGE="0",
+        ),
+    ),
+    DatabaseProfile(
+        "sqlite-persistent",
+        env=dict(
+            DB_SQLITE_JOURNAL_MODE="DELETE",
+            DB_SQLITE_SYNCHRONOUS="FULL",
+            DB_SQLITE_TRANSACTION_MODE="DEFERRED",
+            DB_CONN_MAX_AGE="600",
+        ),
+    ),
+    DatabaseProfile(
+        "sqlite-wal",
+        env=dict(
+            DB_SQLITE_JOURNAL_MODE="WAL",
+            DB_SQLITE_SYNCHRONOUS="NORMAL",
+            DB_SQLITE_TRANSACTION_MODE="DEFERRED",
+            DB_CONN_MAX_AGE="600",
+            DB_CONN_HEALTH_CHECKS="1",
+        ),
+    ),
+    DatabaseProfile(
+        "postgresql",
+        env=dict(
+            DB_ENGINE="postgresql",
+            DB_CONN_MAX_AGE="600",
+            DB_CONN_HEALTH_CHECKS="1",
+        ),
+    ),
+    DatabaseProfile(
+        "postgresql-pool",
+        env=dict(DB_ENGINE="postgresql", DB_POOL="1"),
+    ),
+)
+
+
+def run_cart_writes(
+    profile: str,
+    threads: int,
+    requests: int,
+    products: int = 500,
+    seed: int | None = None,
+) -> LoadResult:
+    """
+    Нагрузить добавление в корзину одновременными пользователями.
+
+    Каталог и пользователи создаются в текущей БД, после чего каждый из
+    threads потоков от имени своего пользователя отправляет requests
+    POST-запросов /api/products/{pk}/cart/ через тестовый клиент. У
+    каждого потока своё соединение с БД, поэтому блокировки на запись и
+    настройки соединений влияют на результат так же, как в рабочем
+    процессе с потоками. Ошибки БД учитываются с кодом 0.
+    """
+    seed_store(products=products, users=threads, carts=0, seed=seed)
+    product_ids = list(Product.objects.values_list("pk", flat=True))
+    clients = []
+    for user in User.objects.order_by("-pk")[:threads]:
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        clients.append(client)
+
+    latencies, statuses = [], []
+    barrier = threading.Barrier(len(clients) + 1)
+
+    def worker(client: APIClient, rng: random.Random) -> None:
+        barrier.wait()
+        for _ in range(requests):
+            path = f"/api/products/{rng.choice(product_ids)}/cart/"
+            start = perf_counter()
+            try:
+                code = client.post(
+                    path, dict(quantity=1), format="json"
+                ).status_code
+            except OperationalError:
+                code = 0
+            latencies.append(perf_counter() - start)
+            statuses.append(code)
+        connection.close()
+
+    rng = random.Random(seed)
+    workers = [
+        threading.Thread(
+            target=worker, args=(client, random.Random(rng.random()))
+        )
+        for client in clients
+    ]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = perf_counter()
+    for thread in workers:
+        thread.join()
+    return summarize_load(
+        "cart-add",
+        profile,
+        len(clients),
+        latencies,
+        statuses,
+        perf_counter() - start,
+    )
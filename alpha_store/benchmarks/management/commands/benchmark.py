@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.common import write_results
+from benchmarks.subcommands import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарки API, развёртываний, записи в корзину и сериализации.
+
+    Каждый бенчмарк — отдельная подкоманда:
+    1. `api` — задержки и количество запросов к БД эндпоинтов через
+    тестовый клиент Django во временной БД с синтетическими данными.
+    2. `concurrency` — нагрузка одновременными соединениями на серверы
+    из SERVERS (gunicorn и uvicorn устанавливаются отдельно) на текущей
+    БД, заполненной заранее, например командой seed_store.
+    3. `cart-writes` — одновременные записи в корзину для профилей
+    настроек БД из DATABASE_PROFILES, каждый в отдельном процессе.
+    4. `json` — рендеринг и разбор ответов списка продуктов стандартным
+    JSON и orjson.
+    5. `serializers` — проверка совпадения и скорость
+    ProductListSerializer и ProductListValuesSerializer.
+    6. `pagination` — задержки первой и глубоких страниц каталога при
+    постраничной и курсорной пагинации.
+    7. `search` — задержки полнотекстового поиска продуктов.
+
+    Подкоманды реализованы в модулях пакета benchmarks.subcommands.
+    Результаты любой подкоманды можно сохранить в JSON параметром
+    --output для сравнения запусков.
+    """
+
+    help = "Запустить бенчмарк проекта."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(
+            dest="benchmark", required=True, metavar="benchmark"
+        )
+        for benchmark in BENCHMARKS.values():
+            subparser = subparsers.add_parser(
+                benchmark.name,
+                help=benchmark.help,
+                description=benchmark.help,
+            )
+            subparser.add_argument("--seed", type=int, default=0)
+            subparser.add_argument(
+                "--output",
+                type=Path,
+                default=None,
+                help="Путь к JSON-файлу с результатами.",
+            )
+            subparser.add_argument(
+                "--label",
+                default="",
+                help="Метка запуска для сравнения результатов.",
+            )
+            benchmark.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        benchmark = BENCHMARKS[options["benchmark"]](self)
+        results = benchmark.run(options)
+        if options["output"] is not None:
+            write_results(
+                options["output"],
+                options["label"],
+                {
+                    name: options[name]
+                    for name in (*benchmark.parameters, "seed")
+                },
+                results,
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Результаты сохранены в {options['output']}."
+                )
+            )
@@ -0,0 +1,196 @@
+import random
+import statistics
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable
+
+from django.db import reset_queries
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.common import latency_summary
+from core.db import capture_queries
+from core.services import (
+    get_or_create_shopping_cart,
+    refresh_shopping_cart_totals,
+)
+from store.models import Product, ShoppingCartItem, User
+
+
+@dataclass
+class BenchmarkContext:
+    """
+    Состояние бенчмарка: клиенты, пользователь с корзиной и продукты.
+
+    Перед каждым запросом сценария в product выбирается случайный продукт,
+    который подставляется в путь запроса.
+    """
+
+    client: APIClient
+    user_client: APIClient
+    user: User
+    product_ids: list[int]
+    items_per_cart: int
+    rng: random.Random
+    product: int = 0
+
+    @classmethod
+    def create(
+        cls, items_per_cart: int = 10, seed: int | None = None
+    ) -> "BenchmarkContext":
+        user, _ = User.objects.get_or_create(username="benchmark")
+        token, _ = Token.objects.get_or_create(user=user)
+        user_client = APIClient()
+        user_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return cls(
+            client=APIClient(),
+            user_client=user_client,
+            user=user,
+            product_ids=list(Product.objects.values_list("pk", flat=True)),
+            items_per_cart=items_per_cart,
+            rng=random.Random(seed),
+        )
+
+    def ensure_in_cart(self) -> None:
+        """
+        Положить текущий продукт в корзину пользователя.
+        """
+        cart = get_or_create_shopping_cart(self.user)
+        ShoppingCartItem.objects.add_product(
+            cart=cart, product=Product.objects.get(pk=self.product), quantity=1
+        )
+        refresh_shopping_cart_totals(cart)
+
+    def fill_cart(self) -> None:
+        """
+        Заменить состав корзины пользователя на items_per_cart продуктов.
+        """
+        cart = get_or_create_shopping_cart(self.user)
+        ShoppingCartItem.objects.filter(cart=cart).delete()
+        ShoppingCartItem.objects.bulk_create(
+            ShoppingCartItem(cart=cart, product_id=product_id, quantity=1)
+            for product_id in self.rng.sample(
+                self.product_ids,
+                min(self.items_per_cart, len(self.product_ids)),
+            )
+        )
+        refresh_shopping_cart_totals(cart)
+
+
+@dataclass
+class Scenario:
+    """
+    Сценарий бенчмарка — один запрос к API.
+
+    :param prepare: Подготовка перед каждым запросом, не входит в замер.
+    """
+
+    name: str
+    method: str
+    path: str
+    data: dict | None = None
+    authenticated: bool = False
+    prepare: Callable[[BenchmarkContext], None] | None = None
+
+
+SCENARIOS = (
+    Scenario("product-list", "get", "/api/products/"),
+    Scenario("product-list-100", "get", "/api/products/?page_size=100"),
+    Scenario("product-detail", "get", "/api/products/{product}/"),
+    Scenario("category-list", "get", "/api/categories/"),
+    Scenario(
+        "cart-get",
+        "get",
+        "/api/shopping_cart/",
+        authenticated=True,
+        prepare=BenchmarkContext.fill_cart,
+    ),
+    Scenario(
+        "cart-add",
+        "post",
+        "/api/products/{product}/cart/",
+        data=dict(quantity=1),
+        authenticated=True,
+    ),
+    Scenario(
+        "cart-patch",
+        "patch",
+        "/api/products/{product}/cart/",
+        data=dict(quantity=2),
+        authenticated=True,
+        prepare=BenchmarkContext.ensure_in_cart,
+    ),
+    Scenario(
+        "cart-delete",
+        "delete",
+        "/api/products/{product}/cart/",
+        authenticated=True,
+        prepare=BenchmarkContext.ensure_in_cart,
+    ),
+    Scenario(
+        "cart-clear",
+        "post",
+        "/api/shopping_cart/clear/",
+        authenticated=True,
+        prepare=BenchmarkContext.fill_cart,
+    ),
+)
+
+
+@dataclass
+class ScenarioResult:
+    """
+    Результат сценария. Время указано в миллисекундах.
+    """
+
+    name: str
+    requests: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    mean: float
+    queries_mean: float
+    queries_max: int
+    throughput: float
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+def run_scenario(
+    context: BenchmarkContext,
+    scenario: Scenario,
+    iterations: int,
+    warmup: int = 0,
+) -> ScenarioResult:
+    """
+    Выполнить сценарий последовательно iterations раз.
+
+    Первые warmup запросов прогревают кэши и не учитываются. Пропускная
+    способность считается по суммарному времени запросов без учёта
+    подготовки.
+    """
+    client = context.user_client if scenario.authenticated else context.client
+    send = getattr(client, scenario.method)
+    latencies, queries, statuses = [], [], []
+    for iteration in range(warmup + iterations):
+        context.product = context.rng.choice(context.product_ids)
+        if scenario.prepare is not None:
+            scenario.prepare(context)
+        path = scenario.path.format(product=context.product)
+        reset_queries()
+        with capture_queries() as captured:
+            start = perf_counter()
+            response = send(path, scenario.data, format="json")
+            elapsed = perf_counter() - start
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed)
+        queries.append(len(captured))
+        statuses.append(response.status_code)
+    return ScenarioResult(
+        name=scenario.name,
+        queries_mean=round(statistics.fmean(queries), 2) if queries else 0,
+        queries_max=max(queries, default=0),
+        throughput=round(len(latencies) / sum(latencies), 1),
+        **latency_summary(latencies, statuses),
+    )
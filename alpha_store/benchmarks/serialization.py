@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from io import BytesIO
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from api.serializers import ProductListSerializer, ProductListValuesSerializer
+from benchmarks.common import best_time
+from core.constants import NumericalValues as Nv
+from store.models import Product
+
+PAGE_SIZES = (10, 100, 1000)
+
+
+@dataclass
+class JSONCodecResult:
+    """
+    Время рендеринга и разбора ответа списка продуктов стандартными
+    JSONRenderer/JSONParser и их вариантами на orjson. Время указано в
+    миллисекундах на один документ.
+    """
+
+    page_size: int
+    size_bytes: int
+    render_std: float
+    render_fast: float
+    parse_std: float
+    parse_fast: float
+
+    @property
+    def render_speedup(self) -> float:
+        return self.render_std / self.render_fast
+
+
+def product_list_document(client: APIClient, page_size: int) -> dict:
+    """
+    Получить ответ ProductViewSet.list с page_size продуктами.
+
+    Размер страницы API ограничен PAGE_MAX_SIZE, поэтому большие
+    документы собираются из результатов нескольких страниц.
+    """
+    limit = min(page_size, Nv.PAGE_MAX_SIZE)
+    document = client.get(
+        "/api/products/", dict(page_size=limit), format="json"
+    ).data
+    page = 1
+    while len(document["results"]) < page_size and document["next"]:
+        page += 1
+        response = client.get(
+            "/api/products/", dict(page_size=limit, page=page), format="json"
+        ).data
+        document["results"].extend(response["results"])
+        document["next"] = response["next"]
+    document["results"] = document["results"][:page_size]
+    return document
+
+
+def run_json_codecs(
+    document: dict, repeat: int = 5, number: int = 20
+) -> JSONCodecResult:
+    """
+    Замерить рендеринг и разбор документа стандартными и быстрыми
+    JSON-рендерером и парсером.
+    """
+    content = JSONRenderer().render(document)
+    return JSONCodecResult(
+        page_size=len(document["results"]),
+        size_bytes=len(content),
+        render_std=best_time(
+            lambda: JSONRenderer().render(document), repeat, number
+        ),
+        render_fast=best_time(
+            lambda: FastJSONRenderer().render(document), repeat, number
+        ),
+        parse_std=best_time(
+            lambda: JSONParser().parse(BytesIO(content)), repeat, number
+        ),
+        parse_fast=best_time(
+            lambda: FastJSONParser().parse(BytesIO(content)), repeat, number
+        ),
+    )
+
+
+@dataclass
+class SerializerResult:
+    """
+    Время чтения страницы продуктов из БД и её сериализации через
+    ProductListSerializer (модели) и ProductListValuesSerializer
+    (словари .values()). Время указано в миллисекундах на страницу.
+    """
+
+    page_size: int
+    model_fetch: float
+    model_serialize: float
+    values_fetch: float
+    values_serialize: float
+
+    @property
+    def speedup(self) -> float:
+        return (self.model_fetch + self.model_serialize) / (
+            self.values_fetch + self.values_serialize
+        )
+
+
+def product_list_mismatches(queryset) -> list[int]:
+    """
+    Сравнить JSON-представления продуктов ProductListSerializer и
+    ProductListValuesSerializer.
+    :param queryset: QuerySet проверяемых продуктов.
+    :return: PK продуктов, представления которых различаются.
+    """
+    queryset = queryset.order_by("pk")
+    renderer = JSONRenderer()
+    return [
+        product.pk
+        for product, values in zip(
+            queryset.iterator(),
+            ProductListValuesSerializer.select_values(queryset).iterator(),
+            strict=True,
+        )
+        if renderer.render(ProductListSerializer(product).data)
+        != renderer.render(ProductListValuesSerializer(values).data)
+    ]
+
+
+def run_product_serializers(
+    page_size: int, repeat: int = 5, number: int = 20
+) -> SerializerResult:
+    """
+    Замерить чтение и сериализацию первой страницы каталога обоими
+    сериализаторами.
+    """
+    queryset = Product.objects.select_related(
+        "category", "subcategory"
+    ).order_by("name", "pk")[:page_size]
+    values = ProductListValuesSerializer.select_values(queryset)
+    products, rows = list(queryset), list(values)
+    return SerializerResult(
+        page_size=len(products),
+        model_fetch=best_time(lambda: list(queryset.all()), repeat, number),
+        model_serialize=best_time(
+            lambda: ProductListSerializer(products, many=True).data,
+            repeat,
+            number,
+        ),
+        values_fetch=best_time(lambda: list(values.all()), repeat, number),
+        values_serialize=best_time(
+            lambda: ProductListValuesSerializer(rows, many=True).data,
+            repeat,
+            number,
+        ),
+    )
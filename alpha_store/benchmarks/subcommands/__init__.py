@@ -0,0 +1,21 @@
+from benchmarks.subcommands.api import ApiBenchmark
+from benchmarks.subcommands.base import Benchmark
+from benchmarks.subcommands.cart_writes import CartWritesBenchmark
+from benchmarks.subcommands.concurrency import ConcurrencyBenchmark
+from benchmarks.subcommands.json_codecs import JsonBenchmark
+from benchmarks.subcommands.pagination import PaginationBenchmark
+from benchmarks.subcommands.search import SearchBenchmark
+from benchmarks.subcommands.serializers import SerializersBenchmark
+
+BENCHMARKS: dict[str, type[Benchmark]] = {
+    benchmark.name: benchmark
+    for benchmark in (
+        ApiBenchmark,
+        ConcurrencyBenchmark,
+        CartWritesBenchmark,
+        PaginationBenchmark,
+        SearchBenchmark,
+        JsonBenchmark,
+        SerializersBenchmark,
+    )
+}
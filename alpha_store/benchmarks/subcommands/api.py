@@ -0,0 +1,100 @@
+from django.core.management.base import CommandError
+
+from benchmarks.common import temporary_database
+from benchmarks.scenarios import SCENARIOS, BenchmarkContext, run_scenario
+from benchmarks.subcommands.base import Benchmark
+from store.seeding import seed_store
+
+
+class ApiBenchmark(Benchmark):
+    """
+    Бенчмарк API через тестовый клиент Django.
+
+    Запросы проходят через реальные маршруты api/urls.py со всеми
+    middleware. По умолчанию создаётся временная тестовая БД с
+    синтетическими данными, чтобы запуски были сравнимы между собой.
+    """
+
+    name = "api"
+    help = "Измерить задержки и количество запросов к БД эндпоинтов API."
+    parameters = (
+        "iterations",
+        "warmup",
+        "products",
+        "users",
+        "carts",
+        "items_per_cart",
+        "use_existing_db",
+    )
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[scenario.name for scenario in SCENARIOS],
+            help="Запустить только указанные сценарии.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Количество замеряемых запросов в сценарии.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=20,
+            help="Количество прогревочных запросов в сценарии.",
+        )
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--carts", type=int, default=50)
+        parser.add_argument("--items-per-cart", type=int, default=10)
+        parser.add_argument(
+            "--use-existing-db",
+            action="store_true",
+            help=(
+                "Выполнить бенчмарк на текущей БД без заполнения. "
+                "Сценарии корзины изменяют данные пользователя benchmark."
+            ),
+        )
+
+    def run(self, options) -> list:
+        with temporary_database(keep_current=options["use_existing_db"]):
+            if not options["use_existing_db"]:
+                seed_store(
+                    products=options["products"],
+                    users=options["users"],
+                    carts=options["carts"],
+                    items_per_cart=options["items_per_cart"],
+                    seed=options["seed"],
+                )
+            context = BenchmarkContext.create(
+                items_per_cart=options["items_per_cart"],
+                seed=options["seed"],
+            )
+            if not context.product_ids:
+                raise CommandError("В БД нет продуктов для бенчмарка.")
+            selected = options["scenario"]
+            results = []
+            self.stdout.write(
+                f"{'сценарий':<18}{'p50':>9}{'p95':>9}{'p99':>9}"
+                f"{'запросы':>9}{'rps':>9}{'ошибки':>8}"
+            )
+            for scenario in SCENARIOS:
+                if selected and scenario.name not in selected:
+                    continue
+                result = run_scenario(
+                    context,
+                    scenario,
+                    options["iterations"],
+                    options["warmup"],
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"{result.name:<18}{result.p50:>9.2f}{result.p95:>9.2f}"
+                    f"{result.p99:>9.2f}{result.queries_mean:>9.1f}"
+                    f"{result.throughput:>9.0f}{result.errors:>8}"
+                )
+        return results
@@ -0,0 +1,110 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.serialization import PAGE_SIZES
+from store.models import Product
+from store.seeding import seed_store
+
+
+class Benchmark:
+    """
+    Подкоманда manage.py benchmark.
+
+    Подкласс задаёт имя и описание подкоманды, добавляет свои параметры
+    в add_arguments и выполняет бенчмарк в run. Параметры из parameters
+    сохраняются вместе с результатами при запуске с --output.
+    """
+
+    name: str
+    help: str
+    parameters: tuple[str, ...] = ()
+
+    def __init__(self, command: BaseCommand):
+        self.stdout = command.stdout
+        self.stderr = command.stderr
+        self.style = command.style
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        pass
+
+    def run(self, options) -> list:
+        """
+        Выполнить бенчмарк.
+
+        :param options: Параметры подкоманды.
+        :return: Результаты бенчмарка.
+        """
+        raise NotImplementedError
+
+
+class CatalogBenchmark(Benchmark):
+    """
+    Бенчмарк чтения каталога на большой БД.
+    """
+
+    parameters = ("products", "page_size", "iterations", "use_existing_db")
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument("--products", type=int, default=1_000_000)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Количество замеряемых запросов.",
+        )
+        parser.add_argument(
+            "--use-existing-db",
+            action="store_true",
+            help="Выполнить бенчмарк на текущей БД без заполнения, "
+            "например заполненной заранее командой seed_store.",
+        )
+
+    def seed_catalog(self, options) -> int:
+        """
+        Заполнить временную БД каталогом из options["products"] продуктов.
+        :return: Количество продуктов в БД.
+        """
+        if not options["use_existing_db"]:
+            self.stdout.write(f"Создание {options['products']} продуктов...")
+            seed_store(
+                products=options["products"],
+                users=1,
+                carts=0,
+                seed=options["seed"],
+            )
+        return Product.objects.count()
+
+    def write_header(self) -> None:
+        self.stdout.write(
+            f"{'запрос':<28}{'продуктов':>10}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'запросы':>9}{'ошибки':>8}"
+        )
+
+    def write_result(self, result) -> None:
+        self.stdout.write(
+            f"{result.name:<28}{result.products:>10}{result.p50:>9.2f}"
+            f"{result.p95:>9.2f}{result.p99:>9.2f}{result.queries:>9}"
+            f"{result.errors:>8}"
+        )
+
+
+class CodecBenchmark(Benchmark):
+    """
+    Бенчмарк представления ответов списка продуктов.
+    """
+
+    parameters = ("products", "repeat", "number")
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--page-size",
+            action="append",
+            type=int,
+            help="Количество продуктов на странице (по умолчанию "
+            f"{', '.join(map(str, PAGE_SIZES))}).",
+        )
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--number", type=int, default=20)
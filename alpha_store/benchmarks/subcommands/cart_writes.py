@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from django.conf import settings
+
+from benchmarks.common import temporary_database
+from benchmarks.load import (
+    DATABASE_PROFILES,
+    DatabaseProfile,
+    LoadResult,
+    run_cart_writes,
+)
+from benchmarks.subcommands.base import Benchmark
+
+
+class CartWritesBenchmark(Benchmark):
+    """
+    Бенчмарк одновременных записей в корзину для профилей настроек БД.
+
+    Настройки БД читаются при импорте settings.py, поэтому каждый
+    профиль запускается в отдельном процессе со своими переменными
+    окружения. Тестовая БД SQLite создаётся во временном файле, чтобы
+    режим журнала и блокировки работали как на диске. Профили
+    PostgreSQL требуют доступного сервера, заданного переменными DB_*,
+    а postgresql-pool — пакета psycopg[pool].
+    """
+
+    name = "cart-writes"
+    help = (
+        "Сравнить пропускную способность и ошибки одновременных "
+        "записей в корзину для разных настроек соединений с БД."
+    )
+    parameters = ("threads", "requests", "products")
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=[profile.name for profile in DATABASE_PROFILES],
+            help="Запустить только указанные профили (по умолчанию все "
+            "профили SQLite).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Количество одновременно пишущих пользователей.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Количество запросов от каждого пользователя.",
+        )
+        parser.add_argument("--products", type=int, default=500)
+        parser.add_argument(
+            "--child",
+            default=None,
+            help="Служебный параметр: выполнить профиль в текущем процессе.",
+        )
+
+    def run(self, options) -> list:
+        if options["child"] is not None:
+            with temporary_database():
+                result = run_cart_writes(
+                    options["child"],
+                    options["threads"],
+                    options["requests"],
+                    products=options["products"],
+                    seed=options["seed"],
+                )
+            self.stdout.write(json.dumps(asdict(result)))
+            return []
+
+        profiles = options["profile"] or [
+            profile.name
+            for profile in DATABASE_PROFILES
+            if profile.name.startswith("sqlite")
+        ]
+        results = []
+        self.stdout.write(
+            f"{'профиль':<20}{'потоки':>8}{'rps':>9}{'p50':>9}"
+            f"{'p95':>9}{'p99':>9}{'ошибки':>8}"
+        )
+        for profile in DATABASE_PROFILES:
+            if profile.name not in profiles:
+                continue
+            result = self.run_profile(profile, options)
+            if result is None:
+                continue
+            results.append(result)
+            self.stdout.write(
+                f"{profile.name:<20}{result.connections:>8}"
+                f"{result.throughput:>9.0f}{result.p50:>9.1f}"
+                f"{result.p95:>9.1f}{result.p99:>9.1f}{result.errors:>8}"
+            )
+        return results
+
+    def run_profile(
+        self, profile: DatabaseProfile, options
+    ) -> LoadResult | None:
+        """
+        Выполнить профиль записей в корзину в дочернем процессе с его
+        окружением.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                "DB_TEST_NAME": str(Path(directory) / "benchmark.sqlite3"),
+                **profile.env,
+            }
+            process = subprocess.run(
+                [
+                    sys.executable,
+                    str(Path(settings.BASE_DIR) / "manage.py"),
+                    "benchmark",
+                    self.name,
+                    "--child",
+                    profile.name,
+                    *(
+                        f"--{name}={options[name]}"
+                        for name in (*self.parameters, "seed")
+                    ),
+                ],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        if process.returncode:
+            error = process.stderr.strip().splitlines() or ["нет вывода"]
+            self.stderr.write(
+                f"Профиль {profile.name} завершился с ошибкой: {error[-1]}"
+            )
+            return None
+        return LoadResult(
+            **json.loads(process.stdout.strip().splitlines()[-1])
+        )
@@ -0,0 +1,152 @@
+import random
+from math import ceil
+
+from django.core.management.base import CommandError
+from rest_framework.authtoken.models import Token
+
+from benchmarks.load import (
+    CONCURRENCY_LEVELS,
+    SERVERS,
+    run_load,
+    running_server,
+)
+from benchmarks.scenarios import BenchmarkContext
+from benchmarks.subcommands.base import Benchmark
+from core.cache import get_cache
+
+LOAD_SCENARIOS = ("product-list", "product-detail", "cart-get")
+
+
+class ConcurrencyBenchmark(Benchmark):
+    """
+    Нагрузочный бенчмарк ASGI- и WSGI-развёртываний.
+
+    Для каждого сервера запускается отдельный процесс на текущей БД.
+    Сервер asgi использует асинхронные представления, asgi-sync —
+    синхронные вьюсеты под ASGI, wsgi — синхронные вьюсеты под
+    gunicorn.
+    """
+
+    name = "concurrency"
+    help = (
+        "Сравнить пропускную способность и задержки ASGI- и "
+        "WSGI-развёртываний при одновременных соединениях."
+    )
+    parameters = ("requests_per_connection", "workers", "threads", "timeout")
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--server",
+            action="append",
+            choices=[server.name for server in SERVERS],
+            help="Запустить только указанные серверы (по умолчанию wsgi "
+            "и asgi).",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=LOAD_SCENARIOS,
+            help="Запустить только указанные сценарии.",
+        )
+        parser.add_argument(
+            "--connections",
+            action="append",
+            type=int,
+            help="Количество одновременных соединений (по умолчанию "
+            f"{', '.join(map(str, CONCURRENCY_LEVELS))}).",
+        )
+        parser.add_argument(
+            "--requests-per-connection",
+            type=int,
+            default=5,
+            help="Количество запросов в каждом соединении.",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Количество потоков в процессе WSGI-сервера.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Таймаут одного запроса в секундах.",
+        )
+
+    def run(self, options) -> list:
+        context = BenchmarkContext.create(seed=options["seed"])
+        if not context.product_ids:
+            raise CommandError(
+                "В БД нет продуктов, заполните её командой seed_store."
+            )
+        context.fill_cart()
+        token = Token.objects.get(user=context.user)
+        rng = random.Random(options["seed"])
+        pages = ceil(len(context.product_ids) / 10)
+        paths = {
+            "product-list": lambda: f"/api/products/?page="
+            f"{rng.randint(1, pages)}",
+            "product-detail": lambda: f"/api/products/"
+            f"{rng.choice(context.product_ids)}/",
+            "cart-get": lambda: "/api/shopping_cart/",
+        }
+        headers = {"Authorization": f"Token {token.key}"}
+        servers = options["server"] or ("wsgi", "asgi")
+        scenarios = options["scenario"] or LOAD_SCENARIOS
+        levels = options["connections"] or CONCURRENCY_LEVELS
+
+        def load(scenario, server, connections, requests):
+            return run_load(
+                scenario,
+                server.name,
+                options["host"],
+                options["port"],
+                [
+                    [paths[scenario]() for _ in range(requests)]
+                    for _ in range(connections)
+                ],
+                headers,
+                options["timeout"],
+            )
+
+        results = []
+        self.stdout.write(
+            f"{'сценарий':<16}{'сервер':<11}{'соедин.':>8}{'rps':>9}"
+            f"{'p50':>9}{'p95':>9}{'p99':>9}{'ошибки':>8}"
+        )
+        for server in SERVERS:
+            if server.name not in servers:
+                continue
+            get_cache().clear()
+            try:
+                with running_server(
+                    server,
+                    options["host"],
+                    options["port"],
+                    workers=options["workers"],
+                    threads=options["threads"],
+                ):
+                    for scenario in scenarios:
+                        load(scenario, server, 10, 10)
+                        for level in levels:
+                            result = load(
+                                scenario,
+                                server,
+                                level,
+                                options["requests_per_connection"],
+                            )
+                            results.append(result)
+                            self.stdout.write(
+                                f"{scenario:<16}{server.name:<11}"
+                                f"{level:>8}{result.throughput:>9.0f}"
+                                f"{result.p50:>9.1f}{result.p95:>9.1f}"
+                                f"{result.p99:>9.1f}{result.errors:>8}"
+                            )
+            except RuntimeError as error:
+                raise CommandError(str(error))
+        return results
@@ -0,0 +1,62 @@
+from rest_framework.test import APIClient
+
+from api.renderers import orjson
+from benchmarks.common import temporary_database
+from benchmarks.serialization import (
+    PAGE_SIZES,
+    product_list_document,
+    run_json_codecs,
+)
+from benchmarks.subcommands.base import CodecBenchmark
+from store.seeding import seed_store
+
+
+class JsonBenchmark(CodecBenchmark):
+    """
+    Бенчмарк JSON-рендерера и парсера на ответах списка продуктов.
+
+    Для каждого размера страницы через ProductViewSet.list собирается
+    ответ, который многократно рендерится и разбирается стандартными
+    JSONRenderer/JSONParser и FastJSONRenderer/FastJSONParser.
+    """
+
+    name = "json"
+    help = (
+        "Сравнить время рендеринга и разбора ответов списка "
+        "продуктов стандартным JSON и orjson."
+    )
+
+    def run(self, options) -> list:
+        if orjson is None:
+            self.stderr.write(
+                "orjson не установлен, быстрые рендерер и парсер "
+                "используют стандартный JSON."
+            )
+        results = []
+        with temporary_database():
+            seed_store(
+                products=options["products"],
+                users=1,
+                carts=0,
+                seed=options["seed"],
+            )
+            client = APIClient()
+            self.stdout.write(
+                f"{'продуктов':>10}{'КБ':>8}{'render std':>12}"
+                f"{'render fast':>13}{'ускорение':>11}{'parse std':>11}"
+                f"{'parse fast':>12}"
+            )
+            for page_size in options["page_size"] or PAGE_SIZES:
+                result = run_json_codecs(
+                    product_list_document(client, page_size),
+                    repeat=options["repeat"],
+                    number=options["number"],
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"{result.page_size:>10}{result.size_bytes / 1024:>8.1f}"
+                    f"{result.render_std:>12.3f}{result.render_fast:>13.3f}"
+                    f"{result.render_speedup:>10.1f}x"
+                    f"{result.parse_std:>11.3f}{result.parse_fast:>12.3f}"
+                )
+        return results
@@ -0,0 +1,57 @@
+from rest_framework.test import APIClient
+
+from benchmarks.catalog import PAGES, cursor_path, run_catalog_request
+from benchmarks.common import temporary_database
+from benchmarks.subcommands.base import CatalogBenchmark
+
+
+class PaginationBenchmark(CatalogBenchmark):
+    """
+    Бенчмарк постраничной и курсорной пагинации каталога.
+
+    Для каждой страницы замеряется запрос ?page=N и запрос курсорной
+    пагинации, начинающийся с того же продукта. Постраничная
+    пагинация считает все продукты и пропускает (N - 1) * page_size
+    строк через OFFSET, курсорная выбирает страницу условием по
+    индексу (name, id).
+    """
+
+    name = "pagination"
+    help = (
+        "Сравнить задержки первой и глубоких страниц каталога при "
+        "постраничной и курсорной пагинации."
+    )
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--page",
+            action="append",
+            type=int,
+            help="Номер страницы (по умолчанию "
+            f"{', '.join(map(str, PAGES))}).",
+        )
+        parser.add_argument("--page-size", type=int, default=10)
+        super().add_arguments(parser)
+
+    def run(self, options) -> list:
+        results = []
+        with temporary_database(keep_current=options["use_existing_db"]):
+            products = self.seed_catalog(options)
+            client = APIClient()
+            page_size = options["page_size"]
+            self.write_header()
+            for page in options["page"] or PAGES:
+                for name, path in (
+                    (
+                        f"page={page}",
+                        f"/api/products/?page={page}&page_size={page_size}",
+                    ),
+                    (f"cursor@{page}", cursor_path(page, page_size)),
+                ):
+                    result = run_catalog_request(
+                        client, name, path, options["iterations"], products
+                    )
+                    results.append(result)
+                    self.write_result(result)
+        return results
@@ -0,0 +1,46 @@
+from rest_framework.test import APIClient
+
+from benchmarks.catalog import SEARCH_QUERIES, run_catalog_request, search_path
+from benchmarks.common import temporary_database
+from benchmarks.subcommands.base import CatalogBenchmark
+
+
+class SearchBenchmark(CatalogBenchmark):
+    """
+    Бенчмарк полнотекстового поиска продуктов.
+
+    Поисковый индекс заполняется seed_store; для БД, заполненной
+    иначе, его нужно перестроить командой rebuild_search_index.
+    """
+
+    name = "search"
+    help = "Измерить задержки полнотекстового поиска продуктов."
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument(
+            "--query",
+            action="append",
+            help="Поисковый запрос (по умолчанию запросы из "
+            "SEARCH_QUERIES).",
+        )
+        parser.add_argument("--page-size", type=int, default=10)
+        super().add_arguments(parser)
+
+    def run(self, options) -> list:
+        results = []
+        with temporary_database(keep_current=options["use_existing_db"]):
+            products = self.seed_catalog(options)
+            client = APIClient()
+            self.write_header()
+            for query in options["query"] or SEARCH_QUERIES:
+                result = run_catalog_request(
+                    client,
+                    query,
+                    search_path(query, options["page_size"]),
+                    options["iterations"],
+                    products,
+                )
+                results.append(result)
+                self.write_result(result)
+        return results
@@ -0,0 +1,86 @@
+from django.core.management.base import CommandError
+
+from benchmarks.common import temporary_database
+from benchmarks.serialization import (
+    PAGE_SIZES,
+    product_list_mismatches,
+    run_product_serializers,
+)
+from benchmarks.subcommands.base import CodecBenchmark
+from store.models import Product
+from store.seeding import seed_store
+
+
+class SerializersBenchmark(CodecBenchmark):
+    """
+    Проверка и бенчмарк лёгкого сериализатора списка продуктов.
+
+    Часть продуктов получает файлы изображений со ссылками в
+    image_urls либо без них. Сначала сравниваются JSON-представления
+    каждого продукта обоими сериализаторами, при расхождении команда
+    завершается ошибкой. Затем для каждого размера страницы
+    замеряются чтение из БД и сериализация обоими способами.
+    """
+
+    name = "serializers"
+    help = (
+        "Проверить совпадение и сравнить скорость "
+        "ProductListSerializer и ProductListValuesSerializer."
+    )
+
+    def run(self, options) -> list:
+        results = []
+        with temporary_database():
+            seed_store(
+                products=options["products"],
+                users=1,
+                carts=0,
+                seed=options["seed"],
+            )
+            self.add_images()
+            mismatches = product_list_mismatches(Product.objects.all())
+            if mismatches:
+                raise CommandError(
+                    "Представления продуктов различаются: "
+                    f"{', '.join(map(str, mismatches[:20]))}."
+                )
+            self.stdout.write(
+                self.style.SUCCESS("Представления всех продуктов совпадают.")
+            )
+            self.stdout.write(
+                f"{'продуктов':>10}{'модели: БД':>12}{'сериал.':>10}"
+                f"{'values: БД':>12}{'сериал.':>10}{'ускорение':>11}"
+            )
+            for page_size in options["page_size"] or PAGE_SIZES:
+                result = run_product_serializers(
+                    page_size,
+                    repeat=options["repeat"],
+                    number=options["number"],
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"{result.page_size:>10}{result.model_fetch:>12.3f}"
+                    f"{result.model_serialize:>10.3f}"
+                    f"{result.values_fetch:>12.3f}"
+                    f"{result.values_serialize:>10.3f}"
+                    f"{result.speedup:>10.1f}x"
+                )
+        return results
+
+    @staticmethod
+    def add_images() -> None:
+        """
+        Назначить изображения части продуктов.
+
+        Каждому третьему продукту назначаются файлы без ссылок в
+        image_urls, каждому шестому ссылки затем сохраняются через
+        Product.save.
+        """
+        pks = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+        Product.objects.filter(pk__in=pks[::3]).update(
+            thumbnail="images/thumbnails/превью товара.jpg",
+            medium_image="images/medium/medium image.png",
+            image_urls={},
+        )
+        for product in Product.objects.filter(pk__in=pks[::6]):
+            product.save(update_fields=("image_urls",))
@@ -0,0 +1,103 @@
+from collections import Counter
+from threading import Lock
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+CATALOG_NAMESPACE = "catalog"
+CATEGORY_TREE_NAMESPACE = "category_tree"
+
+
+class CacheStats:
+    """
+    Потокобезопасные счётчики попаданий и промахов кэша по пространствам
+    имён в пределах процесса.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._hits = Counter()
+        self._misses = Counter()
+
+    def hit(self, namespace: str) -> None:
+        with self._lock:
+            self._hits[namespace] += 1
+
+    def miss(self, namespace: str) -> None:
+        with self._lock:
+            self._misses[namespace] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """
+        Получить текущие значения счётчиков.
+        :return: Словарь вида {namespace: {"hits": ..., "misses": ...}}.
+        """
+        with self._lock:
+            return {
+                namespace: dict(
+                    hits=self._hits[namespace], misses=self._misses[namespace]
+                )
+                for namespace in self._hits.keys() | self._misses.keys()
+            }
+
+
+cache_stats = CacheStats()
+
+
+def get_cache() -> BaseCache:
+    """
+    Получить кэш, используемый для версионированных данных.
+
+    Алиас кэша задаётся настройкой CATALOG_CACHE_ALIAS.
+    """
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def get_version(namespace: str) -> int:
+    """
+    Получить текущую версию пространства имён кэша.
+
+    Версия — это время последнего изменения данных в наносекундах. Если
+    версия отсутствует в кэше (например, была вытеснена), она создаётся
+    заново из текущего времени, поэтому ранее закэшированные записи
+    никогда не будут использованы повторно.
+    :param namespace: Пространство имён.
+    :return: Версия пространства имён.
+    """
+    cache = get_cache()
+    key = f"{namespace}:version"
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(namespace: str) -> int:
+    """
+    Асинхронный вариант get_version.
+    :param namespace: Пространство имён.
+    :return: Версия пространства имён.
+    """
+    cache = get_cache()
+    key = f"{namespace}:version"
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(namespace: str) -> None:
+    """
+    Сменить версию пространства имён после фиксации текущей транзакции.
+
+    Смена версии откладывается до фиксации транзакции, чтобы параллельный
+    запрос не закэшировал под новой версией ещё не изменённые данные.
+    :param namespace: Пространство имён.
+    """
+    transaction.on_commit(
+        lambda: get_cache().set(f"{namespace}:version", time_ns(), None)
+    )
@@ -6,6 +6,14 @@ class ErrorMessages(StrEnum):
     REQUESTED_OBJECT_NOT_FOUND_IN_CART = (
         REQUESTED_OBJECT_NOT_FOUND + " в вашей корзине"
     )
+    REQUESTED_PRODUCTS_NOT_FOUND = "Запрашиваемые продукты не найдены"
+    INVALID_NON_NEGATIVE_INTEGER = "Ожидается целое неотрицательное число"
+
+
+class CartOperations(StrEnum):
+    ADD = "add"
+    UPDATE = "update"
+    DELETE = "delete"
 
 
 class NumericalValues(IntEnum):
@@ -15,3 +23,9 @@ class NumericalValues(IntEnum):
     PRICE_MIN_VALUE = 0
     ITEM_MIN_QUANTITY_IN_CART = 1
     ITEM_MAX_QUANTITY_IN_CART = 100
+    CART_BATCH_MAX_OPERATIONS = 100
+    PAGE_MAX_SIZE = 100
+    JOB_STATUS_MAX_LENGTH = 16
+    IMAGE_JOB_MAX_ATTEMPTS = 3
+    EXPORT_CHUNK_SIZE = 2000
+    EXPORT_BUFFER_SIZE = 64 * 1024
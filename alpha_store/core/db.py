@@ -0,0 +1,136 @@
+import random
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+_use_primary = ContextVar("use_primary", default=False)
+
+
+def configure_sqlite_connection(sender, connection, **kwargs) -> None:
+    """
+    Обработчик сигнала connection_created, выполняющий SQLITE_PRAGMAS
+    для нового соединения SQLite.
+
+    journal_mode=WAL сохраняется в самом файле БД, а synchronous и
+    busy_timeout действуют только в пределах соединения. PRAGMA
+    выполняются напрямую через драйвер и не попадают в учёт запросов.
+    """
+    if connection.vendor != "sqlite":
+        return
+    for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """
+    Выполнить блок с чтением каталога только из основной БД.
+
+    Состояние хранится в ContextVar, поэтому действует и в потоках,
+    запущенных через sync_to_async.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+@contextmanager
+def write_atomic(using: str | None = None) -> Iterator[None]:
+    """
+    Выполнить блок изменения данных в транзакции.
+
+    Транзакции SQLite по умолчанию начинаются с BEGIN DEFERRED и не
+    блокируют запись, пока не изменят данные. Внешняя транзакция этого
+    блока начинается с BEGIN IMMEDIATE: блокировка на запись берётся
+    сразу, и конкурирующий писатель ждёт её в пределах busy_timeout, а
+    не получает ошибку при повышении блокировки после чтения. Вложенный
+    блок и другие СУБД работают как transaction.atomic.
+    :param using: Алиас БД, по умолчанию основная БД.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    with ExitStack() as stack:
+        if connection.vendor == "sqlite" and not connection.in_atomic_block:
+            # Параметры соединения, включая transaction_mode, читаются из
+            # настроек при подключении, поэтому режим меняется после него.
+            connection.ensure_connection()
+            mode = connection.transaction_mode
+            connection.transaction_mode = "IMMEDIATE"
+            try:
+                stack.enter_context(transaction.atomic(using=using))
+            finally:
+                connection.transaction_mode = mode
+        else:
+            stack.enter_context(transaction.atomic(using=using))
+        yield
+
+
+@contextmanager
+def capture_queries() -> Iterator[list[dict]]:
+    """
+    Собрать запросы ко всем БД, включая реплики, выполненные в блоке.
+
+    Список запросов заполняется при выходе из блока.
+    """
+    queries = []
+    with ExitStack() as stack:
+        captured = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        yield queries
+    for context in captured:
+        queries.extend(context.captured_queries)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор БД, направляющий чтение моделей каталога на реплики.
+
+    Чтение моделей из CATALOG_MODELS распределяется случайно между
+    REPLICA_DATABASES, все остальные модели и любые записи работают с
+    основной БД. Чтение каталога также выполняется на основной БД внутри
+    блока use_primary и внутри транзакции основной БД, чтобы изменения
+    корзины проверяли продукты по актуальным данным. Связанные объекты
+    продукта, загруженного с реплики, читаются с той же реплики.
+    Миграции применяются только к основной БД.
+    """
+
+    CATALOG_MODELS = frozenset(
+        ("store.product", "store.category", "store.subcategory")
+    )
+
+    def db_for_read(self, model, **hints) -> str:
+        replicas = settings.REPLICA_DATABASES
+        if (
+            not replicas
+            or model._meta.label_lower not in self.CATALOG_MODELS
+            or _use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in replicas:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(
+        self, db, app_label, model_name=None, **hints
+    ) -> bool | None:
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
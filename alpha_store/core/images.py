@@ -0,0 +1,49 @@
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+DERIVATIVE_SIZES = {
+    "thumbnail": (200, 200),
+    "medium_image": (600, 600),
+    "large_image": (1200, 1200),
+}
+WEBP_OPTIONS = dict(format="WEBP", quality=80, method=6)
+JPEG_OPTIONS = dict(format="JPEG", quality=85, optimize=True, progressive=True)
+
+
+def render_derivatives(
+    source: bytes, max_pixels: int
+) -> dict[str, tuple[bytes, str]]:
+    """
+    Построить уменьшенные копии изображения для всех размеров продукта.
+
+    Функция не зависит от Django и выполняется в отдельном процессе.
+    Изображение поворачивается согласно EXIF, вписывается в размеры из
+    DERIVATIVE_SIZES без увеличения и сохраняется в WebP, а если Pillow
+    собран без его поддержки — в прогрессивный JPEG.
+    :param source: Содержимое исходного изображения.
+    :param max_pixels: Максимальное количество пикселей исходника.
+    :return: Словарь вида {поле: (содержимое, расширение файла)}.
+    """
+    with Image.open(BytesIO(source)) as image:
+        if image.width * image.height > max_pixels:
+            raise ValueError(
+                f"Изображение {image.width}x{image.height} превышает "
+                f"допустимые {max_pixels} пикселей"
+            )
+        image = ImageOps.exif_transpose(image)
+        use_webp = features.check("webp")
+        image = image.convert(
+            "RGBA" if use_webp and image.mode in ("RGBA", "LA", "P") else "RGB"
+        )
+        options, extension = (
+            (WEBP_OPTIONS, "webp") if use_webp else (JPEG_OPTIONS, "jpg")
+        )
+        derivatives = dict()
+        for field, size in DERIVATIVE_SIZES.items():
+            derivative = image.copy()
+            derivative.thumbnail(size, Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            derivative.save(buffer, **options)
+            derivatives[field] = (buffer.getvalue(), extension)
+        return derivatives
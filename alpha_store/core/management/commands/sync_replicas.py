@@ -0,0 +1,37 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    """
+    Команда для копирования основной БД SQLite в файлы реплик.
+
+    Предназначена для локальной проверки маршрутизации чтения каталога на
+    реплики: каждый вызов переносит в реплики снимок основной БД через
+    backup API SQLite, а изменения, сделанные после него, видны только на
+    основной БД, как при отставании репликации. Реплики PostgreSQL
+    поддерживаются средствами самого PostgreSQL.
+    """
+
+    help = "Скопировать основную БД SQLite в файлы реплик REPLICA_DATABASES."
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != "sqlite":
+            raise CommandError(
+                "Синхронизация поддерживается только для SQLite."
+            )
+        if not settings.REPLICA_DATABASES:
+            raise CommandError("Реплики не заданы переменной DB_REPLICAS.")
+        primary.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            connections[alias].close()
+            name = connections[alias].settings_dict["NAME"]
+            with sqlite3.connect(name) as replica:
+                primary.connection.backup(replica)
+            replica.close()
+            self.stdout.write(f"{alias}: {name}")
+        self.stdout.write(self.style.SUCCESS("Реплики синхронизированы."))
@@ -0,0 +1,239 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+from typing import Iterator
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+@dataclass
+class RequestMetrics:
+    """
+    Показатели одного запроса: количество и время запросов к БД, а также
+    время работы сериализаторов в секундах.
+    """
+
+    queries: int = 0
+    db_time: float = 0.0
+    serializer_time: float = 0.0
+    serializer_depth: int = 0
+
+
+_current_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин и набором меток.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series: dict[tuple, list] = dict()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.setdefault(
+            labels, [[0] * (len(self.buckets) + 1), 0.0, 0]
+        )
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_names: tuple[str, ...]) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = ",".join(
+                f'{name}="{_escape(value)}"'
+                for name, value in zip(label_names, labels)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(
+                (*map(str, self.buckets), "+Inf"), counts
+            ):
+                cumulative += bucket_count
+                yield (
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+            yield f"{self.name}_count{{{label_text}}} {count}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасные гистограммы показателей запросов в пределах процесса.
+
+    Показатели группируются по представлению и действию, обработавшим
+    запрос, и отдаются в текстовом формате Prometheus.
+    """
+
+    label_names = ("view", "method")
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = dict(
+                total=Histogram(
+                    "alpha_store_request_duration_seconds",
+                    "Общее время обработки запроса.",
+                    LATENCY_BUCKETS,
+                ),
+                db_time=Histogram(
+                    "alpha_store_request_db_duration_seconds",
+                    "Время выполнения запросов к БД.",
+                    LATENCY_BUCKETS,
+                ),
+                serializer_time=Histogram(
+                    "alpha_store_request_serializer_duration_seconds",
+                    "Время работы сериализаторов.",
+                    LATENCY_BUCKETS,
+                ),
+                queries=Histogram(
+                    "alpha_store_request_db_queries",
+                    "Количество запросов к БД.",
+                    QUERY_BUCKETS,
+                ),
+            )
+
+    def observe(
+        self, view: str, method: str, metrics: RequestMetrics, total: float
+    ) -> None:
+        """
+        Учесть показатели завершённого запроса.
+        :param view: Представление и действие, например ProductViewSet.cart.
+        :param method: HTTP-метод запроса.
+        :param metrics: Показатели запроса.
+        :param total: Общее время обработки запроса в секундах.
+        """
+        labels = (view, method)
+        with self._lock:
+            self._histograms["total"].observe(labels, total)
+            self._histograms["db_time"].observe(labels, metrics.db_time)
+            self._histograms["serializer_time"].observe(
+                labels, metrics.serializer_time
+            )
+            self._histograms["queries"].observe(labels, metrics.queries)
+
+    def render(self, cache_stats: dict[str, dict[str, int]]) -> str:
+        """
+        Получить показатели в текстовом формате Prometheus.
+        :param cache_stats: Счётчики попаданий и промахов кэша.
+        """
+        with self._lock:
+            lines = [
+                line
+                for histogram in self._histograms.values()
+                for line in histogram.render(self.label_names)
+            ]
+        for name in ("hits", "misses"):
+            metric = f"alpha_store_cache_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(
+                f'{metric}{{namespace="{_escape(namespace)}"}} {stats[name]}'
+                for namespace, stats in sorted(cache_stats.items())
+            )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _track_query(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += perf_counter() - start
+
+
+def track_connection_queries(connection, **kwargs) -> None:
+    """
+    Обработчик сигнала connection_created, добавляющий учёт запросов к
+    каждому новому подключению к БД.
+
+    Подключения Django привязаны к потоку, а асинхронный ORM выполняет
+    запросы в отдельных потоках, поэтому учёт устанавливается на все
+    подключения, а запрос, к которому относятся показатели, определяется
+    контекстной переменной.
+    """
+    if _track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_track_query)
+
+
+@contextmanager
+def collect_request_metrics() -> Iterator[RequestMetrics]:
+    """
+    Собрать показатели запросов к БД и сериализаторов внутри блока.
+
+    Учитываются запросы подключений, к которым применён
+    track_connection_queries, в том числе выполненные через
+    sync_to_async.
+    """
+    metrics = RequestMetrics()
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def serializer_timer() -> Iterator[None]:
+    """
+    Учесть время работы сериализатора в показателях текущего запроса.
+
+    Вложенные сериализаторы не учитываются повторно.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += perf_counter() - start
+
+
+def instrument_serializers() -> None:
+    """
+    Включить учёт времени получения данных сериализаторов DRF.
+    """
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for serializer_class in (Serializer, ListSerializer):
+        data = serializer_class.data
+        if getattr(data.fget, "instrumented", False):
+            continue
+
+        def timed_data(self, fget=data.fget):
+            with serializer_timer():
+                return fget(self)
+
+        timed_data.instrumented = True
+        serializer_class.data = property(timed_data, doc=data.__doc__)
@@ -9,6 +9,7 @@ class BaseNameSlugModel(models.Model):
         max_length=Nv.NAME_MAX_LENGTH,
     )
     slug = models.SlugField("Слаг", max_length=Nv.NAME_MAX_LENGTH)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     class Meta:
         abstract = True
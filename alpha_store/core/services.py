@@ -1,39 +1,68 @@
-from typing import TypeVar, Type
+import re
+from typing import Iterable, Iterator, TypeVar, Type
 
-from django.db.models import Model
+from django.db.models import F, Model, QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.utils.text import compress_sequence
 from rest_framework import status
 from rest_framework.request import Request
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
 
-from core.constants import ErrorMessages as Em
-from store.models import User, ShoppingCart, ShoppingCartItem
+from core.cache import CATEGORY_TREE_NAMESPACE, get_cache, get_version
+from core.constants import (
+    CartOperations,
+    ErrorMessages as Em,
+    NumericalValues as Nv,
+)
+from core.db import write_atomic
+from store.models import User, Product, ShoppingCart, ShoppingCartItem
 
 UserType = TypeVar("UserType", bound=User)
 CartType = TypeVar("CartType", bound=ShoppingCart)
 
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "price",
+    "category",
+    "subcategory",
+    *Product.IMAGE_FIELDS,
+)
+GZIP_PATTERN = re.compile(r"\bgzip\b")
+
 
 def _add_to_shopping_cart(
-    pk: int,
+    product: Product,
     request: Request,
     serializer_class: Type[Serializer],
     quantity: int,
 ) -> Response:
     """
     Добавление продукта в корзину пользователю.
-    :param pk: PK продукта.
+
+    Продукт уже загружен представлением, поэтому сериализатор проверяет
+    только количество и не запрашивает продукт повторно. Корзина
+    определяется в той же транзакции, что и добавление продукта.
+    :param product: Объект добавляемого продукта.
     :param request: HTTP-запрос.
     :param serializer_class: Используемый сериализатор.
     :param quantity: Количество добавляемого продукта.
     :return: HTTP-ответ с данными о добавленном продукте и статусом 201.
     """
-    shopping_cart = get_or_create_shopping_cart(user=request.user)
     serializer = serializer_class(
-        data=dict(cart=shopping_cart.pk, product=pk, quantity=quantity),
+        data=dict(quantity=quantity),
         context=dict(request=request),
+        partial=True,
     )
     serializer.is_valid(raise_exception=True)
-    serializer.save()
+    with write_atomic():
+        serializer.save(product=product)
+        refresh_shopping_cart_totals(get_request_shopping_cart(request))
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
@@ -48,14 +77,35 @@ def _delete_from_shopping_cart(
     :return: HTTP-ответ со статусом 204 при успешном удалении, 400 — если
     продукт не был найден в корзине.
     """
-    if not model.objects.filter(
-        cart=request.user.shopping_cart.first(), pk=pk
-    ).exists():
-        return Response(
-            status=status.HTTP_400_BAD_REQUEST,
-            data=dict(message=Em.REQUESTED_OBJECT_NOT_FOUND),
-        )
-    model.objects.filter(cart=request.user.cart.first(), pk=pk).delete()
+    with write_atomic():
+        shopping_cart = get_request_shopping_cart(request, create=False)
+        deleted, _ = model.objects.filter(
+            cart=shopping_cart, product=pk
+        ).delete()
+        if not deleted:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data=dict(message=Em.REQUESTED_OBJECT_NOT_FOUND),
+            )
+        refresh_shopping_cart_totals(shopping_cart)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _clear_shopping_cart(request: Request) -> Response:
+    """
+    Очистка корзины пользователя.
+
+    Элементы корзины удаляются одним запросом DELETE без загрузки в память,
+    после чего итоги корзины обнуляются.
+    :param request: HTTP-запрос.
+    :return: HTTP-ответ со статусом 204.
+    """
+    shopping_cart = get_request_shopping_cart(request, create=False)
+    if shopping_cart is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    with write_atomic():
+        ShoppingCartItem.objects.filter(cart=shopping_cart).delete()
+        refresh_shopping_cart_totals(shopping_cart)
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -68,18 +118,54 @@ def get_or_create_shopping_cart(user: UserType) -> CartType:
     корзину каждому существующему пользователю, а создавать её только по
     мере необходимости.
 
+    Корзина создаётся либо находится одним запросом INSERT ... ON CONFLICT
+    по уникальному ограничению на пользователя, поэтому конкурентные
+    запросы не создадут вторую корзину. У возвращаемого объекта актуальны
+    только pk и user, итоги корзины не загружаются.
+
     :param user: Объект пользователя, делающего запрос.
     :return: Объект модели ShoppingCart.
     """
-    try:
-        shopping_cart = ShoppingCart.objects.get(user=user)
-    except ShoppingCart.DoesNotExist:
-        shopping_cart = ShoppingCart.objects.create(user=user)
+    shopping_cart = ShoppingCart(user=user)
+    ShoppingCart.objects.bulk_create(
+        (shopping_cart,),
+        update_conflicts=True,
+        unique_fields=("user",),
+        update_fields=("user",),
+    )
+    return shopping_cart
+
+
+def get_request_shopping_cart(
+    request: Request, create: bool = True
+) -> CartType | None:
+    """
+    Получение корзины пользователя, сделавшего запрос.
+
+    Корзина определяется один раз за запрос и сохраняется в атрибуте
+    запроса, поэтому сервисы и сериализаторы, работающие с ней в рамках
+    одного запроса, не обращаются за корзиной к БД повторно.
+    :param request: HTTP-запрос.
+    :param create: Создать корзину, если у пользователя её нет.
+    :return: Объект модели ShoppingCart, либо None, если корзины нет и
+    create=False.
+    """
+    shopping_cart = getattr(request, "_shopping_cart", None)
+    if shopping_cart is None:
+        if create:
+            shopping_cart = get_or_create_shopping_cart(user=request.user)
+        else:
+            shopping_cart = (
+                ShoppingCart.objects.filter(user=request.user)
+                .only("pk", "user")
+                .first()
+            )
+        request._shopping_cart = shopping_cart
     return shopping_cart
 
 
 def _adjust_quantity(
-    pk: int,
+    product: Product,
     request: Request,
     serializer_class: Type[Serializer],
     quantity: int,
@@ -93,27 +179,278 @@ def _adjust_quantity(
     В случае нахождения товара его количество в корзине изменяется на заданное,
     а также возвращается ответ со статусом 200 и обновленными данными о
     продукте в корзине.
-    :param pk: PK продукта.
+    :param product: Объект продукта, загруженный представлением.
     :param request: HTTP-запрос.
     :param serializer_class: Класс используемого сериализатора.
     :param quantity: Запрошенное количество продукта для изменения.
     :return: HTTP-ответ со статусом 200 и обновленными данными о продукте, либо
     400 и соответствующим сообщением.
     """
-    shopping_cart = get_or_create_shopping_cart(user=request.user)
-    try:
-        item = shopping_cart.cart_items.get(product=pk)
-    except ShoppingCartItem.DoesNotExist:
-        return Response(
-            status=status.HTTP_400_BAD_REQUEST,
-            data=dict(message=Em.REQUESTED_OBJECT_NOT_FOUND_IN_CART),
+    with write_atomic():
+        shopping_cart = get_request_shopping_cart(request)
+        try:
+            item = shopping_cart.cart_items.get(product=product)
+        except ShoppingCartItem.DoesNotExist:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data=dict(message=Em.REQUESTED_OBJECT_NOT_FOUND_IN_CART),
+            )
+        item.product = product
+        serializer = serializer_class(
+            item,
+            data=dict(quantity=quantity),
+            context=dict(request=request),
+            partial=True,
         )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        refresh_shopping_cart_totals(shopping_cart)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+def refresh_shopping_cart_totals(shopping_cart: CartType) -> None:
+    """
+    Пересчёт хранимых итогов корзины после изменения её состава.
+
+    Должен вызываться внутри той же транзакции, что и изменение элементов
+    корзины, чтобы итоги никогда не расходились с её содержимым.
+    :param shopping_cart: Объект корзины пользователя.
+    """
+    ShoppingCart.objects.filter(pk=shopping_cart.pk).refresh_totals(
+        activity=True
+    )
 
+
+def _apply_shopping_cart_batch(
+    request: Request,
+    serializer_class: Type[Serializer],
+    response_serializer_class: Type[Serializer],
+    queryset: QuerySet,
+) -> Response:
+    """
+    Пакетное изменение корзины пользователя.
+
+    Все продукты из запроса проверяются одним запросом к БД в той же
+    транзакции, что и изменение корзины, после чего операции применяются к
+    текущему составу корзины в памяти и сохраняются при помощи
+    bulk_create, bulk_update и одного DELETE. Элемент, добавленный
+    конкурентным запросом после чтения корзины, обновляется через
+    INSERT ... ON CONFLICT вместо ошибки уникальности.
+    :param request: HTTP-запрос со списком операций.
+    :param serializer_class: Сериализатор одной операции.
+    :param response_serializer_class: Сериализатор корзины для ответа.
+    :param queryset: QuerySet корзин для построения ответа.
+    :return: HTTP-ответ со статусом 200 и обновлённой корзиной, либо 400 и
+    списком не найденных продуктов.
+    """
     serializer = serializer_class(
-        data=dict(cart=shopping_cart.pk, product=pk, quantity=quantity),
-        context=dict(request=request),
-        partial=True,
+        data=request.data,
+        many=True,
+        allow_empty=False,
+        max_length=Nv.CART_BATCH_MAX_OPERATIONS,
     )
     serializer.is_valid(raise_exception=True)
-    serializer.update(instance=item, validated_data=serializer.validated_data)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    operations = serializer.validated_data
+
+    product_ids = {operation["product"] for operation in operations}
+    with write_atomic():
+        missing = product_ids - set(
+            Product.objects.filter(pk__in=product_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        if missing:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data=dict(
+                    message=Em.REQUESTED_PRODUCTS_NOT_FOUND,
+                    products=sorted(missing),
+                ),
+            )
+
+        shopping_cart = get_request_shopping_cart(request)
+        items = {
+            item.product_id: item
+            for item in shopping_cart.cart_items.filter(
+                product__in=product_ids
+            ).select_for_update()
+        }
+        quantities = {
+            product_id: item.quantity for product_id, item in items.items()
+        }
+        for operation in operations:
+            product_id = operation["product"]
+            if operation["op"] == CartOperations.DELETE:
+                quantities[product_id] = None
+            elif operation["op"] == CartOperations.UPDATE:
+                quantities[product_id] = operation["quantity"]
+            else:
+                quantities[product_id] = min(
+                    (quantities.get(product_id) or 0) + operation["quantity"],
+                    Nv.ITEM_MAX_QUANTITY_IN_CART,
+                )
+
+        to_create, to_update, to_delete = [], [], []
+        for product_id, quantity in quantities.items():
+            item = items.get(product_id)
+            if quantity is None:
+                if item is not None:
+                    to_delete.append(product_id)
+            elif item is None:
+                to_create.append(
+                    ShoppingCartItem(
+                        cart=shopping_cart,
+                        product_id=product_id,
+                        quantity=quantity,
+                    )
+                )
+            elif item.quantity != quantity:
+                item.quantity = quantity
+                to_update.append(item)
+
+        if to_create:
+            ShoppingCartItem.objects.bulk_create(
+                to_create,
+                update_conflicts=True,
+                unique_fields=("cart", "product"),
+                update_fields=("quantity",),
+            )
+        if to_update:
+            ShoppingCartItem.objects.bulk_update(to_update, ("quantity",))
+        if to_delete:
+            shopping_cart.cart_items.filter(product__in=to_delete).delete()
+        refresh_shopping_cart_totals(shopping_cart)
+
+    return Response(
+        response_serializer_class(
+            queryset.get(pk=shopping_cart.pk), context=dict(request=request)
+        ).data,
+        status=status.HTTP_200_OK,
+    )
+
+
+def _get_category_tree(
+    request: Request, serializer_class: Type[Serializer], queryset: QuerySet
+) -> HttpResponse:
+    """
+    Получение дерева категорий в виде заранее построенного JSON-документа.
+
+    Документ строится один раз для текущей версии дерева категорий и
+    хранится в кэше, а версия служит ETag ответа.
+    :param request: HTTP-запрос.
+    :param serializer_class: Сериализатор категории для дерева.
+    :param queryset: QuerySet категорий с подкатегориями и количеством
+    продуктов.
+    :return: HTTP-ответ с деревом категорий, либо 304, если дерево не
+    изменилось.
+    """
+    version = get_version(CATEGORY_TREE_NAMESPACE)
+    etag = quote_etag(f"{CATEGORY_TREE_NAMESPACE}-{version}")
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cache = get_cache()
+        key = f"{CATEGORY_TREE_NAMESPACE}:{version}"
+        document = cache.get(key)
+        if document is None:
+            document = JSONRenderer().render(
+                serializer_class(
+                    queryset, many=True, context=dict(request=request)
+                ).data
+            )
+            cache.set(key, document)
+        response = HttpResponse(document, content_type="application/json")
+    response.headers["ETag"] = etag
+    return response
+
+
+def _export_rows(queryset: QuerySet, serializer: Serializer) -> Iterator[dict]:
+    """
+    Получить строки выгрузки продуктов без создания объектов модели.
+
+    Категория и подкатегория выбираются тем же запросом через JOIN, а
+    продукты читаются из БД порциями по EXPORT_CHUNK_SIZE. Если ссылки на
+    изображения не сохранены в image_urls, они строятся из имён файлов
+    методом build_image_urls сериализатора, как в списке продуктов.
+    """
+    products = (
+        queryset.order_by("pk")
+        .values(
+            "id",
+            "name",
+            "slug",
+            "price",
+            "image_urls",
+            *Product.IMAGE_FIELDS,
+            category_slug=F("category__slug"),
+            subcategory_slug=F("subcategory__slug"),
+        )
+        .iterator(chunk_size=Nv.EXPORT_CHUNK_SIZE)
+    )
+    for product in products:
+        images = product["image_urls"] or serializer.build_image_urls(product)
+        yield dict(
+            id=product["id"],
+            name=product["name"],
+            slug=product["slug"],
+            price=product["price"],
+            category=product["category_slug"],
+            subcategory=product["subcategory_slug"],
+            **{field: images.get(field) for field in Product.IMAGE_FIELDS},
+        )
+
+
+def _buffered(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """
+    Объединить мелкие части ответа в блоки не меньше size байт.
+    """
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _export_products(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[Serializer],
+) -> StreamingHttpResponse:
+    """
+    Потоковая выгрузка каталога продуктов.
+
+    Формат выгрузки определяется рендерером, выбранным DRF по параметру
+    format либо заголовку Accept. Строки формируются по мере чтения из БД
+    и отдаются клиенту блоками, поэтому потребление памяти не зависит от
+    размера каталога. Если клиент поддерживает gzip, ответ сжимается на лету.
+    :param request: HTTP-запрос.
+    :param queryset: QuerySet выгружаемых продуктов.
+    :param serializer_class: Сериализатор, строящий ссылки на изображения
+    по именам файлов.
+    :return: Потоковый HTTP-ответ с продуктами в порядке PK.
+    """
+    renderer = request.accepted_renderer
+    rows = _export_rows(queryset, serializer_class())
+    content = _buffered(
+        renderer.render_rows(rows, EXPORT_FIELDS),
+        Nv.EXPORT_BUFFER_SIZE,
+    )
+    gzipped = GZIP_PATTERN.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if gzipped:
+        content = compress_sequence(content)
+    response = StreamingHttpResponse(
+        content,
+        content_type=f"{renderer.media_type}; charset={renderer.charset}",
+    )
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="products.{renderer.format}"'
+    )
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+    return response
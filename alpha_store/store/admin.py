@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from store.models import Product, Category, SubCategory
+from store.models import Product, Category, ImageDerivativeJob, SubCategory
 
 
 class ProductInline(admin.TabularInline):
@@ -15,6 +15,7 @@ class ProductInline(admin.TabularInline):
         "price",
         "category",
         "subcategory",
+        "source_image",
         "thumbnail",
         "medium_image",
         "large_image",
@@ -63,3 +64,19 @@ class SubCategoryAdmin(admin.ModelAdmin):
         "slug",
         "category",
     )
+
+
+@admin.register(ImageDerivativeJob)
+class ImageDerivativeJobAdmin(admin.ModelAdmin):
+    """
+    Базовая админ-панель для модели ImageDerivativeJob.
+    """
+
+    list_display = (
+        "product",
+        "status",
+        "attempts",
+        "updated_at",
+    )
+    list_filter = ("status",)
+    raw_id_fields = ("product",)
@@ -0,0 +1,234 @@
+import multiprocessing
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    ProcessPoolExecutor,
+    wait,
+)
+from datetime import timedelta
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.cache import CATALOG_NAMESPACE, bump_version
+from core.constants import NumericalValues as Nv
+from core.db import write_atomic
+from core.images import render_derivatives
+from store.models import ImageDerivativeJob, Product
+
+Status = ImageDerivativeJob.Status
+SOURCE_FIELDS = ("source_image", *reversed(Product.IMAGE_FIELDS))
+
+
+def get_executor(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Создать пул процессов для построения изображений.
+
+    Процессы запускаются через spawn, чтобы не наследовать соединения с БД
+    и состояние Django родительского процесса.
+    :param workers: Количество процессов, по умолчанию — число ядер.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def get_source_field(product: Product) -> str | None:
+    """
+    Найти поле с изображением, из которого строятся копии продукта.
+
+    Предпочтение отдаётся исходному изображению, а для продуктов без него
+    используется наибольшее из имеющихся.
+    """
+    return next(
+        (field for field in SOURCE_FIELDS if getattr(product, field)), None
+    )
+
+
+def render_products(
+    executor: Executor, products: Iterable[Product], window: int | None = None
+) -> Iterator[tuple[Product, str, object]]:
+    """
+    Построить копии изображений продуктов в пуле процессов.
+
+    Файлы читаются из хранилища в текущем процессе, поэтому пулу не нужен
+    доступ к хранилищу и настройкам Django. Исходник продукта читается
+    только перед передачей в пул, а в обработке одновременно находится не
+    больше window продуктов, поэтому в памяти хранятся исходники лишь
+    обрабатываемых продуктов, а не всего пакета.
+    :param window: Наибольшее количество продуктов в обработке, по
+        умолчанию — число ядер.
+    :return: Кортежи (продукт, поле исходника, словарь копий либо ошибка)
+        в порядке завершения.
+    """
+    max_pixels = settings.IMAGE_SOURCE_MAX_PIXELS
+    window = window or os.cpu_count() or 1
+    futures = dict()
+
+    def completed():
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            product, field = futures.pop(future)
+            error = future.exception()
+            yield product, field, error or future.result()
+
+    for product in products:
+        field = get_source_field(product)
+        try:
+            with getattr(product, field).open("rb") as file:
+                source = file.read()
+        except Exception as error:
+            yield product, field, error
+            continue
+        future = executor.submit(render_derivatives, source, max_pixels)
+        futures[future] = product, field
+        if len(futures) >= window:
+            yield from completed()
+    while futures:
+        yield from completed()
+
+
+def apply_derivatives(
+    product: Product, source_field: str, derivatives: dict
+) -> bool:
+    """
+    Записать копии изображений и атомарно переключить на них продукт.
+
+    Копии сохраняются под новыми именами, после чего ссылки на них
+    записываются одним UPDATE при условии, что исходник продукта не
+    изменился. Клиенты видят либо старый, либо новый набор изображений;
+    старые файлы удаляются только после фиксации транзакции.
+    :return: False, если исходник был заменён во время обработки.
+    """
+    source_name = getattr(product, source_field).name
+    old_names = {
+        getattr(product, field).name
+        for field in Product.IMAGE_FIELDS
+        if getattr(product, field)
+    } - {source_name}
+    new_names = dict()
+    for field, (content, extension) in derivatives.items():
+        file = getattr(product, field)
+        name = file.field.generate_filename(
+            product, f"{product.slug}-{field}.{extension}"
+        )
+        new_names[field] = file.storage.save(name, ContentFile(content))
+        setattr(product, field, new_names[field])
+    product.source_image = source_name
+    product.image_urls = product.build_image_urls()
+
+    with write_atomic():
+        updated = Product.objects.filter(
+            pk=product.pk, **{source_field: source_name}
+        ).update(
+            source_image=source_name,
+            image_urls=product.image_urls,
+            updated_at=timezone.now(),
+            **new_names,
+        )
+        if updated:
+            transaction.on_commit(lambda: _delete_files(product, old_names))
+            bump_version(CATALOG_NAMESPACE)
+    if not updated:
+        _delete_files(product, new_names.values())
+    return bool(updated)
+
+
+def _delete_files(product: Product, names: Iterable[str]) -> None:
+    storage = product.source_image.storage
+    for name in names:
+        storage.delete(name)
+
+
+def claim_jobs(limit: int) -> list[ImageDerivativeJob]:
+    """
+    Захватить задачи из очереди для обработки.
+
+    Задача переводится в статус running условным UPDATE, поэтому
+    несколько обработчиков не возьмут одну и ту же задачу.
+    :param limit: Максимальное количество захватываемых задач.
+    """
+    pks = ImageDerivativeJob.objects.filter(status=Status.PENDING).values_list(
+        "pk", flat=True
+    )[:limit]
+    claimed = [
+        pk
+        for pk in pks
+        if ImageDerivativeJob.objects.filter(
+            pk=pk, status=Status.PENDING
+        ).update(status=Status.RUNNING, attempts=F("attempts") + 1)
+    ]
+    return list(
+        ImageDerivativeJob.objects.filter(pk__in=claimed).select_related(
+            "product"
+        )
+    )
+
+
+def requeue_stale_jobs(stale_after: timedelta) -> int:
+    """
+    Вернуть в очередь задачи, обработчик которых завершился аварийно.
+    :param stale_after: Время, после которого задача считается зависшей.
+    :return: Количество возвращённых задач.
+    """
+    return ImageDerivativeJob.objects.filter(
+        status=Status.RUNNING,
+        updated_at__lt=timezone.now() - stale_after,
+    ).update(status=Status.PENDING, updated_at=timezone.now())
+
+
+def process_jobs(
+    executor: Executor, jobs: list[ImageDerivativeJob]
+) -> dict[str, int]:
+    """
+    Обработать захваченные задачи.
+
+    Задача, завершившаяся ошибкой, возвращается в очередь, пока не
+    исчерпано IMAGE_JOB_MAX_ATTEMPTS попыток. Задачи продукта, исходник
+    которого успел смениться, завершаются: для нового исходника уже
+    создана своя задача.
+    :return: Количество задач по итоговым статусам.
+    """
+    jobs_by_product = {job.product_id: job for job in jobs}
+    results = dict.fromkeys(Status.values, 0)
+    products = [
+        job.product
+        for job in jobs_by_product.values()
+        if job.product.source_image
+    ]
+    for job in jobs:
+        if job is not jobs_by_product[job.product_id] or not (
+            job.product.source_image
+        ):
+            _finish(job, Status.DONE)
+            results[Status.DONE] += 1
+    for product, field, result in render_products(executor, products):
+        job = jobs_by_product[product.pk]
+        try:
+            if isinstance(result, Exception):
+                raise result
+            apply_derivatives(product, field, result)
+        except Exception as error:
+            status = (
+                Status.FAILED
+                if job.attempts >= Nv.IMAGE_JOB_MAX_ATTEMPTS
+                else Status.PENDING
+            )
+            _finish(job, status, f"{type(error).__name__}: {error}")
+        else:
+            status = Status.DONE
+            _finish(job, status)
+        results[status] += 1
+    return results
+
+
+def _finish(job: ImageDerivativeJob, status: str, error: str = "") -> None:
+    job.status = status
+    job.error = error
+    job.save(update_fields=("status", "error", "updated_at"))
@@ -0,0 +1,200 @@
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import slug_re
+
+from core.cache import (
+    CATALOG_NAMESPACE,
+    CATEGORY_TREE_NAMESPACE,
+    bump_version,
+)
+from core.constants import NumericalValues as Nv
+from core.db import write_atomic
+from store.models import Category, Product, SubCategory
+from store.search import get_search_backend
+
+FORMATS = ("csv", "jsonl")
+UPDATE_FIELDS = ("name", "price", "category", "subcategory", "updated_at")
+
+
+class Command(BaseCommand):
+    """
+    Команда для импорта каталога продуктов из файла поставщика.
+
+    Файл читается построчно в формате CSV либо JSONL с полями name, slug,
+    price, category и subcategory, где категория и подкатегория задаются
+    слагами. Строки проверяются без обращения к БД, а продукты
+    записываются пакетами через bulk_create: существующие продукты с тем же
+    слагом обновляются. Каждый пакет записывается в отдельной транзакции
+    вместе с обновлением поискового индекса, поэтому потребление памяти не
+    зависит от размера файла.
+    """
+
+    help = "Импортировать продукты из CSV или JSONL файла."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="Путь к файлу.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default=None,
+            help="Формат файла, по умолчанию — по его расширению.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Количество продуктов, записываемых одним запросом.",
+        )
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            default=100,
+            help=(
+                "Количество некорректных строк, после которого импорт "
+                "прерывается."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in FORMATS:
+            raise CommandError(
+                f"Неизвестный формат файла {path.name}, укажите --format."
+            )
+        self.categories = dict(Category.objects.values_list("slug", "pk"))
+        self.subcategories = {
+            (category_id, slug): pk
+            for category_id, slug, pk in SubCategory.objects.values_list(
+                "category_id", "slug", "pk"
+            )
+        }
+        chunk_size = options["chunk_size"]
+        self.started = time.monotonic()
+        self.processed = imported = errors = 0
+        chunk = dict()
+        try:
+            for number, row in self.read_rows(path, file_format):
+                self.processed += 1
+                try:
+                    product = self.clean(row)
+                except ValueError as error:
+                    errors += 1
+                    self.stderr.write(f"Строка {number}: {error}")
+                    if errors > options["max_errors"]:
+                        raise CommandError(
+                            "Превышено допустимое количество ошибок, "
+                            f"импортировано продуктов: {imported}."
+                        )
+                    continue
+                chunk[product.slug] = product
+                if len(chunk) >= chunk_size:
+                    imported += self.write(chunk)
+                    chunk = dict()
+            if chunk:
+                imported += self.write(chunk)
+        finally:
+            if imported:
+                bump_version(CATALOG_NAMESPACE)
+                bump_version(CATEGORY_TREE_NAMESPACE)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано {imported} продуктов из {self.processed} "
+                f"строк за {elapsed:.1f} с "
+                f"({self.processed / max(elapsed, 1e-6):.0f} строк/с), "
+                f"ошибок: {errors}."
+            )
+        )
+
+    @staticmethod
+    def read_rows(path: Path, file_format: str) -> Iterator[tuple[int, dict]]:
+        """
+        Построчно прочитать файл.
+        :return: Пары (номер строки в файле, данные строки).
+        """
+        with open(path, encoding="utf-8", newline="") as file:
+            if file_format == "csv":
+                yield from enumerate(csv.DictReader(file), start=2)
+                return
+            for number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield number, row
+
+    def clean(self, row: dict | None) -> Product:
+        """
+        Проверить строку файла и построить по ней продукт.
+        :raises ValueError: Если строка некорректна.
+        """
+        if not isinstance(row, dict):
+            raise ValueError("Строка не является JSON-объектом.")
+        name = str(row.get("name") or "").strip()
+        if not name or len(name) > Nv.NAME_MAX_LENGTH:
+            raise ValueError(
+                f"Название должно содержать от 1 до {Nv.NAME_MAX_LENGTH} "
+                "символов."
+            )
+        slug = str(row.get("slug") or "").strip()
+        if len(slug) > Nv.NAME_MAX_LENGTH or not slug_re.match(slug):
+            raise ValueError(f"Некорректный слаг {slug!r}.")
+        try:
+            price = int(str(row.get("price")).strip())
+        except ValueError:
+            price = None
+        if price is None or not (
+            Nv.PRICE_MIN_VALUE <= price <= Nv.PRICE_MAX_VALUE
+        ):
+            raise ValueError(
+                f"Цена должна быть целым числом от {Nv.PRICE_MIN_VALUE} "
+                f"до {Nv.PRICE_MAX_VALUE}."
+            )
+        category_id = self.categories.get(row.get("category"))
+        if category_id is None:
+            raise ValueError(f"Категория {row.get('category')!r} не найдена.")
+        subcategory_id = self.subcategories.get(
+            (category_id, row.get("subcategory"))
+        )
+        if subcategory_id is None:
+            raise ValueError(
+                f"Подкатегория {row.get('subcategory')!r} не найдена "
+                "в категории."
+            )
+        return Product(
+            name=name,
+            slug=slug,
+            price=price,
+            category_id=category_id,
+            subcategory_id=subcategory_id,
+        )
+
+    def write(self, chunk: dict[str, Product]) -> int:
+        """
+        Записать пакет продуктов и обновить их в поисковом индексе.
+        :return: Количество записанных продуктов.
+        """
+        with write_atomic():
+            Product.objects.bulk_create(
+                chunk.values(),
+                update_conflicts=True,
+                unique_fields=("slug",),
+                update_fields=UPDATE_FIELDS,
+            )
+            get_search_backend().index_products(
+                Product.objects.filter(slug__in=chunk)
+            )
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"Обработано строк: {self.processed}, "
+            f"{self.processed / max(elapsed, 1e-6):.0f} строк/с."
+        )
+        return len(chunk)
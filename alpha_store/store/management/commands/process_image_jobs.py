@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from store.images import (
+    claim_jobs,
+    get_executor,
+    process_jobs,
+    requeue_stale_jobs,
+)
+
+
+class Command(BaseCommand):
+    """
+    Обработчик очереди задач построения изображений продуктов.
+
+    Задачи создаются при загрузке исходного изображения продукта и
+    выполняются вне цикла запрос-ответ: копии изображений строятся в пуле
+    процессов, который живёт всё время работы команды. Без флага --once
+    команда работает постоянно, опрашивая очередь с заданным интервалом.
+    """
+
+    help = "Обработать очередь задач построения изображений продуктов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество процессов пула, по умолчанию — число ядер.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Количество задач, захватываемых за один раз.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза в секундах между опросами пустой очереди.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=600,
+            help=(
+                "Время в секундах, после которого выполняемая задача "
+                "считается зависшей и возвращается в очередь."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        with get_executor(options["workers"]) as executor:
+            while True:
+                requeued = requeue_stale_jobs(stale_after)
+                if requeued:
+                    self.stdout.write(
+                        f"Возвращено в очередь зависших задач: {requeued}."
+                    )
+                jobs = claim_jobs(options["batch_size"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+                results = process_jobs(executor, jobs)
+                self.stdout.write(
+                    ", ".join(
+                        f"{status}: {count}"
+                        for status, count in results.items()
+                        if count
+                    )
+                )
+        self.stdout.write(self.style.SUCCESS("Очередь обработана."))
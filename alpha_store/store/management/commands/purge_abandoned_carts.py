@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.db import write_atomic
+from store.models import ShoppingCart
+
+
+class Command(BaseCommand):
+    """
+    Команда для удаления заброшенных корзин.
+
+    Корзина считается заброшенной, если пользователь не изменял её
+    заданное количество дней. Учитывается дата последней активности, а не
+    дата изменения, поэтому пересчёт итогов командой
+    recalculate_cart_totals не продлевает жизнь корзины. Корзины
+    удаляются пакетами по диапазонам PK, каждый пакет — в отдельной
+    короткой транзакции, поэтому таблицы не блокируются надолго. Элементы
+    корзин удаляются вместе с ними одним запросом на пакет.
+    """
+
+    help = "Удалить корзины, не изменявшиеся заданное количество дней."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Количество дней без изменений, после которого корзина "
+            "считается заброшенной.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество корзин, удаляемых одной транзакцией.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза в секундах между пакетами для снижения нагрузки.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать заброшенные корзины, не удаляя их.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        abandoned = ShoppingCart.objects.filter(last_activity_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"Заброшенных корзин: {abandoned.count()}.")
+            return
+
+        batch_size = options["batch_size"]
+        started = time.monotonic()
+        carts = rows = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                abandoned.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with write_atomic():
+                deleted, per_model = abandoned.filter(pk__in=pks).delete()
+            carts += per_model.get(ShoppingCart._meta.label, 0)
+            rows += deleted
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Удалено корзин: {carts}, строк: {rows}, "
+                f"{rows / max(elapsed, 1e-6):.0f} строк/с."
+            )
+            if options["pause"]:
+                time.sleep(options["pause"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Удалено {carts} заброшенных корзин ({rows} строк) "
+                f"за {elapsed:.1f} с."
+            )
+        )
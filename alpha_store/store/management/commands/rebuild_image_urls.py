@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.cache import CATALOG_NAMESPACE, bump_version
+from core.db import write_atomic
+from store.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Команда для заполнения сохранённых ссылок на изображения продуктов.
+
+    Нужна для продуктов, созданных до появления поля image_urls, а также
+    после смены хранилища файлов или MEDIA_URL.
+    """
+
+    help = "Пересчитать сохранённые ссылки на изображения продуктов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Обработать только продукты без сохранённых ссылок.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество продуктов, обновляемых одним запросом.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.only("pk", *Product.IMAGE_FIELDS)
+        if options["missing_only"]:
+            queryset = queryset.filter(image_urls={})
+        batch_size = options["batch_size"]
+        fields = ("image_urls", "updated_at")
+        now = timezone.now()
+        updated = 0
+        batch = []
+        with write_atomic():
+            for product in queryset.order_by("pk").iterator(
+                chunk_size=batch_size
+            ):
+                product.image_urls = product.build_image_urls()
+                product.updated_at = now
+                batch.append(product)
+                if len(batch) >= batch_size:
+                    updated += Product.objects.bulk_update(batch, fields)
+                    batch = []
+            if batch:
+                updated += Product.objects.bulk_update(batch, fields)
+            bump_version(CATALOG_NAMESPACE)
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлены ссылки {updated} продуктов.")
+        )
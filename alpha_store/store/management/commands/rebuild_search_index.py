@@ -0,0 +1,28 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from core.db import write_atomic
+from store.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Команда для полного перестроения поискового индекса продуктов.
+    """
+
+    help = "Перестроить поисковый индекс продуктов."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = perf_counter()
+        with write_atomic():
+            indexed = backend.rebuild()
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{type(backend).__name__}: проиндексировано {indexed} "
+                f"продуктов за {elapsed:.2f} с "
+                f"({indexed / max(elapsed, 1e-9):.0f} продуктов/с)."
+            )
+        )
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.models import ShoppingCart
+
+
+class Command(BaseCommand):
+    """
+    Команда для пересчёта хранимых итогов корзин.
+
+    Итоги корзины (количество позиций, общее количество товаров и общая
+    стоимость) обновляются при каждом изменении её состава, однако при
+    изменении цены продукта они расходятся с фактическими. Команда
+    пересчитывает итоги всех корзин пакетами по диапазонам PK, а с флагом
+    --check только сообщает о расхождениях.
+    """
+
+    help = "Пересчитать хранимые итоги корзин с товарами."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help=(
+                "Только проверить итоги на расхождения, не изменяя их. "
+                "Завершается с ошибкой, если расхождения найдены."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество корзин, пересчитываемых одним запросом.",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drifted = ShoppingCart.objects.with_drift().count()
+            if drifted:
+                raise CommandError(
+                    f"Итоги расходятся с фактическими в {drifted} корзинах."
+                )
+            self.stdout.write(self.style.SUCCESS("Расхождений не найдено."))
+            return
+
+        batch_size = options["batch_size"]
+        last_pk = (
+            ShoppingCart.objects.order_by("-pk")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        updated = 0
+        for start in range(0, (last_pk or 0) + 1, batch_size):
+            updated += ShoppingCart.objects.filter(
+                pk__gte=start, pk__lt=start + batch_size
+            ).refresh_totals()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитаны итоги {updated} корзин.")
+        )
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from store.images import apply_derivatives, get_executor, render_products
+from store.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Команда для перекодирования изображений всего каталога.
+
+    Копии изображений строятся заново из исходного изображения продукта,
+    а при его отсутствии — из наибольшего из имеющихся, которое после этого
+    становится исходным. Продукты обрабатываются пакетами в пуле процессов
+    на всех ядрах, каждый продукт переключается на новые файлы атомарно.
+    """
+
+    help = "Перекодировать изображения продуктов в текущие форматы."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Количество процессов пула, по умолчанию — число ядер.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Количество продуктов, передаваемых в пул за один раз.",
+        )
+
+    def handle(self, *args, **options):
+        has_image = Q()
+        for field in ("source_image", *Product.IMAGE_FIELDS):
+            has_image |= ~Q(**{field: ""})
+        queryset = Product.objects.filter(has_image).order_by("pk")
+        batch_size = options["batch_size"]
+        processed = failed = 0
+        started = time.monotonic()
+        with get_executor(options["workers"]) as executor:
+            last_pk = 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for product, field, result in render_products(
+                    executor, batch, window=options["workers"]
+                ):
+                    if isinstance(result, Exception):
+                        failed += 1
+                        self.stderr.write(f"{product.pk}: {result}")
+                    elif apply_derivatives(product, field, result):
+                        processed += 1
+                self.stdout.write(f"Обработано продуктов: {processed}.")
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Перекодированы изображения {processed} продуктов "
+                f"за {elapsed:.1f} с, ошибок: {failed}."
+            )
+        )
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.seeding import SEED_PASSWORD, seed_store
+
+
+class Command(BaseCommand):
+    """
+    Команда для заполнения магазина синтетическими данными.
+
+    Создаёт категории, подкатегории, продукты, пользователей и корзины
+    с товарами через bulk_create. Используется для нагрузочного
+    тестирования и бенчмарков, повторный запуск добавляет новые данные
+    с уникальными слагами.
+    """
+
+    help = "Заполнить магазин синтетическими данными."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--products",
+            type=int,
+            default=1000,
+            help="Количество продуктов.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Количество пользователей.",
+        )
+        parser.add_argument(
+            "--carts",
+            type=int,
+            default=100,
+            help="Количество корзин с товарами, не больше --users.",
+        )
+        parser.add_argument(
+            "--items-per-cart",
+            type=int,
+            default=10,
+            help="Максимальное количество позиций в корзине.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Количество объектов, создаваемых одним запросом.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Начальное значение генератора случайных чисел.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            created = seed_store(
+                products=options["products"],
+                users=options["users"],
+                carts=options["carts"],
+                items_per_cart=options["items_per_cart"],
+                batch_size=options["batch_size"],
+                seed=options["seed"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            ", ".join(f"{name}: {count}" for name, count in created.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Данные созданы за {elapsed:.1f} с. "
+                f"Пароль пользователей: {SEED_PASSWORD}."
+            )
+        )
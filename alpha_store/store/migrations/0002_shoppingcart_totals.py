@@ -0,0 +1,112 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_shopping_cart_totals(apps, schema_editor):
+    ShoppingCart = apps.get_model("store", "ShoppingCart")
+    ShoppingCartItem = apps.get_model("store", "ShoppingCartItem")
+    items = (
+        ShoppingCartItem.objects.filter(cart=OuterRef("pk"))
+        .order_by()
+        .values("cart")
+    )
+    ShoppingCart.objects.update(
+        items_count=Coalesce(
+            Subquery(items.annotate(value=Count("pk")).values("value")), 0
+        ),
+        total_quantity=Coalesce(
+            Subquery(items.annotate(value=Sum("quantity")).values("value")),
+            0,
+        ),
+        total_price=Coalesce(
+            Subquery(
+                items.annotate(
+                    value=Sum(F("quantity") * F("product__price"))
+                ).values("value")
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="category",
+            options={
+                "default_related_name": "categories",
+                "ordering": ("name",),
+                "verbose_name": "Категория",
+                "verbose_name_plural": "Категории",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="product",
+            options={
+                "default_related_name": "products",
+                "ordering": ("name",),
+                "verbose_name": "Продукт",
+                "verbose_name_plural": "Продукты",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="shoppingcartitem",
+            options={
+                "verbose_name": "Элемент корзины",
+                "verbose_name_plural": "Элементы корзины",
+            },
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="items_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество позиций"
+            ),
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="total_price",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Общая стоимость"
+            ),
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="total_quantity",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Общее количество товаров"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="shoppingcartitem",
+            name="product",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="products",
+                to="store.product",
+                verbose_name="Продукт",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subcategory",
+            name="category",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="subcategories",
+                to="store.category",
+                verbose_name="Категория",
+            ),
+        ),
+        migrations.RunPython(
+            fill_shopping_cart_totals, migrations.RunPython.noop
+        ),
+    ]
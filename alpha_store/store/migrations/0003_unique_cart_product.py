@@ -0,0 +1,61 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:27
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def merge_duplicate_cart_items(apps, schema_editor):
+    """
+    Объединить повторяющиеся элементы корзины перед созданием ограничения.
+
+    Количество объединяемых элементов суммируется с ограничением сверху
+    ITEM_MAX_QUANTITY_IN_CART, после чего итоги затронутых корзин
+    пересчитываются.
+    """
+    ShoppingCart = apps.get_model("store", "ShoppingCart")
+    ShoppingCartItem = apps.get_model("store", "ShoppingCartItem")
+    duplicates = (
+        ShoppingCartItem.objects.values("cart", "product")
+        .annotate(items=Count("pk"))
+        .filter(items__gt=1)
+    )
+    cart_ids = set()
+    for duplicate in duplicates.iterator():
+        items = list(
+            ShoppingCartItem.objects.filter(
+                cart=duplicate["cart"], product=duplicate["product"]
+            ).order_by("pk")
+        )
+        kept, *extra = items
+        kept.quantity = min(sum(item.quantity for item in items), 100)
+        kept.save(update_fields=("quantity",))
+        ShoppingCartItem.objects.filter(
+            pk__in=[item.pk for item in extra]
+        ).delete()
+        cart_ids.add(duplicate["cart"])
+    for cart in ShoppingCart.objects.filter(pk__in=cart_ids):
+        totals = cart.cart_items.aggregate(
+            items_count=Count("pk"),
+            total_quantity=Sum("quantity"),
+            total_price=Sum(F("quantity") * F("product__price")),
+        )
+        ShoppingCart.objects.filter(pk=cart.pk).update(**totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0002_shoppingcart_totals"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_cart_items, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product"
+            ),
+        ),
+    ]
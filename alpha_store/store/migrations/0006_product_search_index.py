@@ -0,0 +1,51 @@
+from django.db import migrations
+
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS store_product_fts USING fts5("
+    "name, category, subcategory, tokenize = 'unicode61 remove_diacritics 2')",
+)
+SQLITE_BACKWARD = ("DROP TABLE IF EXISTS store_product_fts",)
+POSTGRESQL_FORWARD = (
+    "CREATE TABLE IF NOT EXISTS store_product_search ("
+    "product_id bigint PRIMARY KEY "
+    "REFERENCES store_product (id) ON DELETE CASCADE "
+    "DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS store_product_search_document_idx "
+    "ON store_product_search USING GIN (document)",
+)
+POSTGRESQL_BACKWARD = ("DROP TABLE IF EXISTS store_product_search",)
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """
+    Создание поискового индекса продуктов.
+
+    Для SQLite создаётся виртуальная таблица FTS5, для PostgreSQL — таблица
+    с tsvector и GIN-индексом. Для остальных СУБД используется поиск без
+    индекса. После применения миграции индекс заполняется командой
+    rebuild_search_index.
+    """
+
+    dependencies = [
+        ("store", "0005_product_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(
+                dict(sqlite=SQLITE_FORWARD, postgresql=POSTGRESQL_FORWARD)
+            ),
+            run_for_vendor(
+                dict(sqlite=SQLITE_BACKWARD, postgresql=POSTGRESQL_BACKWARD)
+            ),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:36
+
+import core.constants
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0008_product_image_urls"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="source_image",
+            field=models.ImageField(
+                blank=True,
+                help_text="Превью, изображения среднего и большого размера будут построены из него автоматически.",
+                upload_to="images/source",
+                verbose_name="Исходное изображение",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ImageDerivativeJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Выполнена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=core.constants.NumericalValues[
+                            "JOB_STATUS_MAX_LENGTH"
+                        ],
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Попытки"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата изменения"
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="image_jobs",
+                        to="store.product",
+                        verbose_name="Продукт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Задача обработки изображений",
+                "verbose_name_plural": "Задачи обработки изображений",
+                "ordering": ("pk",),
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="image_job_status_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def rename_duplicate_slugs(apps, schema_editor):
+    """
+    Сделать слаги продуктов уникальными перед созданием ограничения.
+
+    Первый по PK продукт сохраняет свой слаг, к слагам остальных
+    дописывается их PK.
+    """
+    Product = apps.get_model("store", "Product")
+    max_length = Product._meta.get_field("slug").max_length
+    duplicates = (
+        Product.objects.values("slug")
+        .annotate(products=Count("pk"))
+        .filter(products__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        products = Product.objects.filter(slug=duplicate["slug"]).order_by(
+            "pk"
+        )
+        for product in products[1:]:
+            suffix = f"-{product.pk}"
+            Product.objects.filter(pk=product.pk).update(
+                slug=product.slug[: max_length - len(suffix)] + suffix
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0009_image_derivative_jobs"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rename_duplicate_slugs, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="product",
+            constraint=models.UniqueConstraint(
+                fields=("slug",), name="unique_product_slug"
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def merge_duplicate_shopping_carts(apps, schema_editor):
+    """
+    Объединить корзины одного пользователя перед созданием ограничения.
+
+    Элементы остальных корзин переносятся в самую раннюю корзину
+    пользователя, количество одинаковых продуктов суммируется с
+    ограничением сверху ITEM_MAX_QUANTITY_IN_CART, после чего итоги
+    корзины пересчитываются.
+    """
+    ShoppingCart = apps.get_model("store", "ShoppingCart")
+    ShoppingCartItem = apps.get_model("store", "ShoppingCartItem")
+    duplicates = (
+        ShoppingCart.objects.values("user")
+        .annotate(carts=Count("pk"))
+        .filter(carts__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        kept, *extra = ShoppingCart.objects.filter(
+            user=duplicate["user"]
+        ).order_by("pk")
+        kept_items = {
+            item.product_id: item
+            for item in ShoppingCartItem.objects.filter(cart=kept)
+        }
+        for item in ShoppingCartItem.objects.filter(cart__in=extra).order_by(
+            "pk"
+        ):
+            existing = kept_items.get(item.product_id)
+            if existing is None:
+                item.cart = kept
+                item.save(update_fields=("cart",))
+                kept_items[item.product_id] = item
+            else:
+                existing.quantity = min(existing.quantity + item.quantity, 100)
+                existing.save(update_fields=("quantity",))
+        ShoppingCart.objects.filter(
+            pk__in=[cart.pk for cart in extra]
+        ).delete()
+        totals = ShoppingCartItem.objects.filter(cart=kept).aggregate(
+            items_count=Count("pk"),
+            total_quantity=Sum("quantity"),
+            total_price=Sum(F("quantity") * F("product__price")),
+        )
+        ShoppingCart.objects.filter(pk=kept.pk).update(
+            items_count=totals["items_count"],
+            total_quantity=totals["total_quantity"] or 0,
+            total_price=totals["total_price"] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0010_unique_product_slug"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_shopping_carts, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="shoppingcart",
+            constraint=models.UniqueConstraint(
+                fields=("user",), name="unique_user_shopping_cart"
+            ),
+        ),
+    ]
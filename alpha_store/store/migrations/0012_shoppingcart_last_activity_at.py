@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:49
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_updated_at(apps, schema_editor):
+    """
+    Заполнить дату последней активности датой изменения корзины.
+    """
+    ShoppingCart = apps.get_model("store", "ShoppingCart")
+    ShoppingCart.objects.update(last_activity_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0011_unique_user_shopping_cart"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Дата последней активности",
+            ),
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
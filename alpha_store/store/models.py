@@ -1,14 +1,27 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import IntegrityError, models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
 
 from core.constants import NumericalValues as Nv
+from core.db import write_atomic
 from core.models import BaseNameSlugModel
 
 User = get_user_model()
 
 
 class Product(BaseNameSlugModel):
+    source_image = models.ImageField(
+        "Исходное изображение",
+        upload_to="images/source",
+        blank=True,
+        help_text=(
+            "Превью, изображения среднего и большого размера будут "
+            "построены из него автоматически."
+        ),
+    )
     thumbnail = models.ImageField(
         "Превью",
         upload_to="images/thumbnails",
@@ -39,12 +52,96 @@ class Product(BaseNameSlugModel):
             MaxValueValidator(Nv.PRICE_MAX_VALUE),
         ],
     )
+    image_urls = models.JSONField(
+        "Ссылки на изображения", default=dict, blank=True, editable=False
+    )
 
     class Meta:
         default_related_name = "products"
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
         ordering = ("name",)
+        indexes = (
+            models.Index(fields=("name", "id"), name="product_name_id_idx"),
+            models.Index(
+                fields=("category", "subcategory", "price"),
+                name="product_cat_subcat_price_idx",
+            ),
+            models.Index(
+                fields=("category", "name"), name="product_category_name_idx"
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=("slug",), name="unique_product_slug"
+            ),
+        )
+
+    IMAGE_FIELDS = ("thumbnail", "medium_image", "large_image")
+
+    def build_image_urls(self) -> dict[str, str | None]:
+        """
+        Получить ссылки на изображения продукта из хранилища файлов.
+        """
+        return {
+            field: getattr(self, field).url if getattr(self, field) else None
+            for field in self.IMAGE_FIELDS
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Загрузка продукта из БД с запоминанием его категории и
+        подкатегории.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance.remember_categories()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None:
+            self.remember_categories()
+
+    def remember_categories(self) -> None:
+        """
+        Запомнить категорию и подкатегорию продукта, сохранённые в БД.
+
+        По ним после сохранения определяется перенос продукта без запроса
+        к БД. Если поля категорий не загружены, состояние неизвестно.
+        """
+        self._saved_categories = (
+            None
+            if self.get_deferred_fields() & {"category_id", "subcategory_id"}
+            else (self.category_id, self.subcategory_id)
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Сохранение продукта со ссылками на его изображения.
+
+        Новые изображения записываются в хранилище до сохранения модели,
+        чтобы ссылки на них попали в image_urls тем же запросом к БД.
+        При загрузке нового исходного изображения в той же транзакции
+        создаётся задача на построение его уменьшенных копий.
+        """
+        source_uploaded = bool(
+            self.source_image and not self.source_image._committed
+        )
+        for field in ("source_image", *self.IMAGE_FIELDS):
+            file = getattr(self, field)
+            if file and not file._committed:
+                file.save(file.name, file.file, save=False)
+        self.image_urls = self.build_image_urls()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(
+            self.IMAGE_FIELDS
+        ):
+            kwargs["update_fields"] = {*update_fields, "image_urls"}
+        with write_atomic():
+            super().save(*args, **kwargs)
+            if source_uploaded:
+                ImageDerivativeJob.objects.create(product=self)
 
 
 class Category(BaseNameSlugModel):
@@ -57,6 +154,9 @@ class Category(BaseNameSlugModel):
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
         ordering = ("name",)
+        indexes = (
+            models.Index(fields=("name", "id"), name="category_name_id_idx"),
+        )
 
 
 class SubCategory(BaseNameSlugModel):
@@ -72,19 +172,148 @@ class SubCategory(BaseNameSlugModel):
         verbose_name_plural = "Подкатегории"
 
 
+class ShoppingCartQuerySet(models.QuerySet):
+    """
+    QuerySet для модели ShoppingCart.
+
+    Содержит методы для пересчёта и проверки хранимых итогов корзины.
+    """
+
+    @staticmethod
+    def _actual_totals() -> dict[str, Coalesce]:
+        """
+        Выражения для расчёта фактических итогов корзины по её элементам.
+        """
+        items = (
+            ShoppingCartItem.objects.filter(cart=OuterRef("pk"))
+            .order_by()
+            .values("cart")
+        )
+        return dict(
+            items_count=Coalesce(
+                Subquery(items.annotate(value=Count("pk")).values("value")),
+                0,
+            ),
+            total_quantity=Coalesce(
+                Subquery(
+                    items.annotate(value=Sum("quantity")).values("value")
+                ),
+                0,
+            ),
+            total_price=Coalesce(
+                Subquery(
+                    items.annotate(
+                        value=Sum(F("quantity") * F("product__price"))
+                    ).values("value")
+                ),
+                0,
+            ),
+        )
+
+    def refresh_totals(self, activity: bool = False) -> int:
+        """
+        Пересчитать итоги корзин одним UPDATE-запросом.
+
+        Вместе с итогами обновляется дата изменения корзины. Дата
+        последней активности, по которой удаляются заброшенные корзины,
+        обновляется только при изменении корзины пользователем.
+        :param activity: Пересчёт вызван изменением корзины пользователем.
+        :return: Количество обновлённых корзин.
+        """
+        now = timezone.now()
+        if activity:
+            return self.update(
+                updated_at=now, last_activity_at=now, **self._actual_totals()
+            )
+        return self.update(updated_at=now, **self._actual_totals())
+
+    def with_drift(self) -> "ShoppingCartQuerySet":
+        """
+        Отобрать корзины, хранимые итоги которых расходятся с фактическими.
+        """
+        return self.annotate(
+            **{
+                f"actual_{field}": expression
+                for field, expression in self._actual_totals().items()
+            }
+        ).filter(
+            ~Q(items_count=F("actual_items_count"))
+            | ~Q(total_quantity=F("actual_total_quantity"))
+            | ~Q(total_price=F("actual_total_price"))
+        )
+
+
 class ShoppingCart(models.Model):
     user = models.ForeignKey(
         User, verbose_name="Пользователь", on_delete=models.CASCADE
     )
+    items_count = models.PositiveIntegerField("Количество позиций", default=0)
+    total_quantity = models.PositiveIntegerField(
+        "Общее количество товаров", default=0
+    )
+    total_price = models.PositiveIntegerField("Общая стоимость", default=0)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+    last_activity_at = models.DateTimeField(
+        "Дата последней активности", default=timezone.now, db_index=True
+    )
+
+    objects = ShoppingCartQuerySet.as_manager()
 
     class Meta:
         default_related_name = "shopping_cart"
         verbose_name = "Корзина"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user",), name="unique_user_shopping_cart"
+            ),
+        )
 
     def __str__(self):
         return f"{type(self).__name__} пользователя {self.user}"
 
 
+class ShoppingCartItemQuerySet(models.QuerySet):
+    """
+    QuerySet для модели ShoppingCartItem.
+    """
+
+    def add_product(
+        self, cart: ShoppingCart, product: Product, quantity: int
+    ) -> "ShoppingCartItem":
+        """
+        Атомарно добавить продукт в корзину.
+
+        Если продукт уже есть в корзине, его количество увеличивается на
+        стороне БД через F() с ограничением сверху ITEM_MAX_QUANTITY_IN_CART,
+        иначе создаётся новый элемент. Уникальное ограничение на пару
+        (корзина, продукт) гарантирует, что при конкурентных запросах
+        не появится дублей и не потеряются добавления.
+        :param cart: Корзина пользователя.
+        :param product: Добавляемый продукт.
+        :param quantity: Количество добавляемого продукта.
+        :return: Элемент корзины с актуальным количеством.
+        """
+        items = self.filter(cart=cart, product=product)
+        increment = dict(
+            quantity=Least(
+                F("quantity") + quantity, Nv.ITEM_MAX_QUANTITY_IN_CART
+            )
+        )
+        if not items.update(**increment):
+            try:
+                with write_atomic():
+                    return self.create(
+                        cart=cart,
+                        product=product,
+                        quantity=min(quantity, Nv.ITEM_MAX_QUANTITY_IN_CART),
+                    )
+            except IntegrityError:
+                items.update(**increment)
+        item = items.get()
+        item.product = product
+        return item
+
+
 class ShoppingCartItem(models.Model):
     cart = models.ForeignKey(
         ShoppingCart,
@@ -106,9 +335,52 @@ class ShoppingCartItem(models.Model):
         ],
     )
 
+    objects = ShoppingCartItemQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Элемент корзины"
         verbose_name_plural = "Элементы корзины"
+        constraints = (
+            models.UniqueConstraint(
+                fields=("cart", "product"), name="unique_cart_product"
+            ),
+        )
 
     def __str__(self):
         return f"{self.product}: {self.quantity}"
+
+
+class ImageDerivativeJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Выполнена"
+        FAILED = "failed", "Ошибка"
+
+    product = models.ForeignKey(
+        Product,
+        verbose_name="Продукт",
+        on_delete=models.CASCADE,
+        related_name="image_jobs",
+    )
+    status = models.CharField(
+        "Статус",
+        max_length=Nv.JOB_STATUS_MAX_LENGTH,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField("Попытки", default=0)
+    error = models.TextField("Ошибка", blank=True)
+    created_at = models.DateTimeField("Дата создания", auto_now_add=True)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+
+    class Meta:
+        verbose_name = "Задача обработки изображений"
+        verbose_name_plural = "Задачи обработки изображений"
+        ordering = ("pk",)
+        indexes = (
+            models.Index(fields=("status", "id"), name="image_job_status_idx"),
+        )
+
+    def __str__(self):
+        return f"{self.product}: {self.get_status_display()}"
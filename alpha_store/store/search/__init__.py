@@ -0,0 +1,28 @@
+from functools import cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from store.search.backends import BaseSearchBackend
+
+DEFAULT_BACKENDS = {
+    "sqlite": "store.search.backends.SQLiteSearchBackend",
+    "postgresql": "store.search.backends.PostgreSQLSearchBackend",
+}
+FALLBACK_BACKEND = "store.search.backends.SimpleSearchBackend"
+
+
+@cache
+def get_search_backend() -> BaseSearchBackend:
+    """
+    Получить поисковый бэкенд проекта.
+
+    Бэкенд задаётся настройкой SEARCH_BACKEND в виде пути для импорта,
+    а если она не указана — выбирается по типу используемой СУБД.
+    :return: Объект поискового бэкенда.
+    """
+    path = getattr(settings, "SEARCH_BACKEND", None) or DEFAULT_BACKENDS.get(
+        connection.vendor, FALLBACK_BACKEND
+    )
+    return import_string(path)()
@@ -0,0 +1,267 @@
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from store.models import Category, Product, SubCategory
+from store.search.stemmer import stem, stem_text, tokenize
+
+RANK_FIELD = "search_rank"
+
+
+class BaseSearchBackend:
+    """
+    Базовый класс поискового бэкенда для продуктов.
+
+    Бэкенд отвечает за поддержание поискового индекса в актуальном
+    состоянии и за отбор продуктов по поисковому запросу. Найденные
+    продукты аннотируются полем search_rank: чем оно больше, тем выше
+    релевантность.
+    """
+
+    batch_size = 1000
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Отфильтровать продукты по поисковому запросу.
+        :param queryset: QuerySet продуктов.
+        :param query: Поисковый запрос.
+        :return: QuerySet найденных продуктов с аннотацией search_rank.
+        """
+        raise NotImplementedError
+
+    def index_products(self, queryset: QuerySet) -> int:
+        """
+        Добавить либо обновить продукты в поисковом индексе.
+        :param queryset: QuerySet индексируемых продуктов.
+        :return: Количество проиндексированных продуктов.
+        """
+        return 0
+
+    def remove_products(self, pks: Iterable[int]) -> None:
+        """
+        Удалить продукты из поискового индекса.
+        :param pks: PK удаляемых продуктов.
+        """
+
+    def clear(self) -> None:
+        """
+        Очистить поисковый индекс.
+        """
+
+    def rebuild(self) -> int:
+        """
+        Полностью перестроить поисковый индекс.
+        :return: Количество проиндексированных продуктов.
+        """
+        self.clear()
+        return self.index_products(Product.objects.all())
+
+    def documents(
+        self, queryset: QuerySet
+    ) -> Iterable[tuple[int, str, str, str]]:
+        """
+        Получить индексируемые поля продуктов без создания объектов модели.
+        """
+        return (
+            queryset.order_by()
+            .values_list("pk", "name", "category__name", "subcategory__name")
+            .iterator(chunk_size=self.batch_size)
+        )
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Поиск без индекса через icontains.
+
+    Используется для СУБД без поддержки полнотекстового поиска и не требует
+    обслуживания индекса.
+    """
+
+    def search(self, queryset, query):
+        for word in tokenize(query):
+            queryset = queryset.filter(
+                Q(name__icontains=word)
+                | Q(category__name__icontains=word)
+                | Q(subcategory__name__icontains=word)
+            )
+        return queryset.annotate(
+            **{RANK_FIELD: Value(0.0, output_field=FloatField())}
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Поиск через виртуальную таблицу FTS5 в SQLite.
+
+    В таблицу записываются основы слов, полученные русским стеммером,
+    а запрос ищет каждое слово по префиксу основы. Релевантность считается
+    функцией bm25 с большим весом названия продукта.
+
+    Релевантность всех найденных документов считается одним проходом в
+    материализованном CTE: подзапрос с MATCH для каждой строки заново
+    разбирает весь запрос, и на частых словах поиск становится
+    квадратичным.
+    """
+
+    table = "store_product_fts"
+
+    def _match(self, query: str) -> str:
+        return " ".join(f'"{stem(word)}"*' for word in tokenize(query))
+
+    @staticmethod
+    def _materialized() -> str:
+        # Ключевое слово MATERIALIZED появилось в SQLite 3.35, в более
+        # старых версиях способ выполнения CTE выбирает планировщик.
+        if connection.Database.sqlite_version_info >= (3, 35):
+            return "MATERIALIZED "
+        return ""
+
+    def search(self, queryset, query):
+        match = self._match(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+                (match,),
+            )
+        ).annotate(
+            **{
+                RANK_FIELD: RawSQL(
+                    f"WITH ranks AS {self._materialized()}("
+                    f"SELECT rowid, -bm25({self.table}, 10.0, 2.0, 1.0) "
+                    f"AS rank FROM {self.table} WHERE {self.table} MATCH %s"
+                    ") SELECT rank FROM ranks "
+                    f"WHERE rowid = {Product._meta.db_table}.id",
+                    (match,),
+                    output_field=FloatField(),
+                )
+            }
+        )
+
+    def index_products(self, queryset):
+        indexed = 0
+        batch = []
+        for document in self.documents(queryset):
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                indexed += self._write(batch)
+                batch = []
+        if batch:
+            indexed += self._write(batch)
+        return indexed
+
+    def _write(self, batch) -> int:
+        with connection.cursor() as cursor:
+            self._delete(cursor, [pk for pk, *_ in batch])
+            cursor.executemany(
+                f"INSERT INTO {self.table} "
+                "(rowid, name, category, subcategory) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    (
+                        pk,
+                        stem_text(name),
+                        stem_text(category or ""),
+                        stem_text(subcategory or ""),
+                    )
+                    for pk, name, category, subcategory in batch
+                ],
+            )
+        return len(batch)
+
+    def _delete(self, cursor, pks: list[int]) -> None:
+        if pks:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN "
+                f"({', '.join(['%s'] * len(pks))})",
+                pks,
+            )
+
+    def remove_products(self, pks):
+        pks = list(pks)
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), self.batch_size):
+                self._delete(cursor, pks[start : start + self.batch_size])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+
+class PostgreSQLSearchBackend(BaseSearchBackend):
+    """
+    Поиск через tsvector с GIN-индексом в PostgreSQL.
+
+    Поисковые документы хранятся в отдельной таблице и строятся на стороне
+    БД с конфигурацией russian, которая отвечает за стемминг. Запрос ищет
+    каждое слово по префиксу, релевантность считается функцией ts_rank.
+    """
+
+    table = "store_product_search"
+    config = "russian"
+
+    def _tsquery(self, query: str) -> str:
+        return " & ".join(f"{word}:*" for word in tokenize(query))
+
+    def search(self, queryset, query):
+        tsquery = self._tsquery(query)
+        if not tsquery:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT product_id FROM {self.table} "
+                "WHERE document @@ to_tsquery(%s, %s)",
+                (self.config, tsquery),
+            )
+        ).annotate(
+            **{
+                RANK_FIELD: RawSQL(
+                    f"SELECT ts_rank(document, to_tsquery(%s, %s)) "
+                    f"FROM {self.table} "
+                    f"WHERE product_id = {Product._meta.db_table}.id",
+                    (self.config, tsquery),
+                    output_field=FloatField(),
+                )
+            }
+        )
+
+    def index_products(self, queryset):
+        pks = list(queryset.order_by().values_list("pk", flat=True))
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), self.batch_size):
+                cursor.execute(
+                    f"INSERT INTO {self.table} (product_id, document) "
+                    "SELECT product.id, "
+                    "setweight(to_tsvector(%s, product.name), 'A') || "
+                    "setweight(to_tsvector(%s, category.name), 'B') || "
+                    "setweight(to_tsvector(%s, subcategory.name), 'C') "
+                    f"FROM {Product._meta.db_table} AS product "
+                    f"JOIN {Category._meta.db_table} AS category "
+                    "ON category.id = product.category_id "
+                    f"JOIN {SubCategory._meta.db_table} AS subcategory "
+                    "ON subcategory.id = product.subcategory_id "
+                    "WHERE product.id = ANY(%s) "
+                    "ON CONFLICT (product_id) "
+                    "DO UPDATE SET document = EXCLUDED.document",
+                    (
+                        self.config,
+                        self.config,
+                        self.config,
+                        pks[start : start + self.batch_size],
+                    ),
+                )
+        return len(pks)
+
+    def remove_products(self, pks):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE product_id = ANY(%s)",
+                (list(pks),),
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
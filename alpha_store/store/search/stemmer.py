@@ -0,0 +1,154 @@
+import re
+from functools import lru_cache
+
+VOWELS = "аеиоуыэюя"
+
+PERFECTIVE_GERUND = (
+    ("в", "вши", "вшись"),
+    ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"),
+)
+ADJECTIVE = (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем",
+    "им", "ым", "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю",
+    "ая", "яя", "ою", "ею",
+)  # fmt: skip
+PARTICIPLE = (
+    ("ем", "нн", "вш", "ющ", "щ"),
+    ("ивш", "ывш", "ующ"),
+)
+REFLEXIVE = ("ся", "сь")
+VERB = (
+    (
+        "ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но",
+        "ет", "ют", "ны", "ть", "ешь", "нно",
+    ),
+    (
+        "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей",
+        "уй", "ил", "ыл", "им", "ым", "ен", "ило", "ыло", "ено", "ят",
+        "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю",
+    ),
+)  # fmt: skip
+NOUN = (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии",
+    "и", "ией", "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам",
+    "ом", "о", "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия",
+    "ья", "я",
+)  # fmt: skip
+SUPERLATIVE = ("ейше", "ейш")
+DERIVATIONAL = ("ость", "ост")
+
+WORD_PATTERN = re.compile(r"\w+")
+CYRILLIC_PATTERN = re.compile(r"^[а-я]+$")
+
+
+def _strip(word: str, endings, preceded: bool = False) -> str | None:
+    """
+    Отрезать самое длинное подходящее окончание из набора.
+
+    :param word: Часть слова, в которой ищется окончание.
+    :param endings: Набор окончаний.
+    :param preceded: Окончание должно предваряться буквой «а» или «я».
+    :return: Слово без окончания, либо None, если окончание не найдено.
+    """
+    for ending in sorted(endings, key=len, reverse=True):
+        if not word.endswith(ending):
+            continue
+        stem = word[: -len(ending)]
+        if not preceded or stem.endswith(("а", "я")):
+            return stem
+    return None
+
+
+def _strip_group(word: str, groups) -> str | None:
+    """
+    Отрезать самое длинное окончание из двух групп.
+
+    Окончания первой группы должны предваряться буквой «а» или «я».
+    """
+    first, second = groups
+    result = None
+    for stem in (_strip(word, first, preceded=True), _strip(word, second)):
+        if stem is not None and (result is None or len(stem) < len(result)):
+            result = stem
+    return result
+
+
+def _regions(word: str) -> tuple[int, int]:
+    """
+    Найти начало областей RV и R2 алгоритма Snowball.
+    """
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+
+    def region(start: int) -> int:
+        for index in range(start + 1, len(word)):
+            if word[index - 1] in VOWELS and word[index] not in VOWELS:
+                return index + 1
+        return len(word)
+
+    return rv, region(region(0))
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """
+    Получить основу русского слова по алгоритму Snowball.
+
+    Слова не на кириллице возвращаются без изменений. Результаты
+    кэшируются, так как при индексации каталога слова повторяются.
+    :param word: Слово в нижнем регистре.
+    :return: Основа слова.
+    """
+    word = word.replace("ё", "е")
+    if not CYRILLIC_PATTERN.match(word):
+        return word
+    rv_start, r2_start = _regions(word)
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    stemmed = _strip_group(rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        rv = _strip(rv, REFLEXIVE) or rv
+        adjectival = _strip(rv, ADJECTIVE)
+        if adjectival is not None:
+            stemmed = _strip_group(adjectival, PARTICIPLE) or adjectival
+        else:
+            stemmed = _strip_group(rv, VERB)
+            if stemmed is None:
+                stemmed = _strip(rv, NOUN)
+    rv = rv if stemmed is None else stemmed
+
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    r2 = (prefix + rv)[r2_start:]
+    derivational = _strip(r2, DERIVATIONAL)
+    if derivational is not None:
+        rv = rv[: len(rv) - (len(r2) - len(derivational))]
+
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    else:
+        superlative = _strip(rv, SUPERLATIVE)
+        if superlative is not None:
+            rv = (
+                superlative[:-1] if superlative.endswith("нн") else superlative
+            )
+        elif rv.endswith("ь"):
+            rv = rv[:-1]
+    return prefix + rv
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Разбить текст на слова в нижнем регистре.
+    """
+    return WORD_PATTERN.findall(text.lower())
+
+
+def stem_text(text: str) -> str:
+    """
+    Заменить каждое слово текста его основой.
+    """
+    return " ".join(stem(word) for word in tokenize(text))
@@ -0,0 +1,176 @@
+import random
+from itertools import islice
+from time import time_ns
+from typing import Iterable, Iterator
+
+from django.contrib.auth.hashers import make_password
+
+from core.cache import (
+    CATALOG_NAMESPACE,
+    CATEGORY_TREE_NAMESPACE,
+    bump_version,
+)
+from core.constants import NumericalValues as Nv
+from core.db import write_atomic
+from store.models import (
+    Category,
+    Product,
+    ShoppingCart,
+    ShoppingCartItem,
+    SubCategory,
+    User,
+)
+from store.search import get_search_backend
+
+CATEGORIES = {
+    "Электроника": ("Смартфоны", "Ноутбуки", "Наушники", "Планшеты"),
+    "Дом и сад": ("Мебель", "Посуда", "Текстиль", "Инструменты"),
+    "Одежда": ("Мужская", "Женская", "Детская", "Обувь"),
+    "Спорт": ("Велосипеды", "Туризм", "Фитнес", "Плавание"),
+    "Продукты": ("Бакалея", "Напитки", "Сладости", "Молочные продукты"),
+    "Красота": ("Уход за кожей", "Парфюмерия", "Макияж", "Уход за волосами"),
+}
+ADJECTIVES = (
+    "Новый", "Классический", "Компактный", "Прочный", "Лёгкий", "Умный",
+    "Детский", "Профессиональный", "Складной", "Беспроводной",
+)  # fmt: skip
+NOUNS = (
+    "набор", "комплект", "чехол", "кабель", "рюкзак", "светильник",
+    "органайзер", "коврик", "стакан", "держатель",
+)  # fmt: skip
+COLORS = (
+    "чёрный", "белый", "серый", "синий", "красный", "зелёный", "бежевый",
+)  # fmt: skip
+SEED_PASSWORD = "seed-password"
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed_store(
+    products: int,
+    users: int,
+    carts: int,
+    items_per_cart: int = 10,
+    batch_size: int = 5000,
+    seed: int | None = None,
+) -> dict[str, int]:
+    """
+    Заполнить магазин синтетическими данными.
+
+    Категории и подкатегории берутся из CATEGORIES, а названия и цены
+    продуктов генерируются случайно. Все объекты создаются через
+    bulk_create пакетами по batch_size, у пользователей общий заранее
+    вычисленный хэш пароля SEED_PASSWORD. Корзины создаются для первых
+    carts новых пользователей, после чего их итоги пересчитываются.
+    Слаги и имена пользователей получают уникальный для запуска префикс,
+    поэтому повторный запуск добавляет новые данные.
+    :param products: Количество продуктов.
+    :param users: Количество пользователей.
+    :param carts: Количество корзин с товарами, не больше users.
+    :param items_per_cart: Максимальное количество позиций в корзине.
+    :param batch_size: Количество объектов, создаваемых одним запросом.
+    :param seed: Начальное значение генератора случайных чисел.
+    :return: Количество созданных объектов по моделям.
+    """
+    if carts > users:
+        raise ValueError("Корзин не может быть больше, чем пользователей.")
+    rng = random.Random(seed)
+    prefix = f"seed-{time_ns():x}"
+    with write_atomic():
+        categories = Category.objects.bulk_create(
+            Category(name=name, slug=f"{prefix}-c{index}")
+            for index, name in enumerate(CATEGORIES)
+        )
+        subcategories = SubCategory.objects.bulk_create(
+            SubCategory(
+                name=name,
+                slug=f"{prefix}-c{category_index}-s{index}",
+                category=category,
+            )
+            for category_index, (category, names) in enumerate(
+                zip(categories, CATEGORIES.values())
+            )
+            for index, name in enumerate(names)
+        )
+
+        def product_rows():
+            for index in range(products):
+                subcategory = rng.choice(subcategories)
+                yield Product(
+                    name=(
+                        f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} "
+                        f"{rng.choice(COLORS)} {index + 1}"
+                    ),
+                    slug=f"{prefix}-p{index}",
+                    price=rng.randint(
+                        max(Nv.PRICE_MIN_VALUE, 1), Nv.PRICE_MAX_VALUE // 4
+                    ),
+                    category_id=subcategory.category_id,
+                    subcategory=subcategory,
+                )
+
+        for batch in _batched(product_rows(), batch_size):
+            Product.objects.bulk_create(batch)
+        product_ids = list(
+            Product.objects.filter(slug__startswith=f"{prefix}-").values_list(
+                "pk", flat=True
+            )
+        )
+
+        password = make_password(SEED_PASSWORD)
+        for batch in _batched(range(users), batch_size):
+            User.objects.bulk_create(
+                User(username=f"{prefix}-u{index}", password=password)
+                for index in batch
+            )
+        user_ids = list(
+            User.objects.filter(username__startswith=f"{prefix}-")
+            .order_by("pk")
+            .values_list("pk", flat=True)[:carts]
+        )
+        for batch in _batched(user_ids, batch_size):
+            ShoppingCart.objects.bulk_create(
+                ShoppingCart(user_id=user_id) for user_id in batch
+            )
+        cart_ids = list(
+            ShoppingCart.objects.filter(
+                user__username__startswith=f"{prefix}-"
+            ).values_list("pk", flat=True)
+        )
+
+        def item_rows():
+            for cart_id in cart_ids:
+                count = rng.randint(1, min(items_per_cart, len(product_ids)))
+                for product_id in rng.sample(product_ids, count):
+                    yield ShoppingCartItem(
+                        cart_id=cart_id,
+                        product_id=product_id,
+                        quantity=rng.randint(
+                            Nv.ITEM_MIN_QUANTITY_IN_CART,
+                            Nv.ITEM_MAX_QUANTITY_IN_CART // 10,
+                        ),
+                    )
+
+        items = 0
+        if product_ids:
+            for batch in _batched(item_rows(), batch_size):
+                items += len(ShoppingCartItem.objects.bulk_create(batch))
+        for batch in _batched(cart_ids, batch_size):
+            ShoppingCart.objects.filter(pk__in=batch).refresh_totals()
+        get_search_backend().index_products(
+            Product.objects.filter(slug__startswith=f"{prefix}-")
+        )
+        bump_version(CATALOG_NAMESPACE)
+        bump_version(CATEGORY_TREE_NAMESPACE)
+    return dict(
+        categories=len(categories),
+        subcategories=len(subcategories),
+        products=len(product_ids),
+        users=users,
+        carts=len(cart_ids),
+        items=items,
+    )
@@ -0,0 +1,127 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import (
+    CATALOG_NAMESPACE,
+    CATEGORY_TREE_NAMESPACE,
+    bump_version,
+)
+from store.models import Category, Product, SubCategory
+from store.search import get_search_backend
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, raw=False, **kwargs):
+    """
+    Обновить продукт в поисковом индексе после сохранения.
+    """
+    if not raw:
+        get_search_backend().index_products(
+            Product.objects.filter(pk=instance.pk)
+        )
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    """
+    Удалить продукт из поискового индекса.
+    """
+    get_search_backend().remove_products((instance.pk,))
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=SubCategory)
+def remember_category_name(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    """
+    Запомнить название категории либо подкатегории до сохранения.
+
+    Если название не сохраняется (update_fields без name), запоминается
+    текущее название экземпляра без запроса к БД.
+    """
+    if update_fields is not None and "name" not in update_fields:
+        instance._saved_name = instance.name
+        return
+    instance._saved_name = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("name", flat=True)
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=SubCategory)
+def reindex_category_products(sender, instance, created, raw=False, **kwargs):
+    """
+    Переиндексировать продукты категории либо подкатегории.
+
+    Названия категории и подкатегории входят в поисковый документ
+    продукта, поэтому документы перестраиваются только при изменении
+    названия.
+    """
+    if (
+        created
+        or raw
+        or getattr(instance, "_saved_name", None) == instance.name
+    ):
+        return
+    lookup = "category" if sender is Category else "subcategory"
+    get_search_backend().index_products(
+        Product.objects.filter(**{lookup: instance})
+    )
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def bump_catalog_version(sender, **kwargs):
+    """
+    Сменить версию кэша каталога при любом изменении каталога.
+    """
+    bump_version(CATALOG_NAMESPACE)
+
+
+@receiver(post_save, sender=Product)
+def bump_category_tree_version_on_product_save(
+    sender, instance, created, update_fields=None, **kwargs
+):
+    """
+    Сменить версию дерева категорий, если изменился состав категорий.
+
+    Дерево содержит количество продуктов, поэтому версия меняется при
+    создании продукта и его переносе в другую категорию или подкатегорию.
+    Прежние категории берутся из состояния, загруженного из БД
+    (Product.remember_categories), а сохранение без полей категорий в
+    update_fields не проверяется вовсе.
+    """
+    if update_fields is not None and not set(update_fields) & {
+        "category",
+        "category_id",
+        "subcategory",
+        "subcategory_id",
+    }:
+        return
+    if created or getattr(instance, "_saved_categories", None) != (
+        instance.category_id,
+        instance.subcategory_id,
+    ):
+        bump_version(CATEGORY_TREE_NAMESPACE)
+    instance.remember_categories()
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SubCategory)
+@receiver(post_delete, sender=SubCategory)
+def bump_category_tree_version(sender, **kwargs):
+    """
+    Сменить версию дерева категорий.
+    """
+    bump_version(CATEGORY_TREE_NAMESPACE)
@@ -0,0 +1,492 @@
+import csv
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api.tests import TEST_CACHES, create_catalog
+from core.cache import CATALOG_NAMESPACE, CATEGORY_TREE_NAMESPACE, get_version
+from core.services import refresh_shopping_cart_totals
+from store.images import apply_derivatives, render_products
+from store.models import (
+    Category,
+    Product,
+    ShoppingCart,
+    ShoppingCartItem,
+    SubCategory,
+    User,
+)
+from store.search.stemmer import stem, stem_text
+
+
+def image_file(name: str) -> ContentFile:
+    """
+    Небольшое PNG-изображение для исходника продукта.
+    """
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), "red").save(buffer, format="PNG")
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImageRenderingTests(TestCase):
+    """
+    Построение копий изображений продуктов.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.TemporaryDirectory()
+        cls.enterClassContext(
+            override_settings(MEDIA_ROOT=cls.media_root.name)
+        )
+        cls.addClassCleanup(cls.media_root.cleanup)
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.products = list(
+            Product.objects.filter(pk__in=create_catalog(3)).order_by("pk")
+        )
+        for product in self.products:
+            product.source_image.save(
+                f"{product.slug}.png", image_file("source.png")
+            )
+
+    def test_render_streams_products(self):
+        consumed = []
+
+        def products():
+            for product in self.products:
+                consumed.append(product.pk)
+                yield product
+
+        with ThreadPoolExecutor(1) as executor:
+            results = render_products(executor, products(), window=2)
+            product, field, derivatives = next(results)
+            self.assertEqual(len(consumed), 2)
+            rendered = [product, *(product for product, _, _ in results)]
+        self.assertEqual(field, "source_image")
+        self.assertIsInstance(derivatives, dict)
+        self.assertCountEqual(rendered, self.products)
+
+    def test_apply_bumps_catalog_version_only(self):
+        with ThreadPoolExecutor(1) as executor:
+            product, field, derivatives = next(
+                render_products(executor, self.products[:1])
+            )
+        catalog = get_version(CATALOG_NAMESPACE)
+        category_tree = get_version(CATEGORY_TREE_NAMESPACE)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(apply_derivatives(product, field, derivatives))
+        self.assertNotEqual(get_version(CATALOG_NAMESPACE), catalog)
+        self.assertEqual(get_version(CATEGORY_TREE_NAMESPACE), category_tree)
+        product.refresh_from_db()
+        self.assertTrue(product.thumbnail)
+        self.assertIn("thumbnail", product.image_urls)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductImageUrlsTests(TestCase):
+    """
+    Сохранённые ссылки на изображения продуктов.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.TemporaryDirectory()
+        cls.enterClassContext(
+            override_settings(MEDIA_ROOT=cls.media_root.name)
+        )
+        cls.addClassCleanup(cls.media_root.cleanup)
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.product_ids = create_catalog(2)
+
+    def test_save_fills_image_urls(self):
+        product = Product.objects.get(pk=self.product_ids[0])
+        self.assertEqual(product.image_urls, {})
+        product.thumbnail = image_file("thumbnail.png")
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(
+            product.image_urls,
+            {
+                "thumbnail": product.thumbnail.url,
+                "medium_image": None,
+                "large_image": None,
+            },
+        )
+
+        product.medium_image = image_file("medium.png")
+        product.save(update_fields=["medium_image"])
+        product.refresh_from_db()
+        self.assertEqual(
+            product.image_urls["medium_image"], product.medium_image.url
+        )
+
+    def test_rebuild_fills_missing_only(self):
+        Product.objects.update(thumbnail="images/products/thumbnail.png")
+        stale = {"thumbnail": "/old/thumbnail.png"}
+        Product.objects.filter(pk=self.product_ids[0]).update(image_urls=stale)
+        version = get_version(CATALOG_NAMESPACE)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "rebuild_image_urls", "--missing-only", stdout=StringIO()
+            )
+        self.assertNotEqual(get_version(CATALOG_NAMESPACE), version)
+        products = Product.objects.order_by("pk")
+        self.assertEqual(products[0].image_urls, stale)
+        for product in products[1:]:
+            self.assertEqual(product.image_urls, product.build_image_urls())
+            self.assertIsNotNone(product.image_urls["thumbnail"])
+
+        call_command("rebuild_image_urls", stdout=StringIO())
+        product = Product.objects.get(pk=self.product_ids[0])
+        self.assertEqual(product.image_urls, product.build_image_urls())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CategoryReindexTests(TestCase):
+    """
+    Переиндексация продуктов при сохранении категорий.
+    """
+
+    def setUp(self):
+        create_catalog(1)
+        self.backend = mock.patch("store.signals.get_search_backend").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_save_without_rename_skips_reindex(self):
+        for category in (Category.objects.get(), SubCategory.objects.get()):
+            with self.subTest(model=type(category).__name__):
+                category.save()
+                category.save(update_fields=("slug",))
+                self.backend.return_value.index_products.assert_not_called()
+
+    def test_rename_reindexes_products(self):
+        for category in (Category.objects.get(), SubCategory.objects.get()):
+            with self.subTest(model=type(category).__name__):
+                self.backend.reset_mock()
+                category.name = f"{category.name} (новое)"
+                category.save()
+                index_products = self.backend.return_value.index_products
+                index_products.assert_called_once()
+                self.assertEqual(index_products.call_args.args[0].count(), 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProductCategoryTreeTests(TestCase):
+    """
+    Смена версии дерева категорий при сохранении продукта.
+    """
+
+    def setUp(self):
+        create_catalog(2)
+        mock.patch("store.signals.get_search_backend").start()
+        self.addCleanup(mock.patch.stopall)
+
+    def save(self, product: Product, **kwargs) -> bool:
+        """
+        Сохранить продукт без чтения из БД.
+
+        :return: Сменилась ли версия дерева категорий.
+        """
+        version = get_version(CATEGORY_TREE_NAMESPACE)
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                product.save(**kwargs)
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("SELECT")]
+        )
+        return get_version(CATEGORY_TREE_NAMESPACE) != version
+
+    def test_version_changes_on_move_only(self):
+        product = Product.objects.get(slug="test-p0")
+        subcategory = SubCategory.objects.get(slug="test-s1")
+        product.price += 1
+        self.assertFalse(self.save(product))
+        product.category_id = subcategory.category_id
+        product.subcategory = subcategory
+        self.assertFalse(self.save(product, update_fields=["price"]))
+        self.assertTrue(self.save(product))
+        self.assertFalse(self.save(product))
+
+    def test_unknown_categories(self):
+        category_id = Category.objects.get(slug="test-c0").pk
+        product = Product.objects.defer("category").get(slug="test-p0")
+        product.category_id = category_id
+        self.assertTrue(self.save(product))
+        self.assertFalse(self.save(product))
+
+    def test_refresh_from_db(self):
+        product = Product.objects.get(slug="test-p0")
+        moved_to = SubCategory.objects.get(slug="test-s1")
+        Product.objects.filter(pk=product.pk).update(
+            category_id=moved_to.category_id, subcategory=moved_to
+        )
+        categories = (product.category_id, product.subcategory_id)
+        product.refresh_from_db()
+        product.category_id, product.subcategory_id = categories
+        self.assertTrue(self.save(product))
+
+
+class StemmerTests(SimpleTestCase):
+    """
+    Основы русских слов для поискового индекса.
+    """
+
+    def test_endings(self):
+        for word, expected in (
+            ("книга", "книг"),
+            ("книги", "книг"),
+            ("книгу", "книг"),
+            ("телефонов", "телефон"),
+            ("смартфонами", "смартфон"),
+            ("красивая", "красив"),
+            ("красивые", "красив"),
+            ("машинный", "машин"),
+            ("новейший", "нов"),
+            ("читали", "чита"),
+            ("открывается", "открыва"),
+            ("прочитавши", "прочита"),
+            ("умывшись", "ум"),
+            ("радость", "радост"),
+        ):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_short_and_foreign_words(self):
+        for word, expected in (
+            ("я", "я"),
+            ("он", "он"),
+            ("дом", "дом"),
+            ("ёлка", "елк"),
+            ("iphone", "iphone"),
+            ("15", "15"),
+        ):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_stem_text(self):
+        self.assertEqual(
+            stem_text("Детские Игрушки и iPhone 15"),
+            "детск игрушк и iphone 15",
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AbandonedCartTests(TestCase):
+    """
+    Удаление заброшенных корзин после пересчёта итогов.
+    """
+
+    def setUp(self):
+        product = Product.objects.get(pk=create_catalog(1)[0])
+        self.carts = []
+        for username in ("idle", "active"):
+            cart = ShoppingCart.objects.create(
+                user=User.objects.create(username=username)
+            )
+            ShoppingCartItem.objects.create(
+                cart=cart, product=product, quantity=2
+            )
+            self.carts.append(cart)
+        long_ago = timezone.now() - timedelta(days=60)
+        ShoppingCart.objects.update(
+            updated_at=long_ago, last_activity_at=long_ago
+        )
+
+    def test_recalculation_keeps_carts_abandoned(self):
+        idle, active = self.carts
+        call_command("recalculate_cart_totals", stdout=StringIO())
+        refresh_shopping_cart_totals(active)
+        self.assertEqual(
+            ShoppingCart.objects.get(pk=idle.pk).total_quantity, 2
+        )
+
+        call_command("purge_abandoned_carts", "--days=30", stdout=StringIO())
+        self.assertQuerySetEqual(
+            ShoppingCart.objects.values_list("pk", flat=True), [active.pk]
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RecalculateCartTotalsTests(TestCase):
+    """
+    Проверка и пересчёт хранимых итогов корзин.
+    """
+
+    def setUp(self):
+        self.product = Product.objects.get(pk=create_catalog(1)[0])
+        self.carts = []
+        for username in ("first", "second"):
+            cart = ShoppingCart.objects.create(
+                user=User.objects.create(username=username)
+            )
+            ShoppingCartItem.objects.create(
+                cart=cart, product=self.product, quantity=3
+            )
+            self.carts.append(cart)
+        ShoppingCart.objects.refresh_totals()
+
+    def check_totals(self) -> None:
+        call_command("recalculate_cart_totals", "--check", stdout=StringIO())
+
+    def test_check_detects_price_change(self):
+        self.check_totals()
+        Product.objects.filter(pk=self.product.pk).update(
+            price=self.product.price + 10
+        )
+        with self.assertRaisesMessage(CommandError, "в 2 корзинах"):
+            self.check_totals()
+
+        call_command(
+            "recalculate_cart_totals", "--batch-size=1", stdout=StringIO()
+        )
+        self.check_totals()
+        for cart in self.carts:
+            cart.refresh_from_db()
+            self.assertEqual(cart.total_price, (self.product.price + 10) * 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportCatalogTests(TestCase):
+    """
+    Импорт каталога из файла поставщика.
+    """
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        create_catalog(1)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    @staticmethod
+    def row(slug: str, name: str = "Импортированный продукт", **fields):
+        return {
+            "name": name,
+            "slug": slug,
+            "price": 100,
+            "category": "test-c0",
+            "subcategory": "test-s0",
+            **fields,
+        }
+
+    def write_jsonl(self, *lines) -> Path:
+        path = self.directory / "catalog.jsonl"
+        path.write_text(
+            "\n".join(
+                line if isinstance(line, str) else json.dumps(line)
+                for line in lines
+            ),
+            encoding="utf-8",
+        )
+        return path
+
+    def import_catalog(self, path: Path, *args) -> tuple[str, str]:
+        stdout, stderr = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "import_catalog", path, *args, stdout=stdout, stderr=stderr
+            )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_upsert_by_slug(self):
+        path = self.directory / "catalog.csv"
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=self.row("").keys())
+            writer.writeheader()
+            writer.writerow(self.row("test-p0", name="Обновлённый", price=7))
+            writer.writerow(self.row("new-product"))
+        count = Product.objects.count()
+        for _ in range(2):
+            self.import_catalog(path)
+            self.assertEqual(Product.objects.count(), count + 1)
+        product = Product.objects.get(slug="test-p0")
+        self.assertEqual((product.name, product.price), ("Обновлённый", 7))
+        self.assertTrue(Product.objects.filter(slug="new-product").exists())
+
+    def test_invalid_rows_are_reported(self):
+        path = self.write_jsonl(
+            self.row("valid"),
+            "{не json",
+            self.row("bad-price", price="дорого"),
+            self.row("bad slug"),
+            self.row("no-category", category="missing"),
+            self.row("no-subcategory", subcategory="missing"),
+        )
+        stdout, stderr = self.import_catalog(path)
+        self.assertEqual(
+            [line.split(":")[0] for line in stderr.splitlines()],
+            [f"Строка {number}" for number in range(2, 7)],
+        )
+        self.assertIn("Импортировано 1 продуктов из 6 строк", stdout)
+        self.assertEqual(
+            list(
+                Product.objects.filter(
+                    slug__in=("valid", "bad-price", "no-category")
+                ).values_list("slug", flat=True)
+            ),
+            ["valid"],
+        )
+
+    def test_max_errors_aborts_and_bumps_version(self):
+        path = self.write_jsonl(
+            self.row("first"), "{", "{", self.row("never-imported")
+        )
+        version = get_version(CATALOG_NAMESPACE)
+        with self.assertRaisesMessage(
+            CommandError, "импортировано продуктов: 1"
+        ):
+            self.import_catalog(path, "--chunk-size=1", "--max-errors=1")
+        self.assertTrue(Product.objects.filter(slug="first").exists())
+        self.assertFalse(
+            Product.objects.filter(slug="never-imported").exists()
+        )
+        self.assertNotEqual(get_version(CATALOG_NAMESPACE), version)
+
+    def test_nothing_imported_keeps_version(self):
+        path = self.write_jsonl("{")
+        version = get_version(CATALOG_NAMESPACE)
+        self.import_catalog(path)
+        self.assertEqual(get_version(CATALOG_NAMESPACE), version)
+
+    def test_search_index_updated_per_chunk(self):
+        path = self.write_jsonl(
+            *(self.row(f"chunked-{index}") for index in range(5))
+        )
+        with mock.patch(
+            "store.management.commands.import_catalog.get_search_backend"
+        ) as backend:
+            self.import_catalog(path, "--chunk-size=2")
+        calls = backend.return_value.index_products.call_args_list
+        self.assertEqual(
+            [
+                sorted(call.args[0].values_list("slug", flat=True))
+                for call in calls
+            ],
+            [
+                ["chunked-0", "chunked-1"],
+                ["chunked-2", "chunked-3"],
+                ["chunked-4"],
+            ],
+        )